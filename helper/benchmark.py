@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+'''
+Offline throughput benchmark of the preprocessing.
+---
+Synthetic cohorts are generated from the cases in tests/data/cases and
+processed with pedia.py against local stand-ins of Mutalyzer, Phenomizer and
+Jannovar with a configurable latency. Every cohort is processed in a separate
+process with an empty cache, reporting cases per second, peak memory usage
+and the time spent in every stage.
+
+OMIM files (mim2gene.txt, morbidmap.txt) have to exist in the directory given
+with --mimdir, since they are not downloaded.
+
+Usage:
+    python3 helper/benchmark.py --sizes 100 1000 --latency 0.05
+    python3 helper/benchmark.py --sizes 1000 --pedia-args --stream
+    python3 helper/benchmark.py --sizes 1000 --checkpoints
+'''
+import os
+import sys
+import json
+import copy
+import glob
+import time
+import random
+import shutil
+import argparse
+import resource
+import subprocess
+import configparser
+
+# cohorts are processed inside of their working directory, since pedia.py
+# writes some outputs into the current directory
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(REPO_DIR)
+
+from helper.service_standins import (
+    MutalyzerStandin, PhenomizerStandin, JannovarStandin
+)
+
+
+TEMPLATE_DIR = "tests/data/cases"
+
+# checkpoint stage of created cases, see pedia.CASE_STAGE
+CASE_STAGE = "case_cleaned"
+
+# offset of synthetic case ids, to not collide with template case ids
+CASE_ID_OFFSET = 1000000
+
+
+def load_templates(template_dir: str) -> [dict]:
+    '''Load all cases in lab format from the template directory.'''
+    templates = []
+    for path in sorted(glob.glob(os.path.join(template_dir, "*.json"))):
+        with open(path) as json_file:
+            data = json.load(json_file)
+        if "case_data" in data:
+            templates.append(data)
+    return templates
+
+
+def get_omim_ids(templates: [dict]) -> [str]:
+    '''Get omim ids of all syndromes in the template cases.'''
+    omim_ids = set()
+    for template in templates:
+        case_data = template["case_data"]
+        for syndrome in (
+                case_data["selected_syndromes"]
+                + case_data.get("suggested_syndromes", [])
+        ):
+            syndrome = syndrome["syndrome"]
+            if syndrome["omim_id"]:
+                omim_ids.add(str(syndrome["omim_id"]))
+            omim_ids.update(str(o) for o in syndrome["omim_ids"] or [] if o)
+    return sorted(omim_ids)
+
+
+def create_case(template: dict, index: int, rand: random.Random) -> dict:
+    '''Create a synthetic lab case with unique case and entry ids and
+    shuffled features.'''
+    case = copy.deepcopy(template)
+    case_id = CASE_ID_OFFSET + index
+    case["lab_case_id"] = case_id
+    case["f2g_case_id"] = case_id
+    case["source_case_id"] = case_id
+    case["case_data"]["case_id"] = str(case_id)
+    for i, entry in enumerate(case["case_data"].get("genomic_entries", [])):
+        if isinstance(entry, dict):
+            entry["entry_id"] = "{}{:02d}".format(case_id, i)
+    rand.shuffle(case["case_data"]["selected_features"])
+    return case
+
+
+def create_cohort(
+        templates: [dict], size: int, case_dir: str, seed: int = 0
+):
+    '''Write cohort of synthetic cases into the directory.'''
+    rand = random.Random(seed)
+    os.makedirs(case_dir, exist_ok=True)
+    for index in range(size):
+        case = create_case(templates[index % len(templates)], index, rand)
+        path = os.path.join(case_dir, "{}.json".format(case["lab_case_id"]))
+        with open(path, "w") as json_file:
+            json.dump(case, json_file)
+
+
+def create_config(
+        path: str, workdir: str, mimdir: str,
+        phenomizer_url: str, jannovar_port: int,
+        dump_intermediate: bool = False
+):
+    '''Create config.ini using the stand-in services and only paths inside
+    of the working directory.'''
+    config = configparser.ConfigParser()
+    config.read_dict({
+        "general": {
+            "logfile": os.path.join(workdir, "preprocess.log"),
+            "dump_intermediate": str(dump_intermediate).lower(),
+            "checkpoint_path": os.path.join(workdir, "checkpoints"),
+            "data_path": os.path.join(workdir, "data"),
+        },
+        "classifier": {"train_pickle_path": "", "param_c": ""},
+        "input": {"download": "false"},
+        "output": {
+            "converted_path": "jsons/phenomized",
+            "vcf_config_file": "config.yml",
+            "simulated_vcf_path": "mutations",
+            "real_vcf_path": "vcfs/original",
+            "quality_check_log": "quality_check.json",
+            "valid_case_path": "process/checked",
+            "case_manifest": "case_manifest.json",
+        },
+        "pedia": {
+            "lab_id": "", "key": "", "secret": "",
+            "download_path": os.path.join(workdir, "lab"),
+            "corrected_path": os.path.join(workdir, "lab", "corrected"),
+            "output": os.path.join(workdir, "output"),
+        },
+        "omim": {"mimdir": mimdir, "mim2gene_hash": "", "morbidmap_hash": ""},
+        "jannovar": {"url": "localhost", "port": str(jannovar_port)},
+        "phenomizer": {
+            "url": phenomizer_url, "user": "benchmark",
+            "password": "benchmark",
+        },
+        "errorfixer": {
+            "error_path": os.path.join(workdir, "hgvs_errors.json"),
+            "new_error_path": os.path.join(workdir, "hgvs_new_errors.json"),
+        },
+    })
+    with open(path, "w") as config_file:
+        config.write(config_file)
+
+
+def run_pedia(args):
+    '''Run pedia.py in the current process, with cache directory and
+    mutalyzer url set before any service is created.'''
+    from lib import constants
+    constants.CACHE_DIR = args.cache_dir
+    from lib.api import mutalyzer
+    mutalyzer.Mutalyzer.wsdl_url = args.wsdl_url
+    mutalyzer.Mutalyzer.base_url = args.json_url
+
+    import pedia
+    sys.argv = [
+        "pedia.py", "--config", args.config, "--profile", "--filter-failed"
+    ] + args.pedia_args
+
+    start = time.perf_counter()
+    pedia.main()
+    wall = time.perf_counter() - start
+
+    with open(args.result, "w") as result_file:
+        json.dump({
+            "wall": wall,
+            "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "children_max_rss_kb": resource.getrusage(
+                resource.RUSAGE_CHILDREN
+            ).ru_maxrss,
+        }, result_file)
+
+
+def benchmark_size(args, templates, services, size: int) -> dict:
+    '''Process a cohort of the given size in a separate process.'''
+    mutalyzer, phenomizer, jannovar = services
+    workdir = os.path.abspath(os.path.join(args.workdir, str(size)))
+    if os.path.exists(workdir):
+        shutil.rmtree(workdir)
+    create_cohort(
+        templates, size, os.path.join(workdir, "lab", "cases"), args.seed
+    )
+    config_path = os.path.join(workdir, "config.ini")
+    create_config(
+        config_path, workdir, os.path.abspath(args.mimdir),
+        phenomizer.url, jannovar.port,
+        dump_intermediate=args.checkpoints
+    )
+
+    result_path = os.path.join(workdir, "result.json")
+    command = [
+        sys.executable, os.path.abspath(__file__), "run",
+        "--config", config_path,
+        "--cache-dir", os.path.join(workdir, "cache"),
+        "--wsdl-url", mutalyzer.wsdl_url,
+        "--json-url", mutalyzer.json_url,
+        "--result", result_path,
+        "--pedia-args", *args.pedia_args
+    ]
+    with open(os.path.join(workdir, "stdout.log"), "w") as log_file:
+        subprocess.run(
+            command, stdout=log_file, stderr=subprocess.STDOUT, check=True,
+            cwd=workdir
+        )
+
+    with open(result_path) as result_file:
+        result = json.load(result_file)
+    with open(os.path.join(workdir, "output", "profile.json")) as profile:
+        stages = json.load(profile)["stages"]
+
+    result = {
+        "cases": size,
+        "wall": result["wall"],
+        "cases_per_second": size / result["wall"],
+        "peak_rss_mb": max(
+            result["max_rss_kb"], result["children_max_rss_kb"]
+        ) / 1024,
+        "stages": {
+            name: round(stats["wall"], 3) for name, stats in stages.items()
+        },
+    }
+    if args.checkpoints:
+        result["checkpoint_mb_per_1k_cases"] = get_checkpoint_size(
+            os.path.join(workdir, "checkpoints", CASE_STAGE)
+        ) / 1024 ** 2 / size * 1000
+    return result
+
+
+def get_checkpoint_size(path: str) -> int:
+    '''Get size of all case checkpoints of a stage in bytes.'''
+    return sum(
+        os.path.getsize(os.path.join(path, filename))
+        for filename in os.listdir(path)
+    ) if os.path.exists(path) else 0
+
+
+def print_result(result: dict):
+    print(
+        "{cases:>6} cases {wall:9.1f}s {cases_per_second:9.2f} cases/s "
+        "{peak_rss_mb:8.1f} MB peak rss".format(**result)
+    )
+    if "checkpoint_mb_per_1k_cases" in result:
+        print("    {:<24} {:9.3f}MB".format(
+            "checkpoints per 1k cases", result["checkpoint_mb_per_1k_cases"]
+        ))
+    for name, seconds in result["stages"].items():
+        print("    {:<24} {:9.3f}s".format(name, seconds))
+
+
+def benchmark(args):
+    templates = load_templates(args.templates)
+    latency = args.latency
+    services = (
+        MutalyzerStandin(latency),
+        PhenomizerStandin(get_omim_ids(templates), latency),
+        JannovarStandin(latency),
+    )
+    for service in services:
+        service.start()
+
+    results = []
+    try:
+        for size in args.sizes:
+            result = benchmark_size(args, templates, services, size)
+            print_result(result)
+            results.append(result)
+    finally:
+        for service in services:
+            service.stop()
+
+    with open(args.output, "w") as output_file:
+        json.dump(
+            {"latency": latency, "pedia_args": args.pedia_args,
+             "results": results},
+            output_file, indent=4
+        )
+
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(
+        description="Benchmark preprocessing against local service stand-ins"
+    )
+    parser.add_argument(
+        "mode", nargs="?", choices=["benchmark", "run"], default="benchmark",
+        help="run is used internally to process a single cohort"
+    )
+    parser.add_argument(
+        "--sizes", nargs="+", type=int, default=[100, 1000, 10000],
+        help="Number of cases in generated cohorts"
+    )
+    parser.add_argument(
+        "--latency", type=float, default=0.0,
+        help="Latency of every service request in seconds"
+    )
+    parser.add_argument("--templates", default=TEMPLATE_DIR)
+    parser.add_argument("--mimdir", default="data/omim")
+    parser.add_argument("--workdir", default="benchmark")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--checkpoints", action="store_true",
+        help="Save case checkpoints and report their size per 1k cases"
+    )
+    parser.add_argument("--output", default="benchmark/benchmark.json")
+    parser.add_argument(
+        "--pedia-args", nargs=argparse.REMAINDER, default=[],
+        help="Additional arguments passed to pedia.py, eg --stream"
+    )
+    # used in run mode
+    parser.add_argument("--config")
+    parser.add_argument("--cache-dir")
+    parser.add_argument("--wsdl-url")
+    parser.add_argument("--json-url")
+    parser.add_argument("--result")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    if args.mode == "run":
+        run_pedia(args)
+    else:
+        os.makedirs(args.workdir, exist_ok=True)
+        benchmark(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+'''
+Build the local index of rs numbers to hgvs descriptions from a dbSNP vcf.
+---
+Usage:
+    python3 helper/build_dbsnp_index.py \
+        data/dbSNPs/b147/All_20160601.vcf.gz \
+        data/dbSNPs/b147/All_20160601.rsindex
+'''
+import os
+import sys
+import logging
+import argparse
+
+sys.path.append(os.getcwd())
+
+from lib.dbsnp_index import build_index
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Build index of rs numbers from a dbSNP vcf."
+    )
+    parser.add_argument("vcf", help="dbSNP vcf file, can be gzipped")
+    parser.add_argument("index", help="Path of the created index")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    count = build_index(args.vcf, args.index)
+    print("Indexed {} dbSNP entries in {}".format(count, args.index))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+'''
+Local stand-ins for the external services used in the preprocessing.
+---
+Stand-ins answer every request with a syntactically valid response after an
+injected latency, so that the pipeline can be run offline:
+
+MutalyzerStandin - SOAP service with WSDL and JSON endpoint
+PhenomizerStandin - Phenomizer/BOQA http endpoint returning tsv results
+JannovarStandin - Jannovar hgvs-to-vcf socket server
+'''
+import re
+import time
+import base64
+import socket
+import threading
+import socketserver
+import urllib.parse
+import xml.etree.ElementTree as ET
+from http.server import HTTPServer, BaseHTTPRequestHandler
+import json
+
+
+MUTALYZER_NS = "http://mutalyzer.nl/2.0/services"
+SOAP_NS = "http://schemas.xmlsoap.org/soap/envelope/"
+
+MUTALYZER_WSDL = '''<?xml version="1.0" encoding="UTF-8"?>
+<definitions xmlns="http://schemas.xmlsoap.org/wsdl/"
+             xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+             xmlns:xs="http://www.w3.org/2001/XMLSchema"
+             xmlns:tns="{ns}"
+             targetNamespace="{ns}" name="Mutalyzer">
+  <types>
+    <xs:schema targetNamespace="{ns}" elementFormDefault="qualified">
+      <xs:complexType name="SoapMessage">
+        <xs:sequence>
+          <xs:element name="errorcode" type="xs:string" minOccurs="0"/>
+          <xs:element name="message" type="xs:string" minOccurs="0"/>
+        </xs:sequence>
+      </xs:complexType>
+      <xs:complexType name="SoapMessageArray">
+        <xs:sequence>
+          <xs:element name="SoapMessage" type="tns:SoapMessage"
+                      minOccurs="0" maxOccurs="unbounded"/>
+        </xs:sequence>
+      </xs:complexType>
+      <xs:complexType name="CheckSyntaxOutput">
+        <xs:sequence>
+          <xs:element name="valid" type="xs:boolean"/>
+          <xs:element name="messages" type="tns:SoapMessageArray"
+                      minOccurs="0"/>
+        </xs:sequence>
+      </xs:complexType>
+      <xs:complexType name="StringArray">
+        <xs:sequence>
+          <xs:element name="string" type="xs:string"
+                      minOccurs="0" maxOccurs="unbounded"/>
+        </xs:sequence>
+      </xs:complexType>
+      {elements}
+    </xs:schema>
+  </types>
+  {messages}
+  <portType name="MutalyzerPort">{port_operations}</portType>
+  <binding name="MutalyzerBinding" type="tns:MutalyzerPort">
+    <soap:binding style="document"
+                  transport="http://schemas.xmlsoap.org/soap/http"/>
+    {binding_operations}
+  </binding>
+  <service name="Mutalyzer">
+    <port name="MutalyzerPort" binding="tns:MutalyzerBinding">
+      <soap:address location="{location}"/>
+    </port>
+  </service>
+</definitions>
+'''
+
+# operation name, input parameters and result type
+MUTALYZER_OPERATIONS = [
+    ("checkSyntax", [("variant", "xs:string")], "tns:CheckSyntaxOutput"),
+    ("getdbSNPDescriptions", [("rs_id", "xs:string")], "tns:StringArray"),
+    (
+        "submitBatchJob",
+        [
+            ("data", "xs:base64Binary"), ("process", "xs:string"),
+            ("argument", "xs:string")
+        ],
+        "xs:string"
+    ),
+    ("monitorBatchJob", [("job_id", "xs:string")], "xs:int"),
+    ("getBatchJob", [("job_id", "xs:string")], "xs:base64Binary"),
+]
+
+
+def build_wsdl(location: str) -> str:
+    '''Create WSDL document for all stand-in operations.'''
+    elements = []
+    messages = []
+    port_operations = []
+    binding_operations = []
+    for name, params, result in MUTALYZER_OPERATIONS:
+        elements.append(
+            '<xs:element name="{name}"><xs:complexType><xs:sequence>{params}'
+            '</xs:sequence></xs:complexType></xs:element>'
+            '<xs:element name="{name}Response"><xs:complexType><xs:sequence>'
+            '<xs:element name="{name}Result" type="{result}"/>'
+            '</xs:sequence></xs:complexType></xs:element>'.format(
+                name=name, result=result, params="".join(
+                    '<xs:element name="{}" type="{}"/>'.format(p, t)
+                    for p, t in params
+                )
+            )
+        )
+        messages.append(
+            '<message name="{name}"><part name="parameters" '
+            'element="tns:{name}"/></message>'
+            '<message name="{name}Response"><part name="parameters" '
+            'element="tns:{name}Response"/></message>'.format(name=name)
+        )
+        port_operations.append(
+            '<operation name="{name}"><input message="tns:{name}"/>'
+            '<output message="tns:{name}Response"/></operation>'.format(
+                name=name
+            )
+        )
+        binding_operations.append(
+            '<operation name="{name}"><soap:operation soapAction="{name}" '
+            'style="document"/><input><soap:body use="literal"/></input>'
+            '<output><soap:body use="literal"/></output>'
+            '</operation>'.format(name=name)
+        )
+    return MUTALYZER_WSDL.format(
+        ns=MUTALYZER_NS, location=location, elements="".join(elements),
+        messages="".join(messages), port_operations="".join(port_operations),
+        binding_operations="".join(binding_operations),
+    )
+
+
+class ThreadedHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class ThreadedTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class Standin:
+    '''Run a server in a background thread with an injected latency in
+    seconds for every request.'''
+
+    def __init__(self, latency: float = 0.0, port: int = 0):
+        self.latency = latency
+        self.server = self.create_server(("localhost", port))
+        self.server.standin = self
+        self.port = self.server.server_address[1]
+        self._thread = None
+
+    def create_server(self, address):
+        raise NotImplementedError
+
+    def wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+class MutalyzerHandler(BaseHTTPRequestHandler):
+    '''Answer SOAP and JSON requests. All variants are syntactically valid
+    and all transcripts are correct.'''
+
+    def log_message(self, *args):
+        pass
+
+    def _respond(self, body: str, content_type: str):
+        data = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path.startswith("/json/"):
+            self.server.standin.wait()
+            params = dict(urllib.parse.parse_qsl(parsed.query))
+            method = parsed.path.split("/")[-1]
+            result = self.server.standin.json_result(method, params)
+            self._respond(json.dumps(result), "application/json")
+        else:
+            self._respond(
+                build_wsdl(self.server.standin.soap_url), "text/xml"
+            )
+
+    def do_POST(self):
+        self.server.standin.wait()
+        length = int(self.headers.get("Content-Length", 0))
+        envelope = ET.fromstring(self.rfile.read(length))
+        body = envelope.find("{%s}Body" % SOAP_NS)
+        operation = list(body)[0]
+        name = operation.tag.split("}")[-1]
+        params = {
+            child.tag.split("}")[-1]: child.text or ""
+            for child in operation
+        }
+        result = self.server.standin.soap_result(name, params)
+        self._respond(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            '<soap:Envelope xmlns:soap="{soap}" xmlns:tns="{ns}"><soap:Body>'
+            '<tns:{name}Response><tns:{name}Result>{result}'
+            '</tns:{name}Result></tns:{name}Response>'
+            '</soap:Body></soap:Envelope>'.format(
+                soap=SOAP_NS, ns=MUTALYZER_NS, name=name, result=result
+            ),
+            "text/xml; charset=utf-8"
+        )
+
+
+class MutalyzerStandin(Standin):
+    '''Mutalyzer SOAP and JSON service.'''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create_server(self, address):
+        return ThreadedHTTPServer(address, MutalyzerHandler)
+
+    @property
+    def soap_url(self) -> str:
+        return "http://localhost:{}/services".format(self.port)
+
+    @property
+    def wsdl_url(self) -> str:
+        return self.soap_url + "/?wsdl"
+
+    @property
+    def json_url(self) -> str:
+        return "http://localhost:{}/json/".format(self.port)
+
+    def json_result(self, method: str, params: dict):
+        if method == "checkSyntax":
+            return {"valid": True, "messages": []}
+        if method == "getdbSNPDescriptions":
+            return []
+        return None
+
+    def soap_result(self, name: str, params: dict) -> str:
+        if name == "checkSyntax":
+            return "<tns:valid>true</tns:valid><tns:messages/>"
+        if name == "getdbSNPDescriptions":
+            return ""
+        if name == "submitBatchJob":
+            variants = base64.b64decode(params["data"]).decode("utf-8")
+            with self._lock:
+                job_id = str(len(self._jobs) + 1)
+                self._jobs[job_id] = variants.split("\n")
+            return job_id
+        if name == "monitorBatchJob":
+            return "0"
+        if name == "getBatchJob":
+            with self._lock:
+                variants = self._jobs.pop(params["job_id"], [])
+            rows = ["Input Variant\tErrors\tChromosomal Variant\tCoding"]
+            rows += ["{}\t\t\t".format(v) for v in variants if v]
+            return base64.b64encode(
+                "\n".join(rows).encode("utf-8")
+            ).decode("ascii")
+        return ""
+
+
+class PhenomizerHandler(BaseHTTPRequestHandler):
+    '''Answer phenomizer and boqa queries with scores for a fixed list of
+    omim ids.'''
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.server.standin.wait()
+        params = dict(urllib.parse.parse_qsl(
+            urllib.parse.urlparse(self.path).query
+        ))
+        data = self.server.standin.result(params).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class PhenomizerStandin(Standin):
+    '''Phenomizer service returning scores decreasing in the order of the
+    provided omim ids.'''
+
+    def __init__(self, omim_ids: [str], *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.omim_ids = omim_ids
+
+    def create_server(self, address):
+        return ThreadedHTTPServer(address, PhenomizerHandler)
+
+    @property
+    def url(self) -> str:
+        return "http://localhost:{}/".format(self.port)
+
+    def result(self, params: dict) -> str:
+        numres = int(params.get("numres", 100))
+        rows = ["#header"]
+        for rank, omim_id in enumerate(self.omim_ids[:numres]):
+            value = (rank + 1) / (len(self.omim_ids) + 1)
+            name = "Syndrome {}".format(omim_id)
+            if params.get("doboqa") == "true":
+                rows.append("\t".join(
+                    [str(1 - value), "", "OMIM:" + omim_id, name]
+                ))
+            else:
+                rows.append("\t".join([
+                    str(value), "1.0", "OMIM:" + omim_id, name, "", ""
+                ]))
+        return "\n".join(rows) + "\n"
+
+
+class JannovarHandler(socketserver.BaseRequestHandler):
+    '''Convert hgvs strings to vcf lines using the jannovar server protocol.
+    Message length is sent in the first line followed by the status line in
+    the response.'''
+
+    def handle(self):
+        data = b""
+        while b"\n" not in data:
+            chunk = self.request.recv(2048)
+            if not chunk:
+                return
+            data += chunk
+        msglen, data = data.split(b"\n", 1)
+        msglen = int(msglen.decode("utf-8"))
+        while len(data) < msglen:
+            chunk = self.request.recv(2048)
+            if not chunk:
+                break
+            data += chunk
+
+        self.server.standin.wait()
+        variants = [v for v in data.decode("utf-8").split("\n") if v]
+        vcf = self.server.standin.result(variants).encode("utf-8")
+        self.request.sendall(
+            "{}\n0\n".format(len(vcf)).encode("utf-8") + vcf
+        )
+
+
+class JannovarStandin(Standin):
+    '''Jannovar server placing every variant on a distinct position.'''
+
+    def create_server(self, address):
+        return ThreadedTCPServer(address, JannovarHandler)
+
+    @staticmethod
+    def result(variants: [str]) -> str:
+        rows = ["#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE"]
+        for i, variant in enumerate(variants):
+            rows.append("\t".join([
+                "1", str(100000 + i), ".", "A", "G", ".", ".",
+                'HGVS="{}"'.format(variant), "GT", "0/1"
+            ]))
+        return "\n".join(rows) + "\n"
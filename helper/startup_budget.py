@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+'''
+Startup time budget of preprocessing entry points.
+---
+Every entry point is started in a fresh interpreter several times. The median
+wall time has to stay within its budget and heavy dependencies only needed
+for service access or the workflow must not be imported.
+
+Exits with status 1 if any entry point exceeds its budget.
+
+Usage:
+    python3 helper/startup_budget.py
+    python3 helper/startup_budget.py --runs 10 --scale 2.0
+'''
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+
+# modules only needed for service access, vcf generation or the workflow
+HEAVY_MODULES = [
+    "zeep", "boto3", "botocore", "hgvs.parser", "snakemake",
+    "requests_cache",
+]
+
+# entry point name, python statements run and budget in seconds
+ENTRY_POINTS = [
+    (
+        "pedia.py --help",
+        "import sys, runpy\n"
+        "sys.argv = ['pedia.py', '--help']\n"
+        "try:\n"
+        "    runpy.run_path('pedia.py', run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n",
+        3.0,
+    ),
+    ("lib.global_singletons", "import lib.global_singletons\n", 0.5),
+    ("lib.quality_check", "import lib.quality_check\n", 0.5),
+]
+
+REPORT = (
+    "import sys, json\n"
+    "json.dump([m for m in {} if m in sys.modules], sys.stderr)\n"
+)
+
+
+def run_entry_point(statements: str) -> (float, [str]):
+    '''Run statements in a new interpreter and return wall time and imported
+    heavy modules.'''
+    start = time.perf_counter()
+    process = subprocess.run(
+        [sys.executable, "-c", statements + REPORT.format(HEAVY_MODULES)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+    )
+    wall = time.perf_counter() - start
+    output = process.stderr.decode("utf-8").strip()
+    if process.returncode != 0:
+        raise RuntimeError(output)
+    return wall, json.loads(output.split("\n")[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check startup time of entry points against a budget."
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0,
+        help="Factor applied to all budgets, eg for slow machines"
+    )
+    args = parser.parse_args()
+
+    exceeded = False
+    for name, statements, budget in ENTRY_POINTS:
+        budget *= args.scale
+        try:
+            results = [
+                run_entry_point(statements) for _ in range(args.runs)
+            ]
+        except RuntimeError as error:
+            exceeded = True
+            print("{:<24} FAIL\n{}".format(name, error))
+            continue
+        median = statistics.median(wall for wall, _ in results)
+        heavy = results[-1][1]
+        failed = median > budget or bool(heavy)
+        exceeded |= failed
+        print("{:<24} {:6.3f}s budget {:6.3f}s {}{}".format(
+            name, median, budget, "FAIL" if failed else "ok",
+            " imports {}".format(", ".join(heavy)) if heavy else ""
+        ))
+    sys.exit(1 if exceeded else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+'''
+Concurrent service requests
+---
+Run many blocking service calls concurrently with asyncio. Calls are executed
+in a thread pool, so that the existing clients and their on-disk caches are
+used unchanged.
+
+Calls are grouped by host. For every host the number of calls in flight and
+the number of calls started per second are limited. Failed calls are retried
+with exponential backoff.
+'''
+import time
+import asyncio
+import logging
+import concurrent.futures
+from typing import Callable, Iterable, Any
+
+from lib.singleton import LazyConfigure
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class HostLimit:
+    '''Concurrency and rate limit of a single host. Has to be created inside
+    of the running event loop.'''
+
+    def __init__(self, max_concurrency: int, rate_limit: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.interval = 1 / rate_limit if rate_limit else 0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait_rate(self):
+        '''Wait until the next call can be started.'''
+        if not self.interval:
+            return
+        loop = asyncio.get_event_loop()
+        async with self._lock:
+            now = loop.time()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+class ConcurrentRequests(LazyConfigure):
+    '''Execute blocking service calls concurrently.'''
+
+    def __init__(self):
+        super().__init__()
+        self.max_concurrency = 50
+        self.rate_limit = 0.0
+        self.retries = 3
+        self.backoff = 0.5
+
+    def configure(
+            self,
+            max_concurrency: int = 50,
+            rate_limit: float = 0.0,
+            retries: int = 3,
+            backoff: float = 0.5,
+    ):
+        '''
+        Params:
+            max_concurrency: Maximum number of calls in flight per host
+            rate_limit: Maximum number of calls started per second and host,
+                        0 disables the limit
+            retries: Number of retries of failed calls
+            backoff: Delay before the first retry in seconds, doubled for
+                     every further retry
+        '''
+        super().configure()
+        self.max_concurrency = max_concurrency
+        self.rate_limit = rate_limit
+        self.retries = retries
+        self.backoff = backoff
+
+    async def _call(self, executor, limit, func, item, default):
+        loop = asyncio.get_event_loop()
+        for attempt in range(self.retries + 1):
+            async with limit.semaphore:
+                await limit.wait_rate()
+                try:
+                    return await loop.run_in_executor(executor, func, item)
+                except Exception as error:
+                    if attempt == self.retries:
+                        LOGGER.warning(
+                            "Request for %s failed after %d tries: %s",
+                            item, attempt + 1, error
+                        )
+                        return default
+            await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def _map(self, calls, default):
+        limits = {}
+        for host, _, _ in calls:
+            if host not in limits:
+                limits[host] = HostLimit(self.max_concurrency, self.rate_limit)
+        workers = max(1, self.max_concurrency * len(limits))
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            return await asyncio.gather(*[
+                self._call(executor, limits[host], func, item, default)
+                for host, func, item in calls
+            ])
+
+    def run(
+            self, calls: [(str, Callable[[Any], Any], Any)], default=None
+    ) -> list:
+        '''Run calls given as tuples of host, function and argument. Returns
+        results in the order of the calls and the default for calls failing
+        in all tries.'''
+        if not calls:
+            return []
+        start = time.perf_counter()
+        loop = asyncio.new_event_loop()
+        try:
+            results = loop.run_until_complete(self._map(calls, default))
+        finally:
+            loop.close()
+        LOGGER.debug(
+            "Finished %d requests in %.2fs", len(calls),
+            time.perf_counter() - start
+        )
+        return results
+
+    def map(
+            self, host: str, func: Callable[[Any], Any], items: Iterable,
+            default=None
+    ) -> list:
+        '''Call function for all items on a single host.'''
+        return self.run([(host, func, item) for item in items], default)
@@ -8,7 +8,7 @@ import typing
 
 from contextlib import contextmanager
 
-from lib.vcf_jannovar import jannovar_vcf_to_table
+from lib.vcf_jannovar import jannovar_vcf_to_table, split_jannovar_vcf
 from lib.singleton import LazyConfigure
 
 LOGGER = logging.getLogger(__name__)
@@ -26,15 +26,18 @@ class JannovarClient(LazyConfigure):
         super().__init__()
         self.url = None
         self.port = None
+        self.batch_size = 200
 
     def configure(
             self,
             url: str = "localhost",
             port: int = 8888,
+            batch_size: int = 200,
     ):
         super().configure()
         self.url = url
         self.port = port
+        self.batch_size = batch_size
 
     def create_vcf(
             self,
@@ -55,6 +58,38 @@ class JannovarClient(LazyConfigure):
 
         return vcf_table
 
+    def create_vcfs(
+            self,
+            cases: [(str, str, [str])],
+    ) -> typing.Dict[str, typing.Union["pandas.DataFrame", str]]:
+        '''Create vcf dataframes of many cases with one request per batch
+        of cases, so that single requests stay within the response timeout.
+        Cases are given as tuples of case id, zygosity and variants. Cases
+        of failed requests are None, so that they can be converted one by
+        one.'''
+        size = self.batch_size or len(cases) or 1
+        results = {}
+        for start in range(0, len(cases), size):
+            results.update(self._create_batch(cases[start:start + size]))
+        return results
+
+    def _create_batch(
+            self,
+            cases: [(str, str, [str])],
+    ) -> typing.Dict[str, typing.Union["pandas.DataFrame", str]]:
+        variants = [v for _, _, case_variants in cases for v in case_variants]
+        status, vcf_text = self.process_variants(variants)
+        # a single variant can fail the request of all cases
+        if status < 0 or vcf_text is None:
+            LOGGER.warning(
+                "Jannovar request of %d cases failed: %s", len(cases),
+                vcf_text
+            )
+            return {case_id: None for case_id, _, _ in cases}
+
+        with io.StringIO(vcf_text) as reader:
+            return split_jannovar_vcf(reader, cases)
+
     def process_variants(self, variants: [str]) -> (int, str):
         '''Submit hgvs vcf file from server.'''
         msg = "\n".join(variants) + "\n"
@@ -11,7 +11,6 @@ import sys
 
 import time
 from datetime import datetime
-import boto3
 import requests
 import json
 
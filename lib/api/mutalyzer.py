@@ -8,6 +8,7 @@ import io
 import os
 import json
 import re
+import urllib.parse
 from typing import Union, List
 
 import pandas
@@ -15,17 +16,35 @@ import requests
 import requests_cache
 from requests.adapters import HTTPAdapter
 import zeep
+import zeep.helpers
 from zeep.transports import Transport
 
 from lib import visual
 from lib.constants import CACHE_DIR
+from lib.global_singletons import CONCURRENT_INST
 
 LOGGER = logging.getLogger(__name__)
 
 # alternative hgvs transcript
 RE_VERSION_ALTERNATIVE = re.compile(r'We found these versions: ([\w.]+)')
 
-TRIES_LIMIT = 5
+
+def syntax_verdict(response) -> Union[dict, None]:
+    '''Reduce a checkSyntax response to the validity and error messages.
+    Failed requests without response have no verdict.'''
+    if response is None:
+        return None
+    response = zeep.helpers.serialize_object(response)
+    messages = response.get("messages") or {}
+    return {
+        "valid": bool(response["valid"]),
+        "messages": {
+            "SoapMessage": [
+                {"errorcode": m["errorcode"], "message": m["message"]}
+                for m in messages.get("SoapMessage") or []
+            ]
+        },
+    }
 
 
 def check_errors(errordata) -> Union[str, None]:
@@ -51,13 +70,20 @@ class Mutalyzer(zeep.Client):
             cache_name=os.path.join(CACHE_DIR, __name__),
             expire_after=None
         )
-        self.session.mount('http', HTTPAdapter(max_retries=3))
-        self.session.mount('https', HTTPAdapter(max_retries=3))
+        # keep a connection for every concurrent request
+        pool_size = CONCURRENT_INST.max_concurrency
+        self.session.mount(
+            'http', HTTPAdapter(max_retries=3, pool_maxsize=pool_size)
+        )
+        self.session.mount(
+            'https', HTTPAdapter(max_retries=3, pool_maxsize=pool_size)
+        )
         transport = Transport(session=self.session)
 
         super().__init__(self.wsdl_url, transport=transport)
 
         self._transcript_cache = self._load_cache()
+        self._syntax_cache = self._load_syntax_cache()
 
     def batch_position_convert(self, data: str):
         '''Submit a batch job to the mutalyzer, monitor it and return the
@@ -187,18 +213,56 @@ class Mutalyzer(zeep.Client):
         '''Check the syntax of an hgvs variant and return the validity and list
         of possible errors.
         '''
-        tries = 0
-        response = None
+        hgvs_string = str(hgvs_string)
+        return self.check_syntax_many([hgvs_string])[hgvs_string]
 
-        while tries < TRIES_LIMIT:
-            try:
-                response = self.service.checkSyntax(hgvs_string)
-                break
-            except requests.exceptions.ConnectionError:
-                tries += 1
-                time.sleep(1)
+    def check_syntax_many(self, hgvs_strings: List[str]) -> dict:
+        '''Check the syntax of many hgvs variants. Verdicts are answered
+        from the syntax cache and only unknown variants are requested
+        concurrently. Returns a dict of hgvs strings to verdicts, which are
+        None for failed requests.
+        '''
+        unique = sorted(set(hgvs_strings))
+        missing = [h for h in unique if h not in self._syntax_cache]
+        if missing:
+            LOGGER.debug(
+                "Syntax check of %d uncached hgvs strings", len(missing)
+            )
+            responses = CONCURRENT_INST.map(
+                urllib.parse.urlparse(self.wsdl_url).netloc,
+                self.service.checkSyntax, missing
+            )
+            verdicts = {
+                h: syntax_verdict(r) for h, r in zip(missing, responses)
+                if r is not None
+            }
+            self._update_syntax_cache(verdicts)
+        return {h: self._syntax_cache.get(h) for h in unique}
+
+    def _get_syntax_cache_path(self) -> str:
+        return os.path.join(CACHE_DIR, __name__ + "_syntax_cache.jsonl")
 
-        return response
+    def _load_syntax_cache(self) -> dict:
+        '''Load verdicts of hgvs strings saved as json lines.'''
+        data = {}
+        if os.path.exists(self._get_syntax_cache_path()):
+            with open(self._get_syntax_cache_path(), "r") as cache_file:
+                for line in cache_file:
+                    try:
+                        hgvs_string, verdict = json.loads(line)
+                    except ValueError:
+                        continue
+                    data[hgvs_string] = verdict
+        return data
+
+    def _update_syntax_cache(self, update: dict) -> None:
+        self._syntax_cache.update(update)
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # only new verdicts are appended, so that concurrent processes
+        # can share the cache
+        with open(self._get_syntax_cache_path(), "a") as cache_file:
+            for hgvs_string, verdict in update.items():
+                cache_file.write(json.dumps([hgvs_string, verdict]) + "\n")
 
     def correct_reference_transcripts(self, case_objs: List['Case']) -> None:
         '''Check reference transcript number via batch call to mutalyzer.
@@ -116,13 +116,20 @@ class Omim(LazyConfigure):
         },
         "pheno_series": {
             "source": "phenotypicSeries"
-        }
+        },
+        "pheno_gene": {
+            "source": "morbidmap"
+        },
+        "pheno_series_label": {
+            "source": "phenotypicSeries"
+        },
     }
 
     def __init__(self):
         super().__init__()
         self._mimdir = None
         self.files = None
+        self.file_hashes = None
         self.indexes = None
 
     def configure(
@@ -155,9 +162,13 @@ class Omim(LazyConfigure):
         os.makedirs(mimdir, exist_ok=True)
 
         self.files = {}
+        self.file_hashes = {}
         for filename, fileinfo in self.data_meta.items():
             filehash = hashes[filename] if filename in hashes else None
             self.files[filename] = self.load_file(mimdir, fileinfo, filehash)
+            self.file_hashes[filename] = get_file_hash(
+                os.path.join(mimdir, fileinfo["filename"])
+            )
             self.files[filename] = self.post_ops(
                 self.files[filename], filename
             )
@@ -183,6 +194,16 @@ class Omim(LazyConfigure):
             index = self.create_phen_to_mim(data)
         elif name == "pheno_series":
             index = self.create_phen_omim_to_ps(data)
+        elif name == "pheno_gene":
+            index = self.create_phen_to_gene(
+                data, self.indexes["gene_omim"]
+            )
+        elif name == "pheno_series_label":
+            index = pandas.Series({
+                mim_number: ps_numbers[0]
+                for mim_number, ps_numbers
+                in self.indexes["pheno_series"].items() if ps_numbers
+            })
         return index
 
     def load_file(self, mimdir, fileinfo, filehash):
@@ -268,6 +289,36 @@ class Omim(LazyConfigure):
                 phen_to_mim[phen_mim] = [entry]
         return phen_to_mim
 
+    @staticmethod
+    def create_phen_to_gene(data, gene_index):
+        '''Create table of phenotypic omim ids and their genes with columns
+        disease_id, gene_rank, gene_id, gene_symbol and gene_omim_id.
+
+        Genes are ordered and deduplicated in the same way as in
+        mim_pheno_to_gene. Genes without entrez id are dropped.
+        '''
+        data = data.dropna(subset=["phen_mim_number", "mim_number"])
+        table = pandas.DataFrame({
+            "disease_id": data["phen_mim_number"].astype(int),
+            "gene_omim_id": data["mim_number"],
+            "gene_symbol": data["gene_symbol"].str.split(", ").str[0],
+        })
+        # keep first position and last symbol of duplicated genes
+        table["gene_symbol"] = table.groupby(
+            ["disease_id", "gene_omim_id"]
+        )["gene_symbol"].transform("last")
+        table = table.drop_duplicates(subset=["disease_id", "gene_omim_id"])
+
+        entrez_ids = gene_index["entrez_id"]
+        entrez_ids = entrez_ids.loc[~entrez_ids.index.duplicated()]
+        table["gene_id"] = table["gene_omim_id"].map(entrez_ids).fillna("")
+        table["gene_rank"] = table.groupby("disease_id").cumcount()
+        table = table.loc[table["gene_id"] != ""]
+        return table[[
+            "disease_id", "gene_rank", "gene_id", "gene_symbol",
+            "gene_omim_id"
+        ]].reset_index(drop=True)
+
     @staticmethod
     def load_dataframe(filename, colnames):
         '''Get file from local filesystem.
@@ -374,6 +425,40 @@ class Omim(LazyConfigure):
             ps_label = index[omim_id][0]
         return ps_label
 
+    def mim_pheno_to_gene_table(
+            self, mim_phenos: pandas.Series
+    ) -> pandas.DataFrame:
+        '''Join phenotypic omim ids with their genes. Returns a table with
+        the index of the given series as column row and the columns of the
+        phenotype gene table.'''
+        phenos = pandas.DataFrame({
+            "row": mim_phenos.index,
+            "disease_id": mim_phenos.astype(int).values,
+        })
+        genes = phenos.merge(self.indexes["pheno_gene"], on="disease_id")
+        return genes.drop("disease_id", axis=1)
+
+    def entrez_ids_to_genes(
+            self, entrez_ids: pandas.Series
+    ) -> pandas.DataFrame:
+        '''Translate entrez gene ids to a table with gene_symbol and
+        gene_omim_id columns, which are empty for unknown ids.'''
+        index = self.indexes["entrez_id"]
+        return pandas.DataFrame({
+            "gene_symbol": entrez_ids.map(index["gene_symbol"]).fillna(""),
+            "gene_omim_id": entrez_ids.map(index["mim_number"]).fillna(""),
+        }, index=entrez_ids.index)
+
+    def omim_ids_to_phenotypic_series(
+            self, omim_ids: pandas.Series
+    ) -> pandas.Series:
+        '''Translate omim ids to phenotypic series ids. Omim ids without
+        phenotypic series are kept.'''
+        omim_ids = omim_ids.astype(str)
+        return omim_ids.map(self.indexes["pheno_series_label"]).fillna(
+            omim_ids
+        )
+
     @omim_check
     def _replace_deprecated(self, omim_id: str) -> list:
         '''Replace omim ids that are deprecated or have been moved.'''
@@ -396,3 +481,16 @@ class Omim(LazyConfigure):
             for r in self._replace_deprecated(o)
         ]
         return list(set(replaced_ids))
+
+    def replace_deprecated_many(self, omim_id_lists: list) -> [list]:
+        '''Replace omim ids of many syndromes at once. Every distinct
+        entry is only replaced once.
+        '''
+        replaced = {}
+        results = []
+        for omim_ids in omim_id_lists:
+            key = tuple(omim_ids) if isinstance(omim_ids, list) else omim_ids
+            if key not in replaced:
+                replaced[key] = self.replace_deprecated_all(omim_ids)
+            results.append(replaced[key])
+        return results
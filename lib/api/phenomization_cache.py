@@ -0,0 +1,186 @@
+'''
+Phenomization cache
+---
+Persistent cache of phenomizer and boqa scores keyed by the set of HPO terms
+of a case. Feature lists differing only in order, duplicates or illegal terms
+share a single entry, so that equivalent cases do not query the service
+again.
+
+Score tables are saved column-wise as zlib compressed json in a sqlite
+database, which can be used by multiple processes at once. The database is
+bounded in size by evicting least recently used entries and is emptied if
+the configured phenomizer version changes.
+'''
+import os
+import json
+import time
+import zlib
+import sqlite3
+import logging
+import threading
+
+import pandas
+
+from lib.constants import ILLEGAL_HPO
+
+
+LOGGER = logging.getLogger(__name__)
+
+CACHE_FORMAT = 1
+
+
+def normalize_terms(hpo_ids: [str]) -> (str,):
+    '''Get sorted and deduplicated HPO terms without illegal terms.'''
+    return tuple(sorted(set(hpo_ids) - set(ILLEGAL_HPO)))
+
+
+def encode_scores(scores: pandas.DataFrame) -> bytes:
+    '''Convert score table to compressed column-wise json.'''
+    data = {
+        "index_name": scores.index.name,
+        "index": scores.index.tolist(),
+        "columns": [str(c) for c in scores.columns],
+        "dtypes": [str(d) for d in scores.dtypes],
+        "values": [scores[c].tolist() for c in scores.columns],
+    }
+    return zlib.compress(json.dumps(data).encode("utf-8"))
+
+
+def decode_scores(blob: bytes) -> pandas.DataFrame:
+    '''Restore score table from compressed column-wise json.'''
+    data = json.loads(zlib.decompress(blob).decode("utf-8"))
+    scores = pandas.DataFrame(
+        dict(zip(data["columns"], data["values"])),
+        index=pandas.Index(data["index"], name=data["index_name"]),
+        columns=data["columns"]
+    )
+    return scores.astype(dict(zip(data["columns"], data["dtypes"])))
+
+
+class PhenomizationCache:
+    '''Size bounded cache of phenomization results.'''
+
+    def __init__(self, path: str, max_size: int, version: str = ""):
+        '''
+        Params:
+            path: Path of the sqlite database
+            max_size: Maximum size of saved score tables in bytes
+            version: Version of the phenomizer service, all entries saved
+                     with a different version are removed
+        '''
+        self.path = path
+        self.max_size = max_size
+        self.version = "{}:{}".format(CACHE_FORMAT, version)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        '''Connection of the current process, processes forked from the
+        parent open their own connection.'''
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=60, check_same_thread=False
+            )
+            self._pid = os.getpid()
+            self._setup()
+        return self._connection
+
+    def _setup(self):
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta "
+                "(name TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS scores (terms TEXT PRIMARY KEY, "
+                "data BLOB, size INTEGER, accessed REAL)"
+            )
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE name = 'version'"
+            ).fetchone()
+            if row is None or row[0] != self.version:
+                if row is not None:
+                    LOGGER.info(
+                        "Phenomizer version changed from %s to %s. "
+                        "Clearing phenomization cache.", row[0], self.version
+                    )
+                self._connection.execute("DELETE FROM scores")
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                    (self.version,)
+                )
+
+    @staticmethod
+    def get_key(hpo_ids: [str]) -> str:
+        return ",".join(normalize_terms(hpo_ids))
+
+    def __contains__(self, hpo_ids: [str]) -> bool:
+        with self._lock:
+            row = self.connection.execute(
+                "SELECT 1 FROM scores WHERE terms = ?",
+                (self.get_key(hpo_ids),)
+            ).fetchone()
+        return row is not None
+
+    def get(self, hpo_ids: [str]) -> "pandas.DataFrame or None":
+        '''Get saved score table of HPO terms or None.'''
+        key = self.get_key(hpo_ids)
+        with self._lock, self.connection as connection:
+            row = connection.execute(
+                "SELECT data FROM scores WHERE terms = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE scores SET accessed = ? WHERE terms = ?",
+                (time.time(), key)
+            )
+        return decode_scores(row[0])
+
+    def put(self, hpo_ids: [str], scores: pandas.DataFrame) -> None:
+        '''Save score table of HPO terms and evict least recently used
+        entries exceeding the maximum size.'''
+        blob = encode_scores(scores)
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO scores VALUES (?, ?, ?, ?)",
+                (self.get_key(hpo_ids), blob, len(blob), time.time())
+            )
+            self._evict(connection)
+
+    def _evict(self, connection: sqlite3.Connection):
+        total, = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM scores"
+        ).fetchone()
+        if total <= self.max_size:
+            return
+        evicted = []
+        for terms, size in connection.execute(
+                "SELECT terms, size FROM scores ORDER BY accessed"
+        ).fetchall():
+            if total <= self.max_size:
+                break
+            evicted.append((terms,))
+            total -= size
+        connection.executemany("DELETE FROM scores WHERE terms = ?", evicted)
+        LOGGER.debug("Evicted %d phenomization results", len(evicted))
+
+    def clear(self) -> None:
+        '''Remove all saved score tables.'''
+        with self._lock, self.connection as connection:
+            connection.execute("DELETE FROM scores")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_connection"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
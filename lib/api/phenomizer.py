@@ -13,6 +13,7 @@ import io
 import re
 import os
 import logging
+import urllib.parse
 
 import pandas
 import requests
@@ -20,6 +21,8 @@ import requests_cache
 
 from lib.constants import CACHE_DIR
 from lib.singleton import LazyConfigure
+from lib.api.phenomization_cache import PhenomizationCache, normalize_terms
+from lib.global_singletons import CONCURRENT_INST
 
 
 RE_SYMBOL = re.compile(r"(\w+) \(\d+\)")
@@ -56,8 +59,12 @@ class PhenomizerService(requests_cache.CachedSession, LazyConfigure):
         self.url = None
         self.user = None
         self.password = None
+        self.scores_cache = None
 
-    def configure(self, url: str = '', user: str = '', password: str = ''):
+    def configure(
+            self, url: str = '', user: str = '', password: str = '',
+            version: str = '', cache_size: int = 256
+    ):
         '''
         Configure the phenomizer service instance.
 
@@ -65,6 +72,9 @@ class PhenomizerService(requests_cache.CachedSession, LazyConfigure):
             Phenomizer_Url: Url of phenomizer service
             Phenomizer_User: Username for the service
             Phenomizer_Password: Password for the service
+            version: Version of the phenomizer service, cached scores of
+                     other versions are discarded
+            cache_size: Maximum size of cached scores in MB
             config: Alternative ConfigParser object to fill url, user and
                     password, which will read the values from a config.ini
         '''
@@ -82,20 +92,28 @@ class PhenomizerService(requests_cache.CachedSession, LazyConfigure):
         self.url = url
         self.user = user
         self.password = password
+        self.scores_cache = PhenomizationCache(
+            os.path.join(CACHE_DIR, __name__ + "_scores.sqlite"),
+            max_size=cache_size * 1024 ** 2,
+            version="{}@{}".format(version, url)
+        )
 
         # retries settings to repeat api calls in case of failure
         retry = requests.packages.urllib3.util.retry.Retry(
             total=3, read=3, connect=3, backoff_factor=0.3,
             status_forcelist=(500, 404))
-        adapter = requests.adapters.HTTPAdapter(max_retries=retry)
+        adapter = requests.adapters.HTTPAdapter(
+            max_retries=retry, pool_maxsize=CONCURRENT_INST.max_concurrency
+        )
         self.mount('http://', adapter)
         self.mount('https://', adapter)
 
     def disease_boqa_phenomize(self, hpo_ids: [str]) -> pandas.DataFrame:
         '''Get phenomizer and boqa scorings for the list of hpo ids. A datafame
-        joined on the syndrome omim id will be returned.
+        joined on the syndrome omim id will be returned. Scores are cached
+        for the set of hpo ids, so that their order does not matter.
         '''
-
+        hpo_ids = list(normalize_terms(hpo_ids))
         if not hpo_ids or self.url == "":
             scaffold = {
                 'disease-id_pheno': "int",
@@ -108,6 +126,9 @@ class PhenomizerService(requests_cache.CachedSession, LazyConfigure):
             empty = pandas.DataFrame(columns=scaffold.keys())
             empty = empty.astype(dtype=scaffold)
             return empty
+        scores_df = self.scores_cache.get(hpo_ids)
+        if scores_df is not None:
+            return scores_df
         # this process might need to be retried, but it is currently reliable
         # enough to run directly
         hpo_df = self._request_phenomize(
@@ -127,8 +148,30 @@ class PhenomizerService(requests_cache.CachedSession, LazyConfigure):
         # join dataframes on disease id
         scores_df = hpo_df.join(
             boqa_df, how='outer', lsuffix='_pheno', rsuffix='_boqa')
+        self.scores_cache.put(hpo_ids, scores_df)
         return scores_df
 
+    def prefetch(self, hpo_id_lists: [[str]]) -> None:
+        '''Request phenomizer and boqa scores of many hpo id lists
+        concurrently. Scores are saved in the phenomization cache, so that
+        later phenomization of the cases does not wait for the service. Each
+        set of hpo ids is only requested once.
+        '''
+        if self.url == "":
+            return
+        unique = {normalize_terms(ids) for ids in hpo_id_lists}
+        missing = [
+            list(ids) for ids in sorted(unique)
+            if ids and ids not in self.scores_cache
+        ]
+        LOGGER.debug(
+            "Prefetch phenomization of %d uncached hpo sets", len(missing)
+        )
+        CONCURRENT_INST.map(
+            urllib.parse.urlparse(self.url).netloc,
+            self.disease_boqa_phenomize, missing
+        )
+
     def _request_data_as_df(self, params: dict, names: list,
                             prefilter: {str: str}) -> pandas.DataFrame:
         '''Get information using api calls and convert to pandas dataframe.
@@ -0,0 +1,130 @@
+'''
+Preprocessing server
+---
+Keep configured services (OMIM, ErrorFixer, Mutalyzer and Phenomizer sessions)
+loaded between cases by processing case requests in a long-running process.
+
+Requests are accepted over http on a tcp port or a unix socket:
+
+    POST /case  {"case": {...}, "vcf": "path/to/real.vcf.gz"}
+    POST /case  {"path": "path/to/case.json"}
+    GET /status
+
+Requests are processed one after another, since the service singletons are
+not thread-safe.
+'''
+import os
+import json
+import socket
+import logging
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from typing import Callable, Tuple, Union
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class RequestError(Exception):
+    '''Invalid content of a case request.'''
+
+
+class CaseRequestHandler(BaseHTTPRequestHandler):
+    '''Pass json case requests to the processing function of the server.'''
+
+    def log_message(self, format, *args):
+        LOGGER.debug("%s %s", self.command, format % args)
+
+    def _respond(self, status: int, data: dict):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") != "/status":
+            self._respond(404, {"error": "Unknown path {}".format(self.path)})
+            return
+        self._respond(200, {
+            "status": "ready", "processed": self.server.processed
+        })
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/case":
+            self._respond(404, {"error": "Unknown path {}".format(self.path)})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length).decode("utf-8"))
+            if not isinstance(request, dict):
+                raise RequestError("Request has to be a json object.")
+            result = self.server.process(request)
+        except (ValueError, RequestError) as error:
+            self._respond(400, {"error": str(error)})
+            return
+        except Exception as error:
+            LOGGER.exception("Processing of case request failed.")
+            self._respond(500, {"error": repr(error)})
+            return
+        self.server.processed += 1
+        self._respond(200, result)
+
+
+class CaseServer(HTTPServer):
+    '''Http server processing case requests with the given function.'''
+
+    def __init__(self, address, process: Callable[[dict], dict]):
+        super().__init__(address, CaseRequestHandler)
+        self.process = process
+        self.processed = 0
+
+
+class UnixCaseServer(CaseServer):
+    '''Case server listening on a unix socket.'''
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+    def get_request(self):
+        request, _ = self.socket.accept()
+        # http handler expects a client address tuple
+        return request, ("unix", 0)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+
+
+def parse_address(address: str) -> Union[str, Tuple[str, int]]:
+    '''Parse host:port or port into a tcp address. Everything else is used
+    as the path of a unix socket.'''
+    host, _, port = address.rpartition(":")
+    if port.isdigit():
+        return (host or "localhost", int(port))
+    return address
+
+
+def create_server(address: str, process: Callable[[dict], dict]) -> CaseServer:
+    parsed = parse_address(address)
+    if isinstance(parsed, tuple):
+        return CaseServer(parsed, process)
+    return UnixCaseServer(parsed, process)
+
+
+def serve(address: str, process: Callable[[dict], dict]):
+    '''Process case requests until interrupted.'''
+    server = create_server(address, process)
+    LOGGER.info("Serving case requests on %s", address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        LOGGER.info("Stopping server.")
+    finally:
+        server.server_close()
@@ -0,0 +1,264 @@
+'''
+Local dbSNP index
+---
+Resolve rs numbers of genomic entries to hgvs descriptions without asking
+the Mutalyzer service. The index is built once from the dbSNP vcf downloaded
+by data/dbSNPs/Snakefile and contains genomic descriptions on the GRCh37
+RefSeq chromosomes for every alternative allele of an rs number.
+
+Index file layout, all numbers little endian:
+
+    header   magic, number of entries n, offset of the data section
+    keys     n rs numbers as uint32, sorted
+    offsets  n + 1 offsets of the descriptions of each entry as uint64
+    data     tab separated utf-8 descriptions of all entries
+
+Keys and offsets are memory-mapped, lookups are binary searches and only
+read the pages needed. Rs numbers can appear in multiple entries.
+'''
+import os
+import gzip
+import array
+import struct
+import logging
+from typing import Union
+
+import numpy
+
+from lib.singleton import LazyConfigure
+from lib.global_singletons import MUTALYZER_INST
+
+
+LOGGER = logging.getLogger(__name__)
+
+MAGIC = b"PEDIARS1"
+HEADER = struct.Struct("<8sQQ")
+
+# RefSeq accessions of the GRCh37 chromosomes used in dbSNP vcf files
+GRCH37_ACCESSIONS = {
+    "1": "NC_000001.10", "2": "NC_000002.11", "3": "NC_000003.11",
+    "4": "NC_000004.11", "5": "NC_000005.9", "6": "NC_000006.11",
+    "7": "NC_000007.13", "8": "NC_000008.10", "9": "NC_000009.11",
+    "10": "NC_000010.10", "11": "NC_000011.9", "12": "NC_000012.11",
+    "13": "NC_000013.10", "14": "NC_000014.8", "15": "NC_000015.9",
+    "16": "NC_000016.9", "17": "NC_000017.10", "18": "NC_000018.9",
+    "19": "NC_000019.9", "20": "NC_000020.10", "21": "NC_000021.8",
+    "22": "NC_000022.10", "X": "NC_000023.10", "Y": "NC_000024.9",
+    "MT": "NC_012920.1",
+}
+
+NUCLEOTIDES = set("ACGTN")
+
+
+def parse_rs_number(rs_id: Union[str, int]) -> Union[int, None]:
+    '''Get number of rs identifiers such as rs123. None if the identifier
+    is not an rs number.'''
+    rs_id = str(rs_id).strip().lower()
+    if rs_id.startswith("rs"):
+        rs_id = rs_id[2:]
+    try:
+        number = int(rs_id)
+    except ValueError:
+        return None
+    return number if 0 <= number < 2 ** 32 else None
+
+
+def vcf_to_hgvs(accession: str, pos: int, ref: str, alt: str) -> str:
+    '''Create genomic hgvs description of a vcf allele. Returns an empty
+    string for alleles, which cannot be described.'''
+    if not (ref and alt) or not set(ref + alt) <= NUCLEOTIDES:
+        return ""
+    # remove shared bases, such as the anchor base of indels
+    prefix = 0
+    while prefix < min(len(ref), len(alt)) and ref[prefix] == alt[prefix]:
+        prefix += 1
+    ref, alt, pos = ref[prefix:], alt[prefix:], pos + prefix
+    suffix = 0
+    while suffix < min(len(ref), len(alt)) \
+            and ref[-1 - suffix] == alt[-1 - suffix]:
+        suffix += 1
+    if suffix:
+        ref, alt = ref[:-suffix], alt[:-suffix]
+
+    if not ref and not alt:
+        return ""
+    if not ref:
+        return "{}:g.{}_{}ins{}".format(accession, pos - 1, pos, alt)
+    if len(ref) == 1:
+        position = str(pos)
+    else:
+        position = "{}_{}".format(pos, pos + len(ref) - 1)
+    if not alt:
+        edit = "del"
+    elif len(ref) == 1 and len(alt) == 1:
+        edit = "{}>{}".format(ref, alt)
+    else:
+        edit = "delins{}".format(alt)
+    return "{}:g.{}{}".format(accession, position, edit)
+
+
+def read_vcf_descriptions(vcf_path: str, accessions: dict = None):
+    '''Yield rs numbers and hgvs descriptions of all rs entries in a vcf.'''
+    accessions = accessions or GRCH37_ACCESSIONS
+    opener = gzip.open if vcf_path.endswith(".gz") else open
+    with opener(vcf_path, "rt") as vcf_file:
+        for line in vcf_file:
+            if line.startswith("#"):
+                continue
+            chrom, pos, ids, ref, alt = line.split("\t", 5)[:5]
+            if chrom.startswith("chr"):
+                chrom = chrom[3:]
+            accession = accessions.get(chrom.upper())
+            if accession is None:
+                continue
+            numbers = [
+                n for n in (parse_rs_number(i) for i in ids.split(";"))
+                if n is not None
+            ]
+            if not numbers:
+                continue
+            descriptions = [
+                d for d in (
+                    vcf_to_hgvs(accession, int(pos), ref.upper(), a.upper())
+                    for a in alt.split(",")
+                ) if d
+            ]
+            if descriptions:
+                for number in numbers:
+                    yield number, descriptions
+
+
+def build_index(vcf_path: str, index_path: str) -> int:
+    '''Build index file of rs numbers in a dbSNP vcf. Returns the number of
+    entries.'''
+    keys = array.array("I")
+    offsets = array.array("Q")
+    data_path = index_path + ".data.tmp"
+    with open(data_path, "wb") as data_file:
+        offset = 0
+        for number, descriptions in read_vcf_descriptions(vcf_path):
+            raw = "\t".join(descriptions).encode("utf-8")
+            keys.append(number)
+            offsets.append(offset)
+            data_file.write(raw)
+            offset += len(raw)
+    LOGGER.info("Sorting %d dbSNP entries", len(keys))
+
+    keys = numpy.frombuffer(keys, dtype="<u4") if keys \
+        else numpy.zeros(0, dtype="<u4")
+    starts = numpy.frombuffer(offsets, dtype="<u8") if offsets \
+        else numpy.zeros(0, dtype="<u8")
+    ends = numpy.append(starts[1:], numpy.uint64(offset))
+    order = numpy.argsort(keys, kind="mergesort")
+    keys = keys[order]
+    lengths = (ends - starts)[order]
+    starts = starts[order]
+    del order
+
+    count = len(keys)
+    data_offset = HEADER.size + 4 * count + 8 * (count + 1)
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as index_file, \
+            open(data_path, "rb") as data_file:
+        index_file.write(HEADER.pack(MAGIC, count, data_offset))
+        index_file.write(keys.astype("<u4").tobytes())
+        sorted_offsets = numpy.zeros(count + 1, dtype="<u8")
+        numpy.cumsum(lengths, out=sorted_offsets[1:])
+        index_file.write(sorted_offsets.tobytes())
+        # copy descriptions into sorted order
+        for start, length in zip(starts.tolist(), lengths.tolist()):
+            data_file.seek(start)
+            index_file.write(data_file.read(length))
+    os.remove(data_path)
+    os.replace(tmp_path, index_path)
+    return count
+
+
+class DbSNPIndex:
+    '''Memory-mapped index of rs numbers to hgvs descriptions.'''
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as index_file:
+            magic, count, data_offset = HEADER.unpack(
+                index_file.read(HEADER.size)
+            )
+        if magic != MAGIC:
+            raise ValueError("{} is not a dbSNP index.".format(path))
+        self.count = count
+        self.data_offset = data_offset
+        self._keys = None
+        self._offsets = None
+        self._data = None
+
+    def _open(self):
+        self._keys = numpy.memmap(
+            self.path, dtype="<u4", mode="r", offset=HEADER.size,
+            shape=(self.count,)
+        ) if self.count else numpy.zeros(0, dtype="<u4")
+        self._offsets = numpy.memmap(
+            self.path, dtype="<u8", mode="r",
+            offset=HEADER.size + 4 * self.count, shape=(self.count + 1,)
+        )
+        self._data = numpy.memmap(
+            self.path, dtype="u1", mode="r", offset=self.data_offset
+        ) if self._offsets[-1] else numpy.zeros(0, dtype="u1")
+
+    def __len__(self) -> int:
+        return self.count
+
+    def lookup(self, rs_id: Union[str, int]) -> [str]:
+        '''Get hgvs descriptions of an rs number.'''
+        number = parse_rs_number(rs_id)
+        if number is None:
+            return []
+        if self._keys is None:
+            self._open()
+        first = int(numpy.searchsorted(self._keys, number, side="left"))
+        last = int(numpy.searchsorted(self._keys, number, side="right"))
+        if first == last:
+            return []
+        raw = self._data[
+            int(self._offsets[first]):int(self._offsets[last])
+        ].tobytes()
+        descriptions = []
+        for entry in range(first, last):
+            start = int(self._offsets[entry] - self._offsets[first])
+            end = int(self._offsets[entry + 1] - self._offsets[first])
+            for description in raw[start:end].decode("utf-8").split("\t"):
+                if description not in descriptions:
+                    descriptions.append(description)
+        return descriptions
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_keys"] = None
+        state["_offsets"] = None
+        state["_data"] = None
+        return state
+
+
+class DbSNPResolver(LazyConfigure):
+    '''Resolve rs numbers with the local index, if it has been built, or
+    with the Mutalyzer service.'''
+
+    def __init__(self):
+        super().__init__()
+        self.index = None
+
+    def configure(self, index_path: str = ""):
+        super().configure()
+        self.index = None
+        if index_path and os.path.exists(index_path):
+            self.index = DbSNPIndex(index_path)
+        elif index_path:
+            LOGGER.warning(
+                "dbSNP index %s not found. Rs numbers are resolved with "
+                "mutalyzer.", index_path
+            )
+
+    def get_db_snp_descriptions(self, rs_id: str) -> [str]:
+        '''Return a list of hgvs descriptions of an rs number.'''
+        if self.index is not None:
+            return self.index.lookup(rs_id)
+        return MUTALYZER_INST.get_db_snp_descriptions(rs_id)
@@ -1,16 +1,28 @@
-from lib.api import mutalyzer, jannovar, omim, phenomizer, aws_download, lab
-from lib import errorfixer
+'''
+Service instances shared by all modules. Instances are created on first use,
+so that importing this module does not import the api modules and their
+dependencies (zeep, boto3, requests_cache) or contact any service.
+'''
+from lib.singleton import LazyInstance
 
-MUTALYZER_INST = mutalyzer.Mutalyzer()
+MUTALYZER_INST = LazyInstance("lib.api.mutalyzer", "Mutalyzer")
 
-JANNOVAR_INST = jannovar.JannovarClient()
+JANNOVAR_INST = LazyInstance("lib.api.jannovar", "JannovarClient")
 
-OMIM_INST = omim.Omim()
+OMIM_INST = LazyInstance("lib.api.omim", "Omim")
 
-PHENOMIZER_INST = phenomizer.PhenomizerService()
+PHENOMIZER_INST = LazyInstance("lib.api.phenomizer", "PhenomizerService")
 
-ERRORFIXER_INST = errorfixer.ErrorFixer()
+ERRORFIXER_INST = LazyInstance("lib.errorfixer", "ErrorFixer")
 
-AWS_INST = aws_download.AWSBucket()
+AWS_INST = LazyInstance("lib.api.aws_download", "AWSBucket")
 
-LAB_INST = lab.Lab()
+LAB_INST = LazyInstance("lib.api.lab", "Lab")
+
+CONCURRENT_INST = LazyInstance("lib.api.concurrency", "ConcurrentRequests")
+
+HGVS_SYNTAX_INST = LazyInstance("lib.hgvs_syntax", "SyntaxChecker")
+
+HGVS_MEMO_INST = LazyInstance("lib.model.hgvs_memo", "HGVSMemo")
+
+DBSNP_INST = LazyInstance("lib.dbsnp_index", "DbSNPResolver")
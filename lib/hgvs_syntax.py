@@ -0,0 +1,91 @@
+'''
+HGVS syntax checks
+---
+Variants of genomic entries are checked for valid hgvs syntax before vcf
+files are created. Checks are either requested from the Mutalyzer
+checkSyntax service or done locally with the hgvs parser and its intrinsic
+validator, which does not need any network access.
+
+Both backends answer with the same verdicts, a dict of the validity and the
+error messages in the format of Mutalyzer responses:
+
+    {"valid": False, "messages": {"SoapMessage": [
+        {"errorcode": "EPARSE", "message": "..."}
+    ]}}
+'''
+import logging
+from typing import List, Union
+
+from lib.singleton import LazyConfigure
+from lib.global_singletons import MUTALYZER_INST
+
+
+LOGGER = logging.getLogger(__name__)
+
+BACKENDS = ("mutalyzer", "local")
+
+
+def local_verdict(hgvs_string: str) -> dict:
+    '''Check syntax of an hgvs string with the hgvs parser and the intrinsic
+    validator. Reference sequences are not fetched.'''
+    import hgvs.exceptions
+    from lib.model.hgvs_parser import HGVS_PARSER, HGVS_VALIDATOR
+
+    messages = []
+    try:
+        variant = HGVS_PARSER.parse_hgvs_variant(str(hgvs_string))
+    except hgvs.exceptions.HGVSError as error:
+        messages.append({"errorcode": "EPARSE", "message": str(error)})
+    else:
+        try:
+            HGVS_VALIDATOR.validate(variant)
+        except hgvs.exceptions.HGVSError as error:
+            messages.append({"errorcode": "EINVALID", "message": str(error)})
+    return {"valid": not messages, "messages": {"SoapMessage": messages}}
+
+
+class SyntaxChecker(LazyConfigure):
+    '''Check hgvs syntax with the configured backend.'''
+
+    def __init__(self):
+        super().__init__()
+        self.backend = "mutalyzer"
+
+    def configure(self, backend: str = "mutalyzer"):
+        super().configure()
+        if backend not in BACKENDS:
+            raise ValueError(
+                "Unknown hgvs syntax backend {}. Choose one of {}.".format(
+                    backend, ", ".join(BACKENDS)
+                )
+            )
+        self.backend = backend
+
+    def check_syntax(self, hgvs_string: str) -> Union[dict, None]:
+        '''Check the syntax of a single hgvs variant. Returns None if the
+        check could not be done.'''
+        return self.check_syntax_many([hgvs_string])[str(hgvs_string)]
+
+    def check_syntax_many(self, hgvs_strings: List[str]) -> dict:
+        '''Check the syntax of many hgvs variants. Returns a dict of hgvs
+        strings to verdicts.'''
+        if self.backend == "local":
+            return {
+                h: local_verdict(h) for h in set(str(h) for h in hgvs_strings)
+            }
+        return MUTALYZER_INST.check_syntax_many(
+            [str(h) for h in hgvs_strings]
+        )
+
+    def check_case_syntax(self, case_objs: List['Case']) -> None:
+        '''Run deferred syntax checks of the hgvs models of all cases with
+        a single batch of checks.'''
+        models = [
+            m for c in case_objs for m in c.hgvs_models
+            if not m.syntax_checked
+        ]
+        results = self.check_syntax_many(
+            [str(v) for m in models for v in m.variants]
+        )
+        for model in models:
+            model.check_syntax(results)
@@ -0,0 +1,209 @@
+'''
+Case manifest
+---
+Persistent record of the inputs every case has been processed with. Cases
+whose inputs did not change since the last run can be skipped and their
+existing outputs reused.
+
+A case fingerprint contains hashes of:
+    the case json and its corrected override
+    linked genomic entry files
+    hgvs error entries used for the genomic entries of the case
+    OMIM files loaded in Omim.configure
+
+Simulated vcf files are tracked in a separate sidecar manifest in their
+output directory, which maps case ids to hashes of the hgvs strings and the
+vcf file, so that existing files can be reused without parsing them.
+'''
+import os
+import json
+import hashlib
+import logging
+from typing import Union
+
+from lib.utils import get_file_hash, load_json
+from lib.global_singletons import ERRORFIXER_INST, OMIM_INST
+
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+# hidden, since create_config expects only case vcfs in the directory
+VCF_MANIFEST_NAME = ".vcf_manifest.jsonl"
+
+VCF_MANIFESTS = {}
+
+
+def get_entry_ids(json_obj: "JsonFile") -> [str]:
+    '''Get ids of genomic entries, which are either saved as ids or as
+    already loaded genomic entry dicts.'''
+    entry_ids = []
+    for entry in json_obj.get_genomic_entries():
+        if isinstance(entry, dict):
+            entry = entry.get("entry_id", "")
+        if entry:
+            entry_ids.append(str(entry))
+    return entry_ids
+
+
+def get_data_hash(data) -> str:
+    '''Get MD5 Hash of json serializable data.'''
+    return hashlib.md5(
+        json.dumps(data, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def case_fingerprint(json_obj: "JsonFile") -> dict:
+    '''Get hashes of all inputs used in the processing of a case.'''
+    hgvs_errors = {
+        entry_id: get_data_hash(ERRORFIXER_INST.get_data(entry_id))
+        for entry_id in get_entry_ids(json_obj)
+        if entry_id in ERRORFIXER_INST
+    }
+    return {
+        "files": {
+            path: get_file_hash(path) for path in json_obj.get_source_paths()
+        },
+        "hgvs_errors": hgvs_errors,
+        "omim": OMIM_INST.file_hashes,
+    }
+
+
+class CaseManifest:
+    '''Map case ids to the fingerprint of their inputs and their quality
+    check log entries of the last run.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+        data = load_json(path, {"version": MANIFEST_VERSION, "cases": {}})
+        if data["version"] != MANIFEST_VERSION:
+            LOGGER.warning(
+                "Manifest %s has version %s. Reprocessing all cases.",
+                path, data["version"]
+            )
+            data = {"version": MANIFEST_VERSION, "cases": {}}
+        self._cases = data["cases"]
+
+    def __contains__(self, case_id: str) -> bool:
+        return str(case_id) in self._cases
+
+    def is_current(self, case_id: str, fingerprint: dict) -> bool:
+        '''Check whether case has been processed with identical inputs.'''
+        case_id = str(case_id)
+        if case_id not in self._cases:
+            return False
+        return self._cases[case_id]["fingerprint"] == fingerprint
+
+    def get_entries(self, case_id: str) -> dict:
+        '''Get quality check log entries saved for the case.'''
+        return self._cases[str(case_id)]["qc"]
+
+    def update(self, case_id: str, fingerprint: dict, entries: dict) -> None:
+        '''Save fingerprint and quality check log entries of a case.'''
+        self._cases[str(case_id)] = {
+            "fingerprint": fingerprint,
+            "qc": entries,
+        }
+
+    def save(self) -> None:
+        '''Save manifest to its json file.'''
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as manifest_file:
+            json.dump(
+                {"version": MANIFEST_VERSION, "cases": self._cases},
+                manifest_file
+            )
+        # replace atomically to not lose the manifest on interruption
+        os.replace(tmp_path, self.path)
+
+
+def get_hgvs_hash(hgvs_strings: [str]) -> str:
+    '''Get MD5 Hash of the set of hgvs strings.'''
+    return get_data_hash(sorted(set(hgvs_strings)))
+
+
+def get_vcf_manifest(directory: str) -> "VcfManifest":
+    '''Get vcf manifest of an output directory, which is loaded only once
+    per process.'''
+    if directory not in VCF_MANIFESTS:
+        VCF_MANIFESTS[directory] = VcfManifest(directory)
+    return VCF_MANIFESTS[directory]
+
+
+class VcfManifest:
+    '''Map case ids to the hgvs hash and content hash of their simulated
+    vcf file. Updates are appended as json lines, so that multiple processes
+    can record vcf files in the same directory.
+    '''
+
+    def __init__(self, directory: str):
+        self.path = os.path.join(directory, VCF_MANIFEST_NAME)
+        self._cases = {}
+        if not os.path.exists(self.path):
+            return
+        lines = 0
+        with open(self.path, "r") as manifest_file:
+            for line in manifest_file:
+                lines += 1
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # lines of interrupted writes are ignored
+                    continue
+                if entry.get("version") != MANIFEST_VERSION:
+                    continue
+                self._cases[entry["case_id"]] = entry
+        # remove superseded entries of repeated runs
+        if lines > 2 * len(self._cases) + 100:
+            self._compact()
+
+    def get_hgvs_hash(self, case_id: str) -> Union[str, None]:
+        '''Get hgvs hash the vcf of the case has been created with.'''
+        entry = self._cases.get(str(case_id))
+        return entry["hgvs"] if entry else None
+
+    def is_current(self, case_id: str, hgvs_hash: str, vcf_path: str) \
+            -> bool:
+        '''Check whether the vcf file has been created from the hgvs strings
+        and has not been changed since.'''
+        entry = self._cases.get(str(case_id))
+        if entry is None or entry["hgvs"] != hgvs_hash:
+            return False
+        try:
+            stat = os.stat(vcf_path)
+        except OSError:
+            return False
+        if stat.st_size == entry["size"] and stat.st_mtime == entry["mtime"]:
+            return True
+        # file has been touched, content might still be identical
+        if get_file_hash(vcf_path) != entry["vcf"]:
+            return False
+        self.update(case_id, hgvs_hash, vcf_path)
+        return True
+
+    def update(self, case_id: str, hgvs_hash: str, vcf_path: str) -> None:
+        '''Record vcf file of the case.'''
+        stat = os.stat(vcf_path)
+        entry = {
+            "version": MANIFEST_VERSION,
+            "case_id": str(case_id),
+            "hgvs": hgvs_hash,
+            "vcf": get_file_hash(vcf_path),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+        }
+        self._cases[entry["case_id"]] = entry
+        with open(self.path, "a") as manifest_file:
+            manifest_file.write(json.dumps(entry) + "\n")
+
+    def _compact(self):
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, "w") as manifest_file:
+            for entry in self._cases.values():
+                manifest_file.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
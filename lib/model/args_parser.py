@@ -61,7 +61,13 @@ class PEDIAParser():
 
         parser.add_argument(
             "-p", "--pickle",
-            help="Start with pickled cases after phenomization."
+            help=("Start with pickled cases after phenomization. Either a "
+                  "checkpoint directory or a single pickle file.")
+        )
+        parser.add_argument(
+            "--case-ids",
+            help=("Comma separated list of case ids loaded with --pickle. "
+                  "Default: all cases.")
         )
         parser.add_argument(
             "-e", "--entry",
@@ -70,12 +76,38 @@ class PEDIAParser():
                   "convert - start at old json mapping. "
                   "qc - start at case quality check. "
                   "Used in conjunction with --pickle."),
+            choices=["convert", "pheno", "qc"],
             default="pheno"
         )
         parser.add_argument(
             "--skip-vcf", action='store_true',
             help="Skip vcf convertion."
         )
+        parser.add_argument(
+            "--incremental", action='store_true',
+            help=("Skip cases whose inputs did not change since the last "
+                  "run and reuse their existing outputs.")
+        )
+        parser.add_argument(
+            "--profile", action='store_true',
+            help=("Record time spent per stage, case and external service "
+                  "and save it to profile.json next to the qc log.")
+        )
+        parser.add_argument(
+            "--stream", action='store_true',
+            help=("Process cases in windows from json parsing to vcf "
+                  "generation to keep memory usage independent of the "
+                  "number of cases.")
+        )
+        parser.add_argument(
+            "--stream-window", default=50, type=int,
+            help="Number of cases processed at the same time with --stream."
+        )
+        parser.add_argument(
+            "--serve",
+            help=("Keep services loaded and process case requests over http "
+                  "on host:port or a unix socket path.")
+        )
         self.args = parser.parse_args()
 
         if self.args.lab and not self.args.lab_case_id:
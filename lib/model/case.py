@@ -2,7 +2,7 @@
 Case model created from json files.
 '''
 import logging
-from typing import Union
+from typing import Union, Dict
 
 import csv
 import subprocess
@@ -12,19 +12,20 @@ import os
 import pandas
 
 from lib.model.json_parser import OldJson, NewJson, LabJson
+from lib.model.case_batch import CaseBatch
 from lib.vcf_operations import move_vcf
 from lib import vcf_jannovar
 from lib import constants
+from lib import manifest
+from lib.utils import SlotState
 
-from lib.global_singletons import (
-    ERRORFIXER_INST, JANNOVAR_INST, OMIM_INST, PHENOMIZER_INST
-)
+from lib.global_singletons import ERRORFIXER_INST, JANNOVAR_INST
 
 
 LOGGER = logging.getLogger(__name__)
 
 
-class Case:
+class Case(SlotState):
     '''
     Exposes the following properties:
     case_id - Unique identifier for the case in Face2Gene
@@ -34,14 +35,34 @@ class Case:
     diagnosis - list of syndromes selected as diagnosis
     submitter - submitter information containing fields for email, name, team
     realvcf - list of vcf filenames
+    data - json object the case has been created from, loaded again from
+    disk if it has been dropped by compact
     '''
 
+    __slots__ = (
+        "_data", "_data_source", "_exclude_benign_variants", "algo_version",
+        "case_id", "features", "submitter", "real_vcf_paths",
+        "simulated_vcf", "_hgvs_models", "_syndromes", "_gene_table",
+        "_simulated_vcf_paths", "_phenomized", "_genomic_entries",
+        "_selected_syndromes",
+    )
+
+    legacy_fields = {"data": "_data"}
+
+    # attributes set lazily, which are transferred back from worker processes
+    lazy_fields = [
+        "_hgvs_models", "_syndromes", "_gene_table", "_simulated_vcf_paths",
+        "_phenomized", "simulated_vcf", "_genomic_entries",
+        "_selected_syndromes",
+    ]
+
     def __init__(
             self, data, config_data, exclude_benign_variants: bool = True, vcf_path: str = ""
     ):
         # also save the json object to easier extract information from the
         # new format
-        self.data = data
+        self._data = data
+        self._data_source = data.get_load_source()
         # query settings
         self._exclude_benign_variants = exclude_benign_variants
 
@@ -55,18 +76,63 @@ class Case:
 
         self._hgvs_models = None
         self._syndromes = None
-        self._gene_list = None
+        self._gene_table = None
         self._simulated_vcf_paths = None
         self._phenomized = None
+        self._genomic_entries = None
+        self._selected_syndromes = None
 
         LOGGER.debug("Creating case %s", self.case_id)
 
+    @property
+    def data(self):
+        if self._data is None and self._data_source is not None:
+            json_class, path, override = self._data_source
+            self._data = json_class.from_file(path, override)
+        return self._data
+
+    def compact(self):
+        '''Keep only the fields used after case creation. The json object
+        is dropped if it can be loaded from disk again and syndromes are
+        dropped after phenomization.
+        '''
+        self.get_genomic_entries()
+        self.get_selected_syndromes()
+        if self._phenomized is not None:
+            self._syndromes = None
+        if self._data_source is not None:
+            self._data = None
+
+    def get_genomic_entries(self) -> list:
+        '''Raw genomic entries of the json object.'''
+        if self._genomic_entries is None:
+            self._genomic_entries = self.data.get_genomic_entries()
+        return self._genomic_entries
+
+    def get_selected_syndromes(self) -> list:
+        '''Raw selected syndromes of the json object.'''
+        if self._selected_syndromes is None:
+            self._selected_syndromes = self.data.get_js()['selected_syndromes']
+        return self._selected_syndromes
+
     @property
     def hgvs_models(self):
+        return self.load_hgvs_models()
+
+    def load_hgvs_models(self, check_syntax: bool = True):
+        '''Parse hgvs models, optionally deferring the syntax check.'''
         if self._hgvs_models is None:
-            self._hgvs_models = self.data.get_variants()
+            self._hgvs_models = self.data.get_variants(check_syntax)
         return self._hgvs_models
 
+    def get_variant_entries(self) -> list:
+        '''Raw genomic entries, which are parsed into hgvs models.'''
+        return self.data.get_variant_entries()
+
+    def set_hgvs_models(self, models: list):
+        '''Use hgvs models parsed elsewhere from the variant entries.'''
+        self._hgvs_models = models
+
     @property
     def syndromes(self):
         if self._syndromes is None:
@@ -74,16 +140,20 @@ class Case:
             )
         return self._syndromes
 
+    @property
+    def gene_table(self):
+        if self._gene_table is None:
+            CaseBatch([self]).create_gene_lists()
+        return self._gene_table
+
     @property
     def gene_list(self):
-        if self._gene_list is None:
-            self._gene_list = self._create_gene_list()
-        return self._gene_list
+        return self.gene_table.to_dict("records")
 
     @property
     def phenomized(self):
         if self._phenomized is None:
-            self._phenomized = self._phenomize()
+            CaseBatch([self]).phenomized
         return self._phenomized
 
     def get_syndrome_list(self):
@@ -113,124 +183,6 @@ class Case:
 
         return diagnosis_list
 
-    def _phenomize(self) -> pandas.DataFrame:
-        '''Add phenomization information to genes from boqa and phenomizer.
-        '''
-        pheno_boqa = PHENOMIZER_INST.disease_boqa_phenomize(self.features)
-
-        pheno_boqa.index = pheno_boqa.index.astype(int)
-        # merge pheno and boqa scores dataframe with our current syndromes
-        # dataframe which contains face2gene scores
-        syndromes = self.syndromes
-        syndromes["omim_id"] = syndromes["omim_id"].astype(int)
-        syndromes = syndromes.merge(
-            pheno_boqa, left_on='omim_id', how='outer', right_index=True
-        )
-        syndromes.reset_index(drop=True, inplace=True)
-
-        syndromes.rename(
-            columns={
-                "value_pheno": "pheno_score",
-                "value_boqa": "boqa_score",
-            },
-            inplace=True
-        )
-
-        # fill nans created by merge
-        syndromes.fillna(
-            {
-                'combined_score': 0.0,
-                'feature_score': 0.0,
-                'gestalt_score': 0.0,
-                'pheno_score': 0.0,
-                'boqa_score': 0.0,
-                'syndrome_name': '',
-                'confirmed': False,
-                'differential': False,
-                'has_mask': False,
-                'gene-symbol': '',
-                'gene-id': '',
-                'disease-name_boqa': '',
-                'disease-name_pheno': '',
-                'disease-id_boqa': '',
-                'disease-id_pheno': '',
-            },
-            inplace=True
-        )
-
-        LOGGER.debug("Phenomization case %s success", self.case_id)
-        return syndromes
-
-    def _create_gene_list(self) -> [dict]:
-        '''Get a list of genes from the detected syndrome by inferring
-        gene phenotype mappings from the phenomizer and OMIM.
-        '''
-        syndromes = self.phenomized.to_dict("records")
-
-        phenotypic_series_mapping = {}
-        for syndrome in syndromes:
-
-            disease_id = syndrome["omim_id"]
-
-            phenotypic_series = OMIM_INST.omim_id_to_phenotypic_series(
-                str(disease_id)
-            ) or str(disease_id)
-
-            syndrome_name = (
-                syndrome["syndrome_name"]
-                or syndrome["disease-name_pheno"]
-                or syndrome["disease-name_boqa"]
-            )
-
-            genes = list(OMIM_INST.mim_pheno_to_gene(disease_id).values())
-            if "gene-id" in syndrome and syndrome["gene-id"]:
-                genes += [
-                    {
-                        "gene_id": eid,
-                        "gene_symbol": OMIM_INST.entrez_id_to_symbol(eid),
-                        "gene_omim_id": OMIM_INST.entrez_id_to_mim_gene(eid)
-                    }
-                    for eid in syndrome["gene-id"].split(", ")
-                    if eid not in [g["gene_id"] for g in genes]
-                ]
-
-            for gene in genes:
-                if not gene["gene_id"]:
-                    continue
-
-                # uniqueness constraint on disease_id and
-                # gene_id
-                key = "{}|{}".format(syndrome_name, gene["gene_id"])
-                pheno_score = syndrome["pheno_score"] \
-                    if "pheno_score" in syndrome else 0.0
-                boqa_score = syndrome["boqa_score"] \
-                    if "boqa_score" in syndrome else 0.0
-                update_data = dict(
-                    {
-                        "disease_id": disease_id,
-                        "phenotypic_series": phenotypic_series,
-                        "syndrome_name": syndrome_name,
-                        "gestalt_score": syndrome["gestalt_score"],
-                        "feature_score": syndrome["feature_score"],
-                        "pheno_score": pheno_score,
-                        "boqa_score": boqa_score,
-                        "has_mask": syndrome["has_mask"],
-                    },
-                    **gene
-                )
-                if key in phenotypic_series_mapping:
-                    # use the largest scores of two identical mappings
-                    phenotypic_series_mapping[key] = {
-                        k: (max(v, update_data[k])
-                            if not isinstance(v, str)
-                            else update_data[k] or v)
-                        for k, v in phenotypic_series_mapping[key].items()
-                    }
-                else:
-                    phenotypic_series_mapping[key] = update_data
-
-        return list(phenotypic_series_mapping.values())
-
     def pathogenic_gene_in_gene_list(
             self,
     ) -> (bool, list):
@@ -238,7 +190,7 @@ class Case:
         variant_gene_names = [
             v.gene["gene_id"] for v in self.hgvs_models
         ]
-        gene_list_ids = [g["gene_id"] for g in self.gene_list]
+        gene_list_ids = set(self.gene_table["gene_id"])
         status = [
             (v in gene_list_ids, v)
             for v in variant_gene_names
@@ -259,92 +211,17 @@ class Case:
         Note that this function is more definitive than the json level check,
         as the validity of hgvs parsing has already been established.
         '''
+        return CaseBatch([self]).check()[0]
+
+    def check_genomic(self) -> (bool, list):
+        '''Check the genomic criteria of the case. Syndrome criteria are
+        checked for many cases at once in CaseBatch.check_syndromes.
+        '''
         valid = True
         issues = []
 
-        # check if there is at least one feature (HPO)
-        features = self.features
-        if len(features) < 1:
-            issues.append(
-                {
-                    "type": "NO_FEATURES",
-                }
-            )
-            valid = False
-
-        scores = [
-            "gestalt_score"
-        ]
-        max_scores = {s: max(self.phenomized[s]) for s in scores}
-        zero_scores = [s for s, n in max_scores.items() if n <= 0]
-
-        # check maximum gestalt score
-        if zero_scores:
-            issues.append(
-                {
-                    "type": "MISSING_SCORES",
-                    "data": max_scores
-                }
-            )
-            valid = False
-
-        # check that only one syndrome has been selected
-        diagnosis = self.phenomized.loc[self.phenomized['confirmed']]
-        if len(diagnosis) < 1:
-            issues.append(
-                {
-                    "type": "NO_DIAGNOSIS",
-                }
-            )
-            valid = False
-
-        diagnosis = pandas.concat(
-            [diagnosis, self.phenomized.loc[self.phenomized["differential"]]]
-        )
-
-        # check whether multiple diagnoses are in same phenotypic series
-        ps_dict = {}
-        for _, diag in diagnosis.iterrows():
-            ps_res = OMIM_INST.omim_id_to_phenotypic_series(
-                str(diag["omim_id"])
-            ) or str(diag["omim_id"])
-            # ignore entries without omim id
-            if ps_res == '0':
-                continue
-            if diag["syndrome_name"] in ps_dict:
-                ps_dict[diag["syndrome_name"]].add(ps_res)
-            else:
-                ps_dict[diag["syndrome_name"]] = set([ps_res])
-        # compact ps_dict based on omim ids
-        reduced_ps_dict = {}
-
-        for key, series in ps_dict.items():
-            contained = False
-            for other_key, other_series in ps_dict.items():
-                if other_key == key:
-                    continue
-                if series <= other_series:
-                    contained = True
-            if not contained:
-                reduced_ps_dict[key] = series
-
-        if len(reduced_ps_dict) > 1:
-            issues.append(
-                {
-                    "type": "MULTI_DIAGNOSIS",
-                    "data": {
-                        "orig": list(diagnosis["omim_id"]),
-                        'names': list(reduced_ps_dict.keys()),
-                        "converted_ids": [
-                            e for v in reduced_ps_dict.values() for e in v
-                        ]
-                    }
-                }
-            )
-            valid = False
-
         if not self.get_variants():
-            raw_entries = self.data.get_genomic_entries()
+            raw_entries = self.get_genomic_entries()
             if not raw_entries:
                 issues.append(
                     {
@@ -361,7 +238,7 @@ class Case:
             valid = False
         else:
             # Check if there are multiple different disease-causing genes
-            raw_entries = self.data.get_genomic_entries()
+            raw_entries = self.get_genomic_entries()
             entries = self.hgvs_models
             if len(entries) > 1:
                 genes = [
@@ -439,6 +316,38 @@ class Case:
                 models.append(model)
         return models
 
+    @staticmethod
+    def create_hgvs_vcfs(
+            case_objs: ["Case"],
+            outputpath: str,
+            temppath: Union[None, str] = None,
+            recreate: bool = False,
+    ) -> Dict[str, Union[str, pandas.DataFrame]]:
+        '''Generate vcf dataframes for all cases needing a new vcf file with
+        a single jannovar request. Results can be passed to put_hgvs_vcf.'''
+        if temppath is None:
+            temppath = outputpath
+        requests = [
+            c.hgvs_vcf_request() for c in case_objs
+            if c.needs_hgvs_vcf(outputpath, recreate)
+        ]
+        if not requests:
+            return {}
+        if JANNOVAR_INST.can_connect():
+            vcf_data = JANNOVAR_INST.create_vcfs(requests)
+        else:
+            vcf_data = vcf_jannovar.create_vcfs(requests, temppath)
+        failed = [
+            case_id for case_id, _, _ in requests
+            if vcf_data.get(case_id) is None
+        ]
+        if failed:
+            LOGGER.warning(
+                "Jannovar conversion of %d cases failed, converting them "
+                "one by one: %s", len(failed), ", ".join(map(str, failed))
+            )
+        return vcf_data
+
     def _create_vcf_from_hgvs(
             self,
             hgvs_strings: [str],
@@ -457,13 +366,39 @@ class Case:
             )
         return vcf_data
 
+    def needs_hgvs_vcf(self, outputpath: str, recreate: bool = False) -> bool:
+        '''Check whether put_hgvs_vcf has to generate a new vcf file.'''
+        if not self.get_variants():
+            return False
+        vcf_path = os.path.join(outputpath, self.case_id + ".vcf.gz")
+        if recreate or not os.path.exists(vcf_path):
+            return True
+        # existing vcf created from different hgvs strings
+        recorded = manifest.get_vcf_manifest(outputpath).get_hgvs_hash(
+            self.case_id
+        )
+        return recorded is not None and recorded != manifest.get_hgvs_hash(
+            [str(v) for v in self.get_variants()]
+        )
+
+    def hgvs_vcf_request(self) -> (str, str, [str]):
+        '''Get case id, zygosity and hgvs strings used for vcf
+        generation.'''
+        return (
+            self.case_id,
+            self.hgvs_models[0].zygosity.lower(),
+            [str(v) for v in self.get_variants()],
+        )
+
     def put_hgvs_vcf(
             self,
             outputpath: str,
             temppath: Union[None, str] = None,
             recreate: bool = False,
+            vcf_data: Union[None, str, pandas.DataFrame] = None,
     ) -> None:
-        '''Dumps vcf file to given path as <case_id>.vcf.gz.'''
+        '''Dumps vcf file to given path as <case_id>.vcf.gz. Vcf data
+        already generated in a batch with other cases can be given.'''
         if temppath is None:
             temppath = outputpath
 
@@ -476,30 +411,42 @@ class Case:
 
         hgvs_strings = [str(v) for v in self.get_variants()]
         vcf_path = os.path.join(outputpath, self.case_id + ".vcf.gz")
+        vcf_manifest = manifest.get_vcf_manifest(outputpath)
+        hgvs_hash = manifest.get_hgvs_hash(hgvs_strings)
 
         if not recreate and os.path.exists(vcf_path):
-            vcf_data = vcf_jannovar.read_vcfdf(vcf_path)
-            vcf_hgvs = vcf_jannovar.get_hgvs_codes(vcf_data)
-
-            # ensure that hgvs strings are same
-            if all(h in vcf_hgvs for h in hgvs_strings) \
-                    and all(h in hgvs_strings for h in vcf_hgvs):
+            if vcf_manifest.is_current(self.case_id, hgvs_hash, vcf_path):
                 LOGGER.debug("%s: Use existing vcf.", self.case_id)
-        else:
-            vcf_data = self._create_vcf_from_hgvs(
-                hgvs_strings, temppath
-            )
-            if isinstance(vcf_data, pandas.DataFrame):
-                vcf_jannovar.write_vcfdf(vcf_data, vcf_path)
-            elif isinstance(vcf_data, str):
+                self.simulated_vcf = vcf_jannovar.ReusedVcf(vcf_path)
+                return [vcf_path]
+            if vcf_data is None:
+                # no manifest entry, compare hgvs strings in the vcf file
+                existing = vcf_jannovar.read_vcfdf(vcf_path)
+                vcf_hgvs = vcf_jannovar.get_hgvs_codes(existing)
+                if set(vcf_hgvs) == set(hgvs_strings):
+                    LOGGER.debug("%s: Use existing vcf.", self.case_id)
+                    vcf_manifest.update(self.case_id, hgvs_hash, vcf_path)
+                    self.simulated_vcf = existing
+                    return [vcf_path]
                 LOGGER.debug(
-                    "%s: VCF generation failed. Error: %s",
-                    self.case_id, vcf_data
-                )
-            else:
-                LOGGER.debug(
-                    "%s: No vcf generated yet.",
+                    "%s: Existing vcf has different hgvs strings.",
                     self.case_id
                 )
+
+        if vcf_data is None:
+            vcf_data = self._create_vcf_from_hgvs(hgvs_strings, temppath)
+        if isinstance(vcf_data, pandas.DataFrame):
+            vcf_jannovar.write_vcfdf(vcf_data, vcf_path)
+            vcf_manifest.update(self.case_id, hgvs_hash, vcf_path)
+        elif isinstance(vcf_data, str):
+            LOGGER.debug(
+                "%s: VCF generation failed. Error: %s",
+                self.case_id, vcf_data
+            )
+        else:
+            LOGGER.debug(
+                "%s: No vcf generated yet.",
+                self.case_id
+            )
         self.simulated_vcf = vcf_data
         return [vcf_path]
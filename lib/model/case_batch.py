@@ -0,0 +1,419 @@
+'''
+Syndromes and scores of many cases in single tables.
+---
+Tables of all cases in a batch contain a case_id column, so that
+phenomization, gene list creation, diagnosis selection and the syndrome
+checks run as single pandas operations instead of once for every small case
+table.
+
+Cases keep their own rows in the lazy fields _phenomized and _gene_table,
+so that single cases can still be used and sent to worker processes on
+their own. Rows are kept as small tables, which take much less memory than
+lists of records.
+'''
+import logging
+
+import numpy
+import pandas
+
+from lib import constants
+from lib.global_singletons import OMIM_INST, PHENOMIZER_INST
+
+
+LOGGER = logging.getLogger(__name__)
+
+# defaults of fields missing after merging syndromes and phenomization scores
+PHENOMIZED_DEFAULTS = {
+    'combined_score': 0.0,
+    'feature_score': 0.0,
+    'gestalt_score': 0.0,
+    'pheno_score': 0.0,
+    'boqa_score': 0.0,
+    'syndrome_name': '',
+    'confirmed': False,
+    'differential': False,
+    'has_mask': False,
+    'gene-symbol': '',
+    'gene-id': '',
+    'disease-name_boqa': '',
+    'disease-name_pheno': '',
+    'disease-id_boqa': '',
+    'disease-id_pheno': '',
+}
+
+PHENOMIZED_NAMES = {
+    "value_pheno": "pheno_score",
+    "value_boqa": "boqa_score",
+}
+
+# fields of gene list entries
+GENE_LIST_COLUMNS = [
+    "disease_id", "phenotypic_series", "syndrome_name", "gestalt_score",
+    "feature_score", "pheno_score", "boqa_score", "has_mask", "gene_id",
+    "gene_symbol", "gene_omim_id",
+]
+
+# gene list fields merged by the last non-empty value, all others use the
+# largest value
+GENE_LIST_NAMES = [
+    "phenotypic_series", "syndrome_name", "gene_id", "gene_symbol",
+    "gene_omim_id",
+]
+
+
+def concat_cases(tables: [pandas.DataFrame], case_ids: [str]):
+    '''Concatenate tables of single cases into a table with case_id
+    column.'''
+    if not tables:
+        return pandas.DataFrame(columns=["case_id"])
+    table = pandas.concat(tables, keys=case_ids, names=["case_id", None])
+    table.reset_index(level=0, inplace=True)
+    table.reset_index(drop=True, inplace=True)
+    return table
+
+
+def split_records(table: pandas.DataFrame) -> dict:
+    '''Split table with case_id column into lists of records by case.'''
+    records = {}
+    for record in table.to_dict("records"):
+        records.setdefault(record.pop("case_id"), []).append(record)
+    return records
+
+
+class CaseBatch:
+    '''
+    Exposes the following properties:
+    cases - list of case objects in the batch
+    phenomized - syndromes and phenomization scores of all cases
+    '''
+
+    def __init__(self, case_objs: ["Case"]):
+        self.cases = list(case_objs)
+        self._phenomized = None
+
+    @property
+    def phenomized(self) -> pandas.DataFrame:
+        if self._phenomized is None:
+            self._phenomized = self._phenomize()
+        return self._phenomized
+
+    def _phenomize(self) -> pandas.DataFrame:
+        '''Add phenomization information to the syndromes of all cases not
+        phenomized yet and return the phenomized syndromes of all cases.
+        '''
+        missing = [c for c in self.cases if c._phenomized is None]
+        if missing:
+            self._phenomize_cases(missing)
+        return concat_cases(
+            [c._phenomized for c in self.cases],
+            [c.case_id for c in self.cases]
+        )
+
+    @staticmethod
+    def _phenomize_cases(case_objs: ["Case"]):
+        '''Merge syndromes of cases with scores from boqa and phenomizer.'''
+        case_ids = [c.case_id for c in case_objs]
+        syndromes = [c.syndromes for c in case_objs]
+        scores = [
+            PHENOMIZER_INST.disease_boqa_phenomize(c.features)
+            for c in case_objs
+        ]
+        # columns of every case in the order of a merge of single cases
+        case_columns = {
+            case_id: [
+                PHENOMIZED_NAMES.get(column, column)
+                for column in list(syndrome.columns) + list(score.columns)
+            ]
+            for case_id, syndrome, score in zip(case_ids, syndromes, scores)
+        }
+
+        syndromes = concat_cases(syndromes, case_ids)
+        syndromes["omim_id"] = syndromes["omim_id"].astype(int)
+        scores = pandas.concat(
+            scores, keys=case_ids, names=["case_id", "omim_id"]
+        ).reset_index()
+        scores["omim_id"] = scores["omim_id"].astype(int)
+
+        # merge pheno and boqa scores with the syndromes, which contain
+        # face2gene scores
+        phenomized = syndromes.merge(
+            scores, on=["case_id", "omim_id"], how="outer"
+        )
+        phenomized.rename(columns=PHENOMIZED_NAMES, inplace=True)
+        # fill nans created by merge
+        phenomized.fillna(PHENOMIZED_DEFAULTS, inplace=True)
+
+        groups = phenomized.groupby("case_id", sort=False).groups
+        for case_obj in case_objs:
+            rows = groups.get(case_obj.case_id, [])
+            # column types do not depend on the other cases in the batch
+            case_obj._phenomized = phenomized.loc[
+                rows, case_columns[case_obj.case_id]
+            ].reset_index(drop=True).infer_objects()
+            LOGGER.debug("Phenomization case %s success", case_obj.case_id)
+
+    def create_gene_lists(self):
+        '''Create gene lists of all cases, which do not have one yet.'''
+        missing = [c for c in self.cases if c._gene_table is None]
+        if not missing:
+            return
+        phenomized = self.phenomized
+        # cases without syndromes and scores have no columns
+        if phenomized.empty:
+            for case_obj in missing:
+                case_obj._gene_table = pandas.DataFrame(
+                    columns=GENE_LIST_COLUMNS
+                )
+            return
+        missing_ids = set(c.case_id for c in missing)
+        gene_table = create_gene_table(
+            phenomized.loc[phenomized["case_id"].isin(missing_ids)]
+        )
+        groups = gene_table.groupby("case_id", sort=False).groups
+        for case_obj in missing:
+            rows = groups.get(case_obj.case_id, [])
+            case_obj._gene_table = gene_table.loc[
+                rows, GENE_LIST_COLUMNS
+            ].reset_index(drop=True).infer_objects()
+
+    def get_diagnosis_table(
+            self, differential: bool = True
+    ) -> pandas.DataFrame:
+        '''Get diagnosis of all cases, optionally with differential
+        diagnosis.'''
+        phenomized = self.phenomized
+        if phenomized.empty:
+            return pandas.DataFrame(columns=["case_id", "omim_id"])
+        select = phenomized["confirmed"].astype(bool)
+        if differential:
+            select |= phenomized["differential"].astype(bool)
+        return phenomized.loc[select]
+
+    def get_diagnosis(self, differential: bool = True) -> dict:
+        '''Get lists of diagnosis of all cases by case id, optionally with
+        differential diagnosis.'''
+        diagnosis = split_records(self.get_diagnosis_table(differential))
+        return {c.case_id: diagnosis.get(c.case_id, []) for c in self.cases}
+
+    def get_variant_table(self) -> pandas.DataFrame:
+        '''Get genomic entries of all cases with columns case_id, gene_id,
+        variants and benign. Benign entries are marked as normal.'''
+        rows = [
+            (
+                case_obj.case_id,
+                model.gene["gene_id"],
+                len(model.variants),
+                model.result in constants.NEGATIVE_RESULTS,
+            )
+            for case_obj in self.cases
+            for model in case_obj.hgvs_models
+        ]
+        return pandas.DataFrame(
+            rows, columns=["case_id", "gene_id", "variants", "benign"]
+        )
+
+    def get_gene_table(self) -> pandas.DataFrame:
+        '''Get gene ids of the gene lists of all cases.'''
+        self.create_gene_lists()
+        rows = [
+            (case_obj.case_id, gene_id)
+            for case_obj in self.cases
+            for gene_id in case_obj.gene_table["gene_id"]
+        ]
+        return pandas.DataFrame(rows, columns=["case_id", "gene_id"])
+
+    def check(self) -> [(bool, list)]:
+        '''Check whether cases fulfill all criteria. Syndrome criteria are
+        checked for all cases at once, see Case.check for the criteria.
+        Results are returned in the order of the cases.
+        '''
+        syndrome_issues = self.check_syndromes()
+        results = []
+        for case_obj in self.cases:
+            issues = syndrome_issues[case_obj.case_id]
+            genomic_valid, genomic_issues = case_obj.check_genomic()
+            results.append(
+                (not issues and genomic_valid, issues + genomic_issues)
+            )
+        return results
+
+    def check_syndromes(self) -> dict:
+        '''Check features, scores and diagnosis of all cases. Returns lists
+        of issues by case id.'''
+        phenomized = self.phenomized
+        if phenomized.empty:
+            phenomized = pandas.DataFrame(columns=[
+                "case_id", "omim_id", "syndrome_name", "gestalt_score",
+                "confirmed", "differential"
+            ])
+        max_gestalt = phenomized.groupby("case_id")["gestalt_score"].max()
+
+        confirmed = phenomized.loc[phenomized["confirmed"].astype(bool)]
+        confirmed_ids = set(confirmed["case_id"])
+        diagnosis = pandas.concat([
+            confirmed,
+            phenomized.loc[phenomized["differential"].astype(bool)]
+        ])
+        diagnosis = diagnosis.assign(
+            phenotypic_series=OMIM_INST.omim_ids_to_phenotypic_series(
+                diagnosis["omim_id"]
+            )
+        )
+        diagnosis = split_records(
+            diagnosis[["case_id", "omim_id", "syndrome_name",
+                       "phenotypic_series"]]
+        )
+
+        case_issues = {}
+        for case_obj in self.cases:
+            issues = []
+            # check if there is at least one feature (HPO)
+            if len(case_obj.features) < 1:
+                issues.append({"type": "NO_FEATURES"})
+
+            # check maximum gestalt score
+            max_scores = {
+                "gestalt_score": float(
+                    max_gestalt.get(case_obj.case_id, 0.0)
+                )
+            }
+            if max_scores["gestalt_score"] <= 0:
+                issues.append({"type": "MISSING_SCORES", "data": max_scores})
+
+            # check that only one syndrome has been selected
+            if case_obj.case_id not in confirmed_ids:
+                issues.append({"type": "NO_DIAGNOSIS"})
+
+            multi_diagnosis = check_multi_diagnosis(
+                diagnosis.get(case_obj.case_id, [])
+            )
+            if multi_diagnosis:
+                issues.append(multi_diagnosis)
+            case_issues[case_obj.case_id] = issues
+        return case_issues
+
+
+def check_multi_diagnosis(diagnosis: [dict]) -> dict:
+    '''Check whether multiple diagnoses are in different phenotypic series
+    and return an issue if so.'''
+    ps_dict = {}
+    for diag in diagnosis:
+        # ignore entries without omim id
+        if diag["phenotypic_series"] == '0':
+            continue
+        ps_dict.setdefault(diag["syndrome_name"], set()).add(
+            diag["phenotypic_series"]
+        )
+    # compact ps_dict based on omim ids
+    reduced_ps_dict = {
+        key: series for key, series in ps_dict.items()
+        if not any(
+            series <= other_series
+            for other_key, other_series in ps_dict.items()
+            if other_key != key
+        )
+    }
+    if len(reduced_ps_dict) > 1:
+        return {
+            "type": "MULTI_DIAGNOSIS",
+            "data": {
+                "orig": [d["omim_id"] for d in diagnosis],
+                'names': list(reduced_ps_dict.keys()),
+                "converted_ids": [
+                    e for v in reduced_ps_dict.values() for e in v
+                ]
+            }
+        }
+    return {}
+
+
+def create_gene_table(phenomized: pandas.DataFrame) -> pandas.DataFrame:
+    '''Get genes from the detected syndromes of cases by inferring gene
+    phenotype mappings from the phenomizer and OMIM.
+
+    Syndromes are joined with the OMIM phenotype gene table and the genes
+    given by the phenomizer. Entries of a case with the same syndrome name
+    and gene are merged by using the largest scores and the last non-empty
+    names.
+    '''
+    columns = ["case_id"] + GENE_LIST_COLUMNS
+    if phenomized.empty:
+        return pandas.DataFrame(columns=columns)
+
+    syndrome_name = phenomized["syndrome_name"]
+    for column in ["disease-name_pheno", "disease-name_boqa"]:
+        syndrome_name = syndrome_name.where(
+            syndrome_name.astype(bool), phenomized[column]
+        )
+    syndromes = pandas.DataFrame({
+        "case_id": phenomized["case_id"],
+        "disease_id": phenomized["omim_id"],
+        "phenotypic_series": OMIM_INST.omim_ids_to_phenotypic_series(
+            phenomized["omim_id"]
+        ),
+        "syndrome_name": syndrome_name,
+        "gestalt_score": phenomized["gestalt_score"],
+        "feature_score": phenomized["feature_score"],
+        "pheno_score": phenomized.get("pheno_score", 0.0),
+        "boqa_score": phenomized.get("boqa_score", 0.0),
+        "has_mask": phenomized["has_mask"],
+    }, index=phenomized.index)
+
+    genes = OMIM_INST.mim_pheno_to_gene_table(phenomized["omim_id"])
+    genes["source"] = 0
+    if "gene-id" in phenomized:
+        gene_ids = phenomized["gene-id"]
+        gene_ids = gene_ids.loc[gene_ids.astype(bool)]
+        genes = pandas.concat(
+            [genes, create_extra_genes(gene_ids, genes)], ignore_index=True
+        )
+    genes = genes.loc[genes["gene_id"] != ""]
+    if genes.empty:
+        return pandas.DataFrame(columns=columns)
+
+    genes = genes.merge(syndromes, left_on="row", right_index=True)
+    genes.sort_values(
+        ["row", "source", "gene_rank"], kind="mergesort", inplace=True
+    )
+    # uniqueness constraint on syndrome name and gene_id
+    genes["key"] = genes["syndrome_name"] + "|" + genes["gene_id"]
+
+    # use the largest scores and last non-empty names of identical mappings
+    genes[GENE_LIST_NAMES] = genes[GENE_LIST_NAMES].replace("", numpy.nan)
+    aggregations = {
+        column: "last" if column in GENE_LIST_NAMES else "max"
+        for column in GENE_LIST_COLUMNS
+    }
+    gene_table = genes.groupby(
+        ["case_id", "key"], sort=False
+    ).agg(aggregations).reset_index(level=0)
+    gene_table[GENE_LIST_NAMES] = gene_table[GENE_LIST_NAMES].fillna("")
+    return gene_table[columns].reset_index(drop=True)
+
+
+def create_extra_genes(
+        gene_ids: pandas.Series, genes: pandas.DataFrame
+) -> pandas.DataFrame:
+    '''Create gene table from comma separated entrez ids, which are not
+    already contained in the genes of the same syndrome.'''
+    if gene_ids.empty:
+        return pandas.DataFrame(columns=genes.columns)
+    extra_ids = gene_ids.str.split(", ", expand=True).stack()
+    extra_genes = pandas.DataFrame({
+        "row": extra_ids.index.get_level_values(0),
+        "gene_rank": extra_ids.index.get_level_values(1),
+        "gene_id": extra_ids.values,
+    })
+    extra_genes = extra_genes.merge(
+        genes[["row", "gene_id"]].drop_duplicates(),
+        how="left", on=["row", "gene_id"], indicator=True
+    )
+    extra_genes = extra_genes.loc[
+        extra_genes["_merge"] == "left_only"
+    ].drop("_merge", axis=1).reset_index(drop=True)
+    extra_genes = pandas.concat([
+        extra_genes,
+        OMIM_INST.entrez_ids_to_genes(extra_genes["gene_id"])
+    ], axis=1)
+    extra_genes["source"] = 1
+    return extra_genes
@@ -8,11 +8,9 @@ import os
 from typing import Union, Iterable, Dict
 from configparser import ConfigParser
 
-from lib import errorfixer
-from lib.api import mutalyzer, omim, jannovar, phenomizer
-
 from lib.global_singletons import (
-    ERRORFIXER_INST, JANNOVAR_INST, OMIM_INST, PHENOMIZER_INST, AWS_INST, LAB_INST
+    ERRORFIXER_INST, JANNOVAR_INST, OMIM_INST, PHENOMIZER_INST, AWS_INST, LAB_INST,
+    CONCURRENT_INST, HGVS_SYNTAX_INST, HGVS_MEMO_INST, DBSNP_INST
 )
 
 
@@ -34,6 +32,11 @@ class PEDIAConfig(ConfigParser):
             "dump_intermediate"
         )
         self.data_path = self["general"]["data_path"] if self["general"]["data_path"] else "data"
+        self.checkpoint_path = self["general"].get(
+            "checkpoint_path", "checkpoints"
+        )
+        self.workers = self["general"].getint("workers", 0)
+        self.worker_chunksize = self["general"].getint("worker_chunksize", 0)
 
         self.train_pickle = args.train_pickle_path
         if self["classifier"]["train_pickle_path"]:
@@ -57,7 +60,8 @@ class PEDIAConfig(ConfigParser):
         else:
             self.logfile_path = self["general"]["logfile"]
 
-        if args.single:
+        # pickles of all cases are not created in streaming or server mode
+        if args.single or args.stream or args.serve:
             self.dump_intermediate = False
 
         if args.lab:
@@ -72,10 +76,14 @@ class PEDIAConfig(ConfigParser):
             self.use_phenomizer = False
 
         # configure api components
+        CONCURRENT_INST.configure(**self.concurrency_options)
         ERRORFIXER_INST.configure(**self.errorfixer_options)
         JANNOVAR_INST.configure(**self.jannovar_options)
         OMIM_INST.configure(**self.omim_options)
         PHENOMIZER_INST.configure(**self.phenomizer_options)
+        HGVS_SYNTAX_INST.configure(**self.hgvs_syntax_options)
+        HGVS_MEMO_INST.configure(**self.hgvs_memo_options)
+        DBSNP_INST.configure(**self.dbsnp_options)
 
     @property
     def errorfixer_options(self):
@@ -85,11 +93,22 @@ class PEDIAConfig(ConfigParser):
             "version": None,
         }
 
+    @property
+    def concurrency_options(self):
+        if "requests" not in self:
+            return {}
+        return {
+            "max_concurrency": self["requests"].getint("max_concurrency", 50),
+            "rate_limit": self["requests"].getfloat("rate_limit", 0.0),
+            "retries": self["requests"].getint("retries", 3),
+        }
+
     @property
     def jannovar_options(self):
         return {
             "url": self["jannovar"]["url"],
             "port": int(self["jannovar"]["port"]),
+            "batch_size": self["jannovar"].getint("batch_size", 200),
         }
 
     @property
@@ -106,6 +125,33 @@ class PEDIAConfig(ConfigParser):
             "url": self["phenomizer"]["url"],
             "user": self["phenomizer"]["user"],
             "password": self["phenomizer"]["password"],
+            "version": self["phenomizer"].get("version", ""),
+            "cache_size": self["phenomizer"].getint("cache_size", 256),
+        }
+
+    @property
+    def hgvs_syntax_options(self):
+        if "hgvs" not in self:
+            return {}
+        return {
+            "backend": self["hgvs"].get("syntax_check", "mutalyzer"),
+        }
+
+    @property
+    def hgvs_memo_options(self):
+        if "hgvs" not in self:
+            return {}
+        return {
+            "max_size": self["hgvs"].getint("memo_size", 100000),
+            "persist": self["hgvs"].getboolean("persist_parses", False),
+        }
+
+    @property
+    def dbsnp_options(self):
+        if "hgvs" not in self:
+            return {}
+        return {
+            "index_path": self["hgvs"].get("dbsnp_index", ""),
         }
 
     @property
@@ -187,7 +233,8 @@ class PEDIAConfig(ConfigParser):
             "vcf_sample_index": vcf_sample_index,
             "lab": lab,
             "aws_format": aws_format,
-            "phenobot_format": phenobot_format
+            "phenobot_format": phenobot_format,
+            "read_threads": self["input"].getint("read_threads", 8),
         }
 
     def parse_output(self, args: "Namespace"):
@@ -217,6 +264,10 @@ class PEDIAConfig(ConfigParser):
 
         valid_case_path =  os.path.join(output_path, self["output"]["valid_case_path"])
         quality_check_log = os.path.join(output_path, self["output"]["quality_check_log"])
+        case_manifest = os.path.join(
+            output_path,
+            self["output"].get("case_manifest", "case_manifest.json")
+        )
 
         create_log = True
 
@@ -232,5 +283,6 @@ class PEDIAConfig(ConfigParser):
             "converted_path": converted_path,
             "valid_case_path": valid_case_path,
             "quality_check_log": quality_check_log,
+            "case_manifest": case_manifest,
             "create_log": create_log
         }
@@ -0,0 +1,197 @@
+'''
+HGVS parse memo
+---
+Cleaning and parsing hgvs candidate strings of genomic entries is slow, since
+the hgvs grammar is run in pure python. The same strings recur in many
+entries, in corrected overrides and in repeated runs over the same cases.
+
+The memo keeps a bounded number of cleaned strings and parse results of the
+current process. Parse results are saved pickled, so that every lookup
+returns a new variant object, which can be modified by the caller. Failed
+parses are remembered by their error message and raised again.
+
+Parse results can additionally be saved in a sqlite database, which is
+shared by all processes and emptied if the installed hgvs version changes.
+'''
+import os
+import pickle
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+
+from lib.constants import CACHE_DIR
+from lib.singleton import LazyConfigure
+
+
+LOGGER = logging.getLogger(__name__)
+
+MEMO_FORMAT = 1
+
+
+class ParseStore:
+    '''Persistent parse results of hgvs strings.'''
+
+    def __init__(self, path: str, version: str = ""):
+        self.path = path
+        self.version = "{}:{}".format(MEMO_FORMAT, version)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        '''Connection of the current process, processes forked from the
+        parent open their own connection.'''
+        if self._connection is None or self._pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=60, check_same_thread=False
+            )
+            self._pid = os.getpid()
+            self._setup()
+        return self._connection
+
+    def _setup(self):
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS meta "
+                "(name TEXT PRIMARY KEY, value TEXT)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS parses "
+                "(hgvs TEXT PRIMARY KEY, error TEXT, data BLOB)"
+            )
+            row = self._connection.execute(
+                "SELECT value FROM meta WHERE name = 'version'"
+            ).fetchone()
+            if row is None or row[0] != self.version:
+                if row is not None:
+                    LOGGER.info(
+                        "HGVS version changed from %s to %s. "
+                        "Clearing parse store.", row[0], self.version
+                    )
+                self._connection.execute("DELETE FROM parses")
+                self._connection.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('version', ?)",
+                    (self.version,)
+                )
+
+    def get(self, hgvs_string: str) -> "(str, bytes) or None":
+        '''Get error message and pickled variant of an hgvs string.'''
+        with self._lock:
+            return self.connection.execute(
+                "SELECT error, data FROM parses WHERE hgvs = ?",
+                (hgvs_string,)
+            ).fetchone()
+
+    def put(self, hgvs_string: str, error: str, data: bytes) -> None:
+        with self._lock, self.connection as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO parses VALUES (?, ?, ?)",
+                (hgvs_string, error, data)
+            )
+
+    def clear(self) -> None:
+        with self._lock, self.connection as connection:
+            connection.execute("DELETE FROM parses")
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_lock"] = None
+        state["_connection"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class HGVSMemo(LazyConfigure):
+    '''Memo of cleaned hgvs candidates and parsed hgvs variants.'''
+
+    def __init__(self):
+        super().__init__()
+        self.max_size = 100000
+        self.store = None
+        self._cleaned = OrderedDict()
+        self._parsed = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def configure(self, max_size: int = 100000, persist: bool = False):
+        '''
+        Params:
+            max_size: Maximum number of cleaned strings and parse results
+                      kept in memory
+            persist: Save parse results in the cache directory
+        '''
+        super().configure()
+        self.max_size = max_size
+        self.store = None
+        if persist:
+            import hgvs
+            self.store = ParseStore(
+                os.path.join(CACHE_DIR, __name__ + "_parses.sqlite"),
+                version=hgvs.__version__
+            )
+
+    def _remember(self, memo: OrderedDict, key: str, value) -> None:
+        memo[key] = value
+        if len(memo) > self.max_size:
+            memo.popitem(last=False)
+
+    def clean(self, candidate: str) -> str:
+        '''Remove extraneous information from possible hgvs code.'''
+        from lib.model.hgvs_parser import clean_hgvs
+
+        if candidate in self._cleaned:
+            self._cleaned.move_to_end(candidate)
+            return self._cleaned[candidate]
+        cleaned = clean_hgvs(candidate)
+        self._remember(self._cleaned, candidate, cleaned)
+        return cleaned
+
+    def parse(self, hgvs_string: str) -> "hgvs.sequencevariant":
+        '''Parse hgvs string into a new variant object. Raises
+        HGVSParseError for strings which cannot be parsed.'''
+        import hgvs.exceptions
+
+        if hgvs_string in self._parsed:
+            self.hits += 1
+            self._parsed.move_to_end(hgvs_string)
+            error, data = self._parsed[hgvs_string]
+        else:
+            self.misses += 1
+            error, data = self._parse_new(hgvs_string)
+            self._remember(self._parsed, hgvs_string, (error, data))
+        if error is not None:
+            raise hgvs.exceptions.HGVSParseError(error)
+        return pickle.loads(data)
+
+    def _parse_new(self, hgvs_string: str) -> (str, bytes):
+        import hgvs.exceptions
+        from lib.model.hgvs_parser import HGVS_PARSER
+
+        if self.store is not None:
+            saved = self.store.get(hgvs_string)
+            if saved is not None:
+                return saved[0], saved[1]
+        error = data = None
+        try:
+            variant = HGVS_PARSER.parse_hgvs_variant(hgvs_string)
+            data = pickle.dumps(variant, pickle.HIGHEST_PROTOCOL)
+        except hgvs.exceptions.HGVSParseError as parse_error:
+            error = str(parse_error)
+        if self.store is not None:
+            self.store.put(hgvs_string, error, data)
+        return error, data
+
+    def clear(self) -> None:
+        '''Drop all cleaned strings and parse results.'''
+        self._cleaned = OrderedDict()
+        self._parsed = OrderedDict()
+        if self.store is not None:
+            self.store.clear()
@@ -6,14 +6,15 @@ import logging
 from typing import Union
 
 import hgvs
-import hgvs.parser
-import hgvs.validator
 import hgvs.exceptions
-import hgvs.assemblymapper
 import hgvs.config
 
 
-from lib.global_singletons import ERRORFIXER_INST, MUTALYZER_INST
+from lib.singleton import LazyInstance
+from lib.utils import SlotState
+from lib.global_singletons import (
+    ERRORFIXER_INST, HGVS_SYNTAX_INST, HGVS_MEMO_INST, DBSNP_INST
+)
 from lib.constants import HGVS_OPS, HGVS_PREFIX
 
 
@@ -24,10 +25,11 @@ LOGGER = logging.getLogger("lib")
 hgvs.config.global_config.formatting.max_ref_length = None
 
 
-# creation of hgvs objects from hgvs strings
-HGVS_PARSER = hgvs.parser.Parser()
+# creation of hgvs objects from hgvs strings, the grammar is only built on
+# first use
+HGVS_PARSER = LazyInstance("hgvs.parser", "Parser")
 # validation of created hgvs objects
-HGVS_VALIDATOR = hgvs.validator.IntrinsicValidator()
+HGVS_VALIDATOR = LazyInstance("hgvs.validator", "IntrinsicValidator")
 
 # REGEX matching proteins denoted by 'X (Triplet code)'
 RE_PROTEIN = re.compile(r'\w \((\w+)\)')
@@ -152,7 +154,7 @@ def get_multi_field(data: dict, candidate_ids: [str]) -> str:
 
 
 def hgvs_identical(
-        seqa: hgvs.sequencevariant, seqb: hgvs.sequencevariant
+        seqa: "hgvs.sequencevariant", seqb: "hgvs.sequencevariant"
 ) -> bool:
     '''Compare whether two HGVS strings most probably describe the same
     variant.'''
@@ -186,12 +188,22 @@ def hgvs_identical(
     return acc_eq and pos_eq and edit_eq
 
 
-class HGVSModel:
-    '''Class to model mutation information received from Face2Gene.'''
+class HGVSModel(SlotState):
+    '''Class to model mutation information received from Face2Gene.
+
+    The raw genomic entry is only kept until the syntax check is done.
+    '''
+
+    __slots__ = (
+        "corrected", "_js", "entry_id", "result", "gene", "test_type",
+        "variant_type", "variants", "syntax_checked", "zygosity",
+        "variant_info",
+    )
 
     def __init__(
             self,
             entry_dict: dict,
+            check_syntax: bool = True,
     ):
         '''New gene entry format contains:
         entry_id - entry id of gene entry json file
@@ -234,11 +246,27 @@ class HGVSModel:
         if self.entry_id in ERRORFIXER_INST:
             self._correct_gene_name()
 
-
-
+        self.variants = variants
+        self.syntax_checked = False
+        if check_syntax:
+            self.check_syntax()
+
+    def check_syntax(self, results: Union[dict, None] = None):
+        '''Remove variants with invalid syntax according to the configured
+        syntax check and save them as errors. Results of already requested
+        syntax checks can be given as a dict of hgvs strings to responses.
+        '''
+        variants = self.variants
+        if results is None:
+            results = HGVS_SYNTAX_INST.check_syntax_many(
+                [str(v) for v in variants]
+            )
         failed = []
         for var in variants:
-            checked = MUTALYZER_INST.check_syntax(var)
+            if str(var) in results:
+                checked = results[str(var)]
+            else:
+                checked = HGVS_SYNTAX_INST.check_syntax(var)
             if checked and not checked['valid']:
                 message = ["{}:{}".format(v['errorcode'], v['message']) for v
                            in checked['messages']['SoapMessage']]
@@ -250,8 +278,11 @@ class HGVSModel:
             ERRORFIXER_INST[self.entry_id] = (
                 info, valid_variants, failed)
         self.variants = variants
+        self.syntax_checked = True
+        self._js = None
 
     def get_json(self):
+        '''Raw genomic entry, None after the syntax check.'''
         return self._js
 
     def _correct_gene_name(self):
@@ -288,9 +319,7 @@ class HGVSModel:
         if self.entry_id in ERRORFIXER_INST:
             if len(ERRORFIXER_INST[self.entry_id]) > 0:
                 variants = ERRORFIXER_INST[self.entry_id]
-                variants = [
-                    HGVS_PARSER.parse_hgvs_variant(v) for v in variants
-                ]
+                variants = [HGVS_MEMO_INST.parse(v) for v in variants]
                 self.corrected = True
                 return variants
 
@@ -322,10 +351,10 @@ class HGVSModel:
         failures = 0
         failed = []
         for candidate in hgvs_candidates:
-            cleaned_hgvs = clean_hgvs(candidate)
+            cleaned_hgvs = HGVS_MEMO_INST.clean(candidate)
             if cleaned_hgvs:
                 try:
-                    var = HGVS_PARSER.parse_hgvs_variant(cleaned_hgvs)
+                    var = HGVS_MEMO_INST.parse(cleaned_hgvs)
                     if not any([hgvs_identical(v, var) for v in variants]):
                         variants.append(var)
                 except hgvs.exceptions.HGVSParseError:
@@ -370,7 +399,7 @@ class HGVSModel:
 
         rs_number = 'rs_number' in mutation and mutation['rs_number'] or ''
         if rs_number:
-            j = MUTALYZER_INST.get_db_snp_descriptions(rs_number)
+            j = DBSNP_INST.get_db_snp_descriptions(rs_number)
             # add the first entry, since we will have a much too large number
             # of entries
             if j:
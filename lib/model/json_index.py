@@ -0,0 +1,108 @@
+'''
+Json file index
+---
+Loading a case json checks for a corrected override of the case and of every
+linked genomic entry and opens each file on its own. On network filesystems
+these small metadata calls dominate the loading of many cases.
+
+The index lists every directory once and answers existence checks from the
+listing. Json files can be read and decoded in bulk with multiple threads
+beforehand, the decoded data is handed out once to the json classes.
+Directories, which have not been listed, fall back to the filesystem.
+'''
+import os
+import json
+import logging
+import concurrent.futures
+from typing import Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def read_json(path: str) -> Union[dict, list]:
+    '''Read and decode json file, using orjson if it is installed.'''
+    with open(path, "rb") as json_file:
+        raw = json_file.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+
+class JsonFileIndex:
+    '''Directory listings and prefetched data of json files.'''
+
+    def __init__(self):
+        self._listings = {}
+        self._data = {}
+
+    def scan(self, directory: str) -> None:
+        '''List files of a directory once.'''
+        if directory in self._listings:
+            return
+        try:
+            self._listings[directory] = set(os.listdir(directory))
+        except OSError:
+            self._listings[directory] = set()
+
+    def exists(self, path: str) -> bool:
+        '''Check whether file exists using listed directories.'''
+        directory, filename = os.path.split(path)
+        if directory in self._listings:
+            return filename in self._listings[directory]
+        return os.path.exists(path)
+
+    def prefetch(self, paths: [str], threads: int = 0) -> None:
+        '''Read and decode existing json files. Directories of all paths are
+        listed, so that paths can also be candidates of optional files.'''
+        for path in paths:
+            self.scan(os.path.dirname(path))
+        paths = [
+            p for p in set(paths) if p not in self._data and self.exists(p)
+        ]
+        if threads:
+            with concurrent.futures.ThreadPoolExecutor(threads) as executor:
+                results = list(executor.map(self._try_read, paths))
+        else:
+            results = [self._try_read(p) for p in paths]
+        for path, data in zip(paths, results):
+            if data is not None:
+                self._data[path] = data
+        LOGGER.debug("Prefetched %d json files", len(self._data))
+
+    @staticmethod
+    def _try_read(path):
+        # errors are raised again, when the file is loaded on its own
+        try:
+            return read_json(path)
+        except (OSError, ValueError):
+            return None
+
+    def peek(self, path: str) -> Union[dict, list, None]:
+        '''Get prefetched data without removing it from the index.'''
+        return self._data.get(path)
+
+    def load(self, path: str) -> Union[dict, list]:
+        '''Get json data of file. Prefetched data is only returned once,
+        since it is modified by the json classes.'''
+        if path in self._data:
+            return self._data.pop(path)
+        with open(path, "r") as json_file:
+            return json.load(json_file)
+
+    def release(self) -> None:
+        '''Drop prefetched data, which has not been loaded.'''
+        self._data = {}
+
+    def clear(self) -> None:
+        '''Drop directory listings and prefetched data.'''
+        self._listings = {}
+        self._data = {}
+
+
+JSON_INDEX = JsonFileIndex()
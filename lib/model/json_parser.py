@@ -12,17 +12,19 @@ Class overview:
 
 import logging
 import json
+import inspect
 from typing import Union, Callable
-from functools import reduce
+from functools import reduce, wraps
 import os
 
+import numpy
 import pandas
 
 from lib.global_singletons import OMIM_INST
-from lib.utils import explode_df_column
-from lib.vcf_operations import move_vcf
+from lib.vcf_operations import get_vcf_catalog
 # from lib.utils import optional_descent
 from lib.model.hgvs_parser import HGVSModel
+from lib.model.json_index import JSON_INDEX
 from lib import constants
 
 
@@ -52,6 +54,199 @@ class Directive:
 
 LOGGER = logging.getLogger(__name__)
 
+VALIDATORS = {}
+
+SYNDROME_COLUMNS = [
+    "omim_id", "gestalt_score", "combined_score", "feature_score",
+    "has_mask", "syndrome_name"
+]
+
+
+def compile_schema(schema, path: str = '') -> Callable[[object], list]:
+    '''Compile a schema into a validator function, which returns a list of
+    key paths and errors. The list is empty for valid data. The schema is
+    only traversed once and no results are created for valid values.
+    '''
+    if isinstance(schema, dict):
+        children = [
+            (k, compile_schema(child, "{}/{}".format(path, k)))
+            for k, child in schema.items()
+        ]
+
+        def validate_dict(data):
+            if not isinstance(data, dict):
+                return [(path, "Not a dict")]
+            errors = []
+            for key, validate in children:
+                if key not in data:
+                    errors.append(("{}/{}".format(path, key), "No key"))
+                else:
+                    errors += validate(data[key])
+            return errors
+        return validate_dict
+    elif isinstance(schema, list):
+        candidates = [compile_schema(c, path + "[]") for c in schema]
+
+        def validate_list(data):
+            if not isinstance(data, list):
+                return [(path, "Not a list")]
+            errors = []
+            for entry in data:
+                # multiple entries serve a as an OR option
+                entry_errors = []
+                for validate in candidates:
+                    entry_errors = validate(entry)
+                    if not entry_errors:
+                        break
+                errors += entry_errors
+            return errors
+        return validate_list
+    elif hasattr(schema, '__call__'):
+        def validate_call(data):
+            valid, error = schema(data)
+            return [] if valid else [(path, error)]
+        return validate_call
+    elif schema == '':
+        return lambda data: [(path, "No value")] if data is None else []
+    return lambda data: [] if data == schema else [(path, "No value")]
+
+
+def get_record_columns(records: [dict], default: [str]) -> [str]:
+    '''Get keys of all records in order of their first appearance.'''
+    columns = {}
+    for record in records:
+        columns.update(dict.fromkeys(record))
+    return list(columns) or list(default)
+
+
+def explode_omim_ids(records: [dict], default: [str]) -> ([int], [dict]):
+    '''Create a record for every omim id of the syndromes after replacing
+    deprecated ids. Positions of the original records are returned with the
+    new records.'''
+    omim_ids = OMIM_INST.replace_deprecated_many(
+        [r["omim_id"] for r in records]
+    )
+    positions = []
+    exploded = []
+    for position, (record, ids) in enumerate(zip(records, omim_ids)):
+        for omim_id in ids or default:
+            positions.append(position)
+            exploded.append(dict(record, omim_id=int(omim_id)))
+    return positions, exploded
+
+
+def merge_syndrome_records(
+        suggested: [dict], suggested_columns: [str],
+        selected: [dict], selected_columns: [str]
+) -> ([dict], [str]):
+    '''Outer join of suggested and selected syndrome records on omim id
+    and syndrome name with the row order and column suffixes of
+    pandas.merge. Returns merged records and columns.'''
+    keys = ["omim_id", "syndrome_name"]
+    overlap = set(suggested_columns) & set(selected_columns) - set(keys)
+
+    def suffixed(row, suffix):
+        return {
+            (c + suffix if c in overlap else c): v for c, v in row.items()
+        }
+
+    groups = ({}, {})
+    for records, group in zip((suggested, selected), groups):
+        for record in records:
+            key = (record["omim_id"], record["syndrome_name"])
+            group.setdefault(key, []).append(record)
+    # outer merge sorts the join keys lexicographically
+    merged = []
+    for key in sorted(set(groups[0]) | set(groups[1]),
+                      key=lambda k: (k[0], str(k[1]))):
+        left = [suffixed(r, "_x") for r in groups[0].get(key, [])]
+        right = [suffixed(r, "_y") for r in groups[1].get(key, [])]
+        if left and right:
+            merged += [dict(l, **r) for l in left for r in right]
+        else:
+            merged += left or right
+    columns = [
+        c + "_x" if c in overlap else c for c in suggested_columns
+    ] + [
+        c + "_y" if c in overlap else c for c in selected_columns
+        if c not in keys
+    ]
+    return merged, columns
+
+
+def create_syndrome_table(
+        suggested: [dict], selected: [dict]
+) -> pandas.DataFrame:
+    '''Create a table of suggested syndromes with a row for every omim id
+    and join the selected syndromes marked as confirmed or differential
+    diagnosis. The table is built from the records directly instead of
+    exploding and merging dataframes.
+    '''
+    columns = [
+        c for c in get_record_columns(suggested, SYNDROME_COLUMNS)
+        if c != "omim_id"
+    ] + ["omim_id"]
+    positions, suggested = explode_omim_ids(suggested, [])
+
+    if not selected:
+        # if no syndromes selected, everything is false
+        syndromes_df = pandas.DataFrame(
+            suggested, columns=columns, index=positions
+        )
+        syndromes_df["confirmed"] = False
+        syndromes_df["differential"] = False
+        syndromes_df["omim_id"] = syndromes_df["omim_id"].astype(int)
+        return syndromes_df
+
+    selected_columns = [
+        c for c in get_record_columns(selected, []) if c != "omim_id"
+    ] + ["omim_id", "confirmed", "differential"]
+    _, selected = explode_omim_ids(selected, ["0"])
+    for record in selected:
+        diagnosis = record["diagnosis"]
+        record["confirmed"] = True \
+            if diagnosis in constants.CONFIRMED_DIAGNOSIS else numpy.nan
+        record["differential"] = True \
+            if diagnosis in constants.DIFFERENTIAL_DIAGNOSIS else numpy.nan
+
+    merged, columns = merge_syndrome_records(
+        suggested, columns, selected, selected_columns
+    )
+    for record in merged:
+        # set all entries not present in the selected syndromes to not
+        # confirmed
+        record["confirmed"] = record.get("confirmed") is True
+        # merge has_mask, missing values count as masked like NaN
+        record["has_mask"] = bool(record.pop("has_mask_x", numpy.nan)) \
+            | bool(record.pop("has_mask_y", numpy.nan))
+    columns = [
+        c for c in columns if c not in ("has_mask_x", "has_mask_y")
+    ] + ["has_mask"]
+    syndromes_df = pandas.DataFrame(merged, columns=columns)
+    syndromes_df["differential"] = syndromes_df["differential"].astype(
+        object
+    )
+    return syndromes_df
+
+
+def memoize_check(check: Callable) -> Callable:
+    '''Compute check results of a json only once for every argument.
+    Checks can modify the json data, so that repeated checks would differ.
+    '''
+    signature = inspect.signature(check)
+
+    @wraps(check)
+    def memoized(self, *args, **kwargs):
+        # bind arguments, so that positional and keyword calls share results
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        key = bound.args[1:] + tuple(sorted(bound.kwargs.items()))
+        results = self.__dict__.setdefault("_check_results", {})
+        if key not in results:
+            results[key] = check(*bound.args, **bound.kwargs)
+        return results[key]
+    return memoized
+
 
 def reduce_omim(syndrome_dict: dict, f2g: 'Face2Gene') -> dict:
     '''Check if syndrome dict contains a list of omim ids. If yes, query
@@ -88,6 +283,7 @@ class JsonFile:
             save_path: str = '',
             file_name: str = '',
             corrected_keys: list = [],
+            source_paths: list = [],
     ):
         '''
         Args:
@@ -96,6 +292,7 @@ class JsonFile:
             base_path - base folder of original data
             override - base folder for json overrides. this is necessary for
                 loading of linked jsons
+            source_paths - files the main json has been loaded from
         '''
         self._js = data
         self._load_path = path
@@ -104,6 +301,8 @@ class JsonFile:
         self._save_path = save_path
         self._filename = file_name
         self._corrected_keys = corrected_keys
+        self._source_paths = list(source_paths)
+        self._linked_paths = []
 
     @classmethod
     def from_file(cls, path: str, corrected_location: str = '') -> 'JsonFile':
@@ -121,19 +320,19 @@ class JsonFile:
         # information
         # load a corrected json if it exists and is given
         base, filename = os.path.split(path)
-        basedir, jsondir = os.path.split(base)
+        basedir = os.path.dirname(base)
         override_data = {}
+        source_paths = [path]
         if corrected_location:
-            override = os.path.join(corrected_location, jsondir, filename)
-            if os.path.exists(override):
-                with open(override, "r") as js_file:
-                    override_data = json.load(js_file)
+            override = cls.get_override_path(path, corrected_location)
+            if JSON_INDEX.exists(override):
+                override_data = JSON_INDEX.load(override)
+                source_paths.append(override)
 
-        with open(path, "r") as js_file:
-            json_data = json.load(js_file)
-            if bool(override_data):
-                for key in override_data.keys():
-                    json_data[key] = override_data[key]
+        json_data = JSON_INDEX.load(path)
+        if bool(override_data):
+            for key in override_data.keys():
+                json_data[key] = override_data[key]
 
         LOGGER.debug("Loading json %s", filename)
         # create the parent class
@@ -143,6 +342,7 @@ class JsonFile:
             base_path=basedir,
             override=corrected_location,
             corrected_keys=list(override_data.keys()),
+            source_paths=source_paths,
         )
 
     def save_json(
@@ -160,6 +360,42 @@ class JsonFile:
         with open(file_path, 'w') as output_json:
             json.dump(self._js, output_json)
 
+    def get_load_source(self) -> Union[None, tuple]:
+        '''Get class, path and override directory to load the json again
+        with from_file, or None if it has not been loaded from a file.'''
+        if not self._load_path:
+            return None
+        return type(self), self._load_path, self._override_dir
+
+    def _copy_vcf(self, document: str, processed_dir: str) -> [str]:
+        '''Convert the vcf of the case into the processed directory. The
+        vcf is either given as path or searched by case id in the vcfs
+        directory next to the case jsons.'''
+        case_id = self.get_case_id()
+        catalog = get_vcf_catalog(
+            os.path.join(self._base_dir, "vcfs"), processed_dir
+        )
+        if os.path.exists(document):
+            vcf_path = document
+            LOGGER.info("Case %s, VCF file %s is found.",
+                        case_id, document)
+        else:
+            vcf_path = catalog.find_raw(case_id)
+            if vcf_path is None:
+                LOGGER.info("Case %s, VCF file %s could not be found.",
+                            case_id, document)
+                return []
+        # convert and save vcfs to specified location if not already present
+        destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
+        catalog.copy(vcf_path, destination_vcf)
+
+        return [destination_vcf]
+
+    def get_source_paths(self) -> [str]:
+        '''Get paths of all files the json data has been loaded from,
+        including overrides and linked files.'''
+        return self._source_paths + self._linked_paths
+
     def generate(self):
         '''Get schema of js.'''
         return self._generate_schema(self.raw)
@@ -186,15 +422,21 @@ class JsonFile:
         else:
             return ''
 
+    @classmethod
+    def get_validator(cls) -> Callable[[object], list]:
+        '''Get schema validator compiled once for every json class.'''
+        if cls not in VALIDATORS:
+            VALIDATORS[cls] = compile_schema(cls.schema)
+        return VALIDATORS[cls]
+
     def check(self, false_only=True):
         '''Check schema of current self object and return errors detected.
         '''
-        schema = self.check_schema(self.schema, self.raw)
-        self.error = schema
         if false_only:
-            return self.filter_schema(schema)
+            self.error = self.get_validator()(self._js)
         else:
-            return schema
+            self.error = self.check_schema(self.schema, self._js)
+        return self.error
 
     @classmethod
     def check_schema(cls, schema, data):
@@ -239,20 +481,50 @@ class JsonFile:
             else:
                 return (False, "No value")
 
+    @classmethod
+    def prefetch(
+            cls, paths: [str], corrected_location: str = '', threads: int = 0
+    ):
+        '''Read json files and their overrides in bulk before they are
+        loaded with from_file.'''
+        JSON_INDEX.prefetch(
+            list(paths) + [
+                cls.get_override_path(p, corrected_location) for p in paths
+                if corrected_location
+            ], threads
+        )
+
+    @staticmethod
+    def get_override_path(path: str, corrected_location: str) -> str:
+        base, filename = os.path.split(path)
+        return os.path.join(
+            corrected_location, os.path.basename(base), filename
+        )
+
+    @staticmethod
+    def get_linked_paths(
+            base_dir: str, override_dir: str, directory: str, entry_id
+    ) -> [str]:
+        '''Get candidate paths of a linked json, corrected path first.'''
+        filename = '{}.json'.format(entry_id)
+        paths = [os.path.join(base_dir, directory, filename)]
+        if override_dir:
+            paths.insert(0, os.path.join(override_dir, directory, filename))
+        return paths
+
     def _load_json(self, directory, entry_id, default={}):
         '''Load a json file based on id from specified intermediary directory.
         '''
-        filename = '{}.json'.format(entry_id)
-        entries_path = os.path.join(self._base_dir, directory, filename)
         # override entry path if another corrected path is available
-        if self._override_dir:
-            corrected_path = os.path.join(
-                self._override_dir, directory, filename)
-            if os.path.exists(corrected_path):
-                entries_path = corrected_path
-        if os.path.exists(entries_path):
-            with open(entries_path, "r") as entry_file:
-                json_data = json.load(entry_file)
+        entries_path = next(
+            (p for p in self.get_linked_paths(
+                self._base_dir, self._override_dir, directory, entry_id
+            ) if JSON_INDEX.exists(p)),
+            None
+        )
+        if entries_path is not None:
+            json_data = JSON_INDEX.load(entries_path)
+            self._linked_paths.append(entries_path)
         else:
             LOGGER.warning("File %s in %s not found", entry_id, directory)
             json_data = default
@@ -369,8 +641,8 @@ class OldJson(JsonFile):
             'geneList': case.gene_list,
             'detected_syndromes': case.get_phenomized_list(),
             'genomicData': genomic_data,
-            'genomic_entries': case.data.get_js()['genomic_entries'],
-            'selected_syndromes': case.data.get_js()['selected_syndromes']
+            'genomic_entries': case.get_genomic_entries(),
+            'selected_syndromes': case.get_selected_syndromes()
         }
         obj = cls(data, path, "{}.json".format(case.case_id))
         return obj
@@ -420,6 +692,31 @@ class NewJson(JsonFile):
         # load fields according to directives
         self.load_linked(directive)
 
+    @classmethod
+    def prefetch(
+            cls, paths: [str], corrected_location: str = '', threads: int = 0
+    ):
+        '''Read case jsons and afterwards all linked genomic entries in
+        bulk.'''
+        super().prefetch(paths, corrected_location, threads)
+        entry_paths = []
+        for path in paths:
+            data = JSON_INDEX.peek(path) or {}
+            if corrected_location:
+                override = JSON_INDEX.peek(
+                    cls.get_override_path(path, corrected_location)
+                ) or {}
+                data = dict(data, **override)
+            base_dir = os.path.dirname(os.path.dirname(path))
+            for entry_id in data.get("genomic_entries", []):
+                if isinstance(entry_id, (str, int)):
+                    entry_paths += cls.get_linked_paths(
+                        base_dir, corrected_location, "genomics_entries",
+                        entry_id
+                    )
+        JSON_INDEX.prefetch(entry_paths, threads)
+
+    @memoize_check
     def check(self, convert_failed: bool) -> bool:
         '''Check whether Json fulfills all provided criteria.
         The criteria are:
@@ -472,11 +769,16 @@ class NewJson(JsonFile):
     def get_genomic_entries(self) -> list:
         return self._js["genomic_entries"]
 
-    def get_variants(self) -> ['HGVSModel']:
-        '''Get a list of hgvs objects for variants.
+    def get_variant_entries(self) -> [dict]:
+        '''Genomic entries, which are parsed into hgvs models.'''
+        return self._js['genomic_entries']
+
+    def get_variants(self, check_syntax: bool = True) -> ['HGVSModel']:
+        '''Get a list of hgvs objects for variants. The mutalyzer syntax
+        check can be deferred to check many models at once.
         '''
-        models = [HGVSModel(entry)
-                  for entry in self._js['genomic_entries']]
+        models = [HGVSModel(entry, check_syntax)
+                  for entry in self.get_variant_entries()]
         return models
 
     def get_syndrome_suggestions_and_diagnosis(self) -> pandas.DataFrame:
@@ -484,83 +786,9 @@ class NewJson(JsonFile):
         selected syndroms, which is joined on the table with the confirmed
         column marking the specific entry.
         '''
-        # create a dataframe from the list of detected syndromes
-        if self._js["detected_syndromes"]:
-            syndromes_df = pandas.DataFrame.from_dict(
-                self._js['detected_syndromes']
-            )
-        else:
-            syndromes_df = pandas.DataFrame(
-                columns=[
-                    "omim_id", "gestalt_score", "combined_score",
-                    "feature_score", "has_mask", "syndrome_name"
-                ]
-            )
-
-        # force omim_id to always be a list, required for exploding the df
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].apply(
-            OMIM_INST.replace_deprecated_all
+        return create_syndrome_table(
+            self._js["detected_syndromes"], self._js["selected_syndromes"]
         )
-        # turn omim_list into multiple rows with other properties duplicated
-        syndromes_df = explode_df_column(syndromes_df, 'omim_id')
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-
-        # preprare the confirmed diagnosis for joining with the main syndrome
-        # dataframe
-        if self._js['selected_syndromes']:
-            selected_syndromes = [
-                dict(
-                    s,
-                    omim_id=OMIM_INST.replace_deprecated_all(s["omim_id"])
-                    or ["0"]
-                )
-                for s in self._js["selected_syndromes"]
-            ]
-
-            selected = pandas.DataFrame.from_dict(selected_syndromes)
-            syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-
-            # create multiple rows from list of omim_id entries duplicating
-            # other information
-            selected = explode_df_column(selected, 'omim_id')
-            selected['omim_id'] = selected['omim_id'].astype(int)
-            # add a confirmed diagnosis column
-            selected.loc[
-                selected["diagnosis"].isin(
-                    constants.CONFIRMED_DIAGNOSIS
-                ), 'confirmed'
-            ] = True
-            selected.loc[
-                selected["diagnosis"].isin(
-                    constants.DIFFERENTIAL_DIAGNOSIS
-                ), 'differential'
-            ] = True
-
-            # outer join of the syndrome and the confirmed diagnosis
-            # pandas.merge has to be used instead of join, because the latter
-            # only joins on indices
-            syndromes_df = syndromes_df.merge(
-                selected, on=['omim_id', 'syndrome_name'], how='outer')
-            # set all entries not present in the selected syndromes to not
-            # confirmed
-            syndromes_df = syndromes_df.fillna({'confirmed': False})
-            # merge has_mask
-            syndromes_df["has_mask"] = \
-                syndromes_df["has_mask_x"].astype(bool) \
-                | syndromes_df["has_mask_y"].astype(bool)
-            syndromes_df.drop(
-                ["has_mask_x", "has_mask_y"], inplace=True, axis=1
-            )
-            # reset index for continous indexing after the join and explode
-            # operations
-            syndromes_df = syndromes_df.reset_index(drop=True)
-        else:
-            # if no syndromes selected, everything is false
-            syndromes_df["confirmed"] = False
-            syndromes_df["differential"] = False
-
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-        return syndromes_df
 
     def get_features(self) -> [str]:
         '''Return a list of HPO IDs correponding to entered phenotypic
@@ -597,31 +825,7 @@ class NewJson(JsonFile):
             # return empty if no vcfs present
             if not vcfs:
                 return []
-        case_id = self.get_case_id()
-        if os.path.exists(vcfs[0]):
-            vcf_path = vcfs[0]
-            LOGGER.info("Case %s, VCF file %s is found.",
-                        case_id, vcfs[0])
-            destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
-        else:
-            vcf_dir = os.path.join(self._base_dir, "vcfs")
-            raw_vcfs = list(os.listdir(vcf_dir))
-
-            # convert and save vcfs to specified location if not already present
-            processed_vcfs = [f.strip(".vcf.gz")
-                              for f in os.listdir(processed_dir)]
-            destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
-
-            case_vcfs = [v for v in raw_vcfs if case_id in v]
-            if not case_vcfs:
-                LOGGER.info("Case %s, VCF file %s could not be found.",
-                            case_id, vcfs[0])
-                return []
-            vcf = case_vcfs[0]
-            vcf_path = os.path.join(vcf_dir, vcf)
-        move_vcf(vcf_path, destination_vcf)
-
-        return [destination_vcf]
+        return self._copy_vcf(vcfs[0], processed_dir)
 
     def get_detected_syndromes(self) -> [dict]:
         '''Unaltered list of detected syndromes.
@@ -687,6 +891,7 @@ class LabJson(JsonFile):
         # load fields according to directives
         self.load_linked(directive)
 
+    @memoize_check
     def check(self, convert_failed: bool) -> bool:
         '''Check whether Json fulfills all provided criteria.
         The criteria are:
@@ -753,14 +958,19 @@ class LabJson(JsonFile):
         else:
             return []
 
-    def get_variants(self) -> ['HGVSModel']:
-        '''Get a list of hgvs objects for variants.
-        '''
+    def get_variant_entries(self) -> [dict]:
+        '''Genomic entries with variants, which are parsed into hgvs
+        models.'''
         if 'genomic_entries' in self._js['case_data']:
-            models = [HGVSModel(entry)
-                      for entry in self._js['case_data']['genomic_entries'] if 'variants' in entry]
-        else:
-            models = []
+            return [entry for entry in self._js['case_data']['genomic_entries'] if 'variants' in entry]
+        return []
+
+    def get_variants(self, check_syntax: bool = True) -> ['HGVSModel']:
+        '''Get a list of hgvs objects for variants. The mutalyzer syntax
+        check can be deferred to check many models at once.
+        '''
+        models = [HGVSModel(entry, check_syntax)
+                  for entry in self.get_variant_entries()]
         return models
 
     def convert_lab_syndrome(self, syndrome):
@@ -797,83 +1007,15 @@ class LabJson(JsonFile):
         selected syndroms, which is joined on the table with the confirmed
         column marking the specific entry.
         '''
-        # create a dataframe from the list of detected syndromes
-        if self._js["case_data"]["suggested_syndromes"]:
-            syndromes_df = pandas.DataFrame.from_dict(
-                self.convert_lab_suggested_syndrome(self._js["case_data"]['suggested_syndromes'])
+        case_data = self._js["case_data"]
+        return create_syndrome_table(
+            self.convert_lab_suggested_syndrome(
+                case_data["suggested_syndromes"]
+            ),
+            self.convert_lab_selected_syndrome(
+                case_data["selected_syndromes"]
             )
-        else:
-            syndromes_df = pandas.DataFrame(
-                columns=[
-                    "omim_id", "gestalt_score", "combined_score",
-                    "feature_score", "has_mask", "syndrome_name"
-                ]
-            )
-
-        # force omim_id to always be a list, required for exploding the df
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].apply(
-            OMIM_INST.replace_deprecated_all
         )
-        # turn omim_list into multiple rows with other properties duplicated
-        syndromes_df = explode_df_column(syndromes_df, 'omim_id')
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-
-        # preprare the confirmed diagnosis for joining with the main syndrome
-        # dataframe
-        if self._js['case_data']['selected_syndromes']:
-            selected_syndromes = [
-                dict(
-                    s,
-                    omim_id=OMIM_INST.replace_deprecated_all(s["omim_id"])
-                    or ["0"]
-                )
-                for s in self.convert_lab_selected_syndrome(self._js["case_data"]["selected_syndromes"])
-            ]
-
-            selected = pandas.DataFrame.from_dict(selected_syndromes)
-            syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-
-            # create multiple rows from list of omim_id entries duplicating
-            # other information
-            selected = explode_df_column(selected, 'omim_id')
-            selected['omim_id'] = selected['omim_id'].astype(int)
-            # add a confirmed diagnosis column
-            selected.loc[
-                selected["diagnosis"].isin(
-                    constants.CONFIRMED_DIAGNOSIS
-                ), 'confirmed'
-            ] = True
-            selected.loc[
-                selected["diagnosis"].isin(
-                    constants.DIFFERENTIAL_DIAGNOSIS
-                ), 'differential'
-            ] = True
-
-            # outer join of the syndrome and the confirmed diagnosis
-            # pandas.merge has to be used instead of join, because the latter
-            # only joins on indices
-            syndromes_df = syndromes_df.merge(
-                selected, on=['omim_id', 'syndrome_name'], how='outer')
-            # set all entries not present in the selected syndromes to not
-            # confirmed
-            syndromes_df = syndromes_df.fillna({'confirmed': False})
-            # merge has_mask
-            syndromes_df["has_mask"] = \
-                syndromes_df["has_mask_x"].astype(bool) \
-                | syndromes_df["has_mask_y"].astype(bool)
-            syndromes_df.drop(
-                ["has_mask_x", "has_mask_y"], inplace=True, axis=1
-            )
-            # reset index for continous indexing after the join and explode
-            # operations
-            syndromes_df = syndromes_df.reset_index(drop=True)
-        else:
-            # if no syndromes selected, everything is false
-            syndromes_df["confirmed"] = False
-            syndromes_df["differential"] = False
-
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-        return syndromes_df
 
     def convert_lab_feature(self, features):
         converted = []
@@ -920,31 +1062,7 @@ class LabJson(JsonFile):
             if not vcfs:
                 return []
 
-        case_id = self.get_case_id()
-        if os.path.exists(vcfs[0]):
-            vcf_path = vcfs[0]
-            LOGGER.info("Case %s, VCF file %s is found.",
-                        case_id, vcfs[0])
-            destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
-        else:
-            vcf_dir = os.path.join(self._base_dir, "vcfs")
-            raw_vcfs = list(os.listdir(vcf_dir))
-
-            # convert and save vcfs to specified location if not already present
-            processed_vcfs = [f.strip(".vcf.gz")
-                              for f in os.listdir(processed_dir)]
-            destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
-
-            case_vcfs = [v for v in raw_vcfs if case_id in v]
-            if not case_vcfs:
-                LOGGER.info("Case %s, VCF file %s could not be found.",
-                            case_id, vcfs[0])
-                return []
-            vcf = case_vcfs[0]
-            vcf_path = os.path.join(vcf_dir, vcf)
-        move_vcf(vcf_path, destination_vcf)
-
-        return [destination_vcf]
+        return self._copy_vcf(vcfs[0], processed_dir)
 
     def get_detected_syndromes(self) -> [dict]:
         '''Unaltered list of detected syndromes.
@@ -1025,6 +1143,7 @@ class PhenobotJson(JsonFile):
         # load fields according to directives
         self.load_linked(directive)
 
+    @memoize_check
     def check(self, convert_failed: bool) -> bool:
         '''Check whether Json fulfills all provided criteria.
         The criteria are:
@@ -1091,14 +1210,19 @@ class PhenobotJson(JsonFile):
         else:
             return []
 
-    def get_variants(self) -> ['HGVSModel']:
-        '''Get a list of hgvs objects for variants.
-        '''
+    def get_variant_entries(self) -> [dict]:
+        '''Genomic entries with variants, which are parsed into hgvs
+        models.'''
         if 'genomic_entries' in self._js:
-            models = [HGVSModel(entry)
-                      for entry in self._js['genomic_entries'] if 'variants' in entry]
-        else:
-            models = []
+            return [entry for entry in self._js['genomic_entries'] if 'variants' in entry]
+        return []
+
+    def get_variants(self, check_syntax: bool = True) -> ['HGVSModel']:
+        '''Get a list of hgvs objects for variants. The mutalyzer syntax
+        check can be deferred to check many models at once.
+        '''
+        models = [HGVSModel(entry, check_syntax)
+                  for entry in self.get_variant_entries()]
         return models
 
     def convert_lab_syndrome(self, syndrome):
@@ -1134,83 +1258,14 @@ class PhenobotJson(JsonFile):
         selected syndroms, which is joined on the table with the confirmed
         column marking the specific entry.
         '''
-        # create a dataframe from the list of detected syndromes
-        if self._js["suggested"]["syndromes"]:
-            syndromes_df = pandas.DataFrame.from_dict(
-                self.convert_lab_suggested_syndrome(self._js['suggested']['syndromes'])
-            )
-        else:
-            syndromes_df = pandas.DataFrame(
-                columns=[
-                    "omim_id", "gestalt_score", "combined_score",
-                    "feature_score", "has_mask", "syndrome_name"
-                ]
+        return create_syndrome_table(
+            self.convert_lab_suggested_syndrome(
+                self._js["suggested"]["syndromes"]
+            ),
+            self.convert_lab_selected_syndrome(
+                self._js["user_selected"]["syndromes"]
             )
-
-        # force omim_id to always be a list, required for exploding the df
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].apply(
-            OMIM_INST.replace_deprecated_all
         )
-        # turn omim_list into multiple rows with other properties duplicated
-        syndromes_df = explode_df_column(syndromes_df, 'omim_id')
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-
-        # preprare the confirmed diagnosis for joining with the main syndrome
-        # dataframe
-        if self._js['user_selected']['syndromes']:
-            selected_syndromes = [
-                dict(
-                    s,
-                    omim_id=OMIM_INST.replace_deprecated_all(s["omim_id"])
-                    or ["0"]
-                )
-                for s in self.convert_lab_selected_syndrome(self._js["user_selected"]["syndromes"])
-            ]
-
-            selected = pandas.DataFrame.from_dict(selected_syndromes)
-            syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-
-            # create multiple rows from list of omim_id entries duplicating
-            # other information
-            selected = explode_df_column(selected, 'omim_id')
-            selected['omim_id'] = selected['omim_id'].astype(int)
-            # add a confirmed diagnosis column
-            selected.loc[
-                selected["diagnosis"].isin(
-                    constants.CONFIRMED_DIAGNOSIS
-                ), 'confirmed'
-            ] = True
-            selected.loc[
-                selected["diagnosis"].isin(
-                    constants.DIFFERENTIAL_DIAGNOSIS
-                ), 'differential'
-            ] = True
-
-            # outer join of the syndrome and the confirmed diagnosis
-            # pandas.merge has to be used instead of join, because the latter
-            # only joins on indices
-            syndromes_df = syndromes_df.merge(
-                selected, on=['omim_id', 'syndrome_name'], how='outer')
-            # set all entries not present in the selected syndromes to not
-            # confirmed
-            syndromes_df = syndromes_df.fillna({'confirmed': False})
-            # merge has_mask
-            syndromes_df["has_mask"] = \
-                syndromes_df["has_mask_x"].astype(bool) \
-                | syndromes_df["has_mask_y"].astype(bool)
-            syndromes_df.drop(
-                ["has_mask_x", "has_mask_y"], inplace=True, axis=1
-            )
-            # reset index for continous indexing after the join and explode
-            # operations
-            syndromes_df = syndromes_df.reset_index(drop=True)
-        else:
-            # if no syndromes selected, everything is false
-            syndromes_df["confirmed"] = False
-            syndromes_df["differential"] = False
-
-        syndromes_df['omim_id'] = syndromes_df['omim_id'].astype(int)
-        return syndromes_df
 
     def convert_lab_feature(self, features):
         accept_converted = []
@@ -1259,31 +1314,7 @@ class PhenobotJson(JsonFile):
             if not vcfs:
                 return []
 
-        case_id = self.get_case_id()
-        if os.path.exists(vcfs[0]):
-            vcf_path = vcfs[0]
-            LOGGER.info("Case %s, VCF file %s is found.",
-                        case_id, vcfs[0])
-            destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
-        else:
-            vcf_dir = os.path.join(self._base_dir, "vcfs")
-            raw_vcfs = list(os.listdir(vcf_dir))
-
-            # convert and save vcfs to specified location if not already present
-            processed_vcfs = [f.strip(".vcf.gz")
-                              for f in os.listdir(processed_dir)]
-            destination_vcf = os.path.join(processed_dir, case_id + ".vcf.gz")
-
-            case_vcfs = [v for v in raw_vcfs if case_id in v]
-            if not case_vcfs:
-                LOGGER.info("Case %s, VCF file %s could not be found.",
-                            case_id, vcfs[0])
-                return []
-            vcf = case_vcfs[0]
-            vcf_path = os.path.join(vcf_dir, vcf)
-        move_vcf(vcf_path, destination_vcf)
-
-        return [destination_vcf]
+        return self._copy_vcf(vcfs[0], processed_dir)
 
     def get_detected_syndromes(self) -> [dict]:
         '''Unaltered list of detected syndromes.
@@ -1,8 +1,16 @@
+import os
+import gzip
 import pickle
+import logging
 
 from lib.model.config import PEDIAConfig
 
 
+LOGGER = logging.getLogger(__name__)
+
+CHECKPOINT_SUFFIX = ".p.gz"
+
+
 class CasePickler(pickle.Pickler):
 
     def persistent_id(self, obj):
@@ -26,3 +34,78 @@ class CaseUnpickler(pickle.Unpickler):
             return self.configs[key_id]
         else:
             raise pickle.UnpicklingError("unsupported persistent object")
+
+
+class CheckpointStore:
+    '''Save intermediate results as one compressed pickle per case and stage.
+    Records are saved in <path>/<stage>/<case_id>.p.gz, so single cases can
+    be loaded and saved without touching the rest of the cohort.
+    '''
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _stage_dir(self, stage: str) -> str:
+        return os.path.join(self.path, stage)
+
+    def _record_path(self, stage: str, case_id: str) -> str:
+        return os.path.join(
+            self._stage_dir(stage), str(case_id) + CHECKPOINT_SUFFIX
+        )
+
+    def __contains__(self, key: (str, str)) -> bool:
+        stage, case_id = key
+        return os.path.exists(self._record_path(stage, case_id))
+
+    def save(self, stage: str, case_id: str, obj) -> None:
+        '''Save a single record. The record is written to a temporary file
+        first, so that interrupted writes do not leave broken records.'''
+        os.makedirs(self._stage_dir(stage), exist_ok=True)
+        record_path = self._record_path(stage, case_id)
+        tmp_path = record_path + ".tmp"
+        with gzip.open(tmp_path, "wb") as pfile:
+            CasePickler(pfile).dump(obj)
+        os.replace(tmp_path, record_path)
+
+    def save_all(self, stage: str, records: [(str, object)]) -> None:
+        '''Save list of case id and object tuples.'''
+        for case_id, obj in records:
+            self.save(stage, case_id, obj)
+
+    def load_record(self, stage: str, case_id: str):
+        '''Load a single record.'''
+        with gzip.open(self._record_path(stage, case_id), "rb") as pfile:
+            return CaseUnpickler(pfile).load()
+
+    def case_ids(self, stage: str) -> [str]:
+        '''Get ids of all cases with records in the stage.'''
+        stage_dir = self._stage_dir(stage)
+        if not os.path.exists(stage_dir):
+            return []
+        return [
+            f[:-len(CHECKPOINT_SUFFIX)] for f in os.listdir(stage_dir)
+            if f.endswith(CHECKPOINT_SUFFIX)
+        ]
+
+    def iter_records(self, stage: str, case_ids: [str] = None):
+        '''Lazily load records of the stage, optionally only for the given
+        case ids. Unreadable records are skipped.'''
+        if case_ids is None:
+            case_ids = self.case_ids(stage)
+        for case_id in case_ids:
+            if (stage, case_id) not in self:
+                LOGGER.warning(
+                    "No %s checkpoint for case %s", stage, case_id
+                )
+                continue
+            try:
+                yield self.load_record(stage, case_id)
+            except (EOFError, OSError, pickle.UnpicklingError) as error:
+                LOGGER.warning(
+                    "Checkpoint %s of case %s unreadable: %s",
+                    stage, case_id, error
+                )
+
+    def load(self, stage: str, case_ids: [str] = None) -> list:
+        '''Load records of the stage into a list.'''
+        return list(self.iter_records(stage, case_ids))
@@ -0,0 +1,242 @@
+'''
+Profiling of preprocessing runs.
+---
+Records wall and cpu time of pipeline stages and single cases, as well as
+call counts, cache hits and latency histograms of external services.
+
+Profiling is disabled by default and has to be enabled with
+PROFILER.enable(). Calls of external services are only recorded after
+instrument_services has been called.
+'''
+import os
+import json
+import time
+import resource
+import collections
+from functools import wraps
+from contextlib import contextmanager
+
+
+# upper bounds of latency histogram buckets in milliseconds
+LATENCY_BUCKETS = [1, 5, 10, 50, 100, 500, 1000, 5000, 10000]
+
+
+def get_case_id(item) -> str:
+    '''Get case id of mapped items, which are either cases or tuples
+    ending with a case or a case id.'''
+    if isinstance(item, tuple):
+        item = item[-1]
+        if isinstance(item, str):
+            return item
+    case_id = getattr(item, "case_id", None)
+    if case_id is None and hasattr(item, "get_case_id"):
+        case_id = item.get_case_id()
+    return case_id
+
+
+def empty_service_stats() -> dict:
+    return {
+        "calls": 0,
+        "errors": 0,
+        "total_time": 0.0,
+        "requests": 0,
+        "cache_hits": 0,
+        "latency_ms": {str(b): 0 for b in LATENCY_BUCKETS + ["inf"]},
+    }
+
+
+def latency_bucket(seconds: float) -> str:
+    '''Get histogram bucket label for a latency.'''
+    millis = seconds * 1000
+    for bound in LATENCY_BUCKETS:
+        if millis <= bound:
+            return str(bound)
+    return "inf"
+
+
+class Profiler:
+    '''Collect timing information of stages, cases and external services.'''
+
+    def __init__(self):
+        self.enabled = False
+        self.stages = collections.OrderedDict()
+        self.cases = collections.defaultdict(dict)
+        self.services = collections.defaultdict(empty_service_stats)
+
+    def enable(self):
+        self.enabled = True
+
+    @contextmanager
+    def stage(self, name: str):
+        '''Record wall and cpu time of a stage. Cpu time of terminated worker
+        processes is recorded separately.'''
+        if not self.enabled:
+            yield
+            return
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        try:
+            yield
+        finally:
+            children_end = resource.getrusage(resource.RUSAGE_CHILDREN)
+            stats = self.stages.setdefault(
+                name,
+                {"calls": 0, "wall": 0.0, "cpu": 0.0, "children_cpu": 0.0}
+            )
+            stats["calls"] += 1
+            stats["wall"] += time.perf_counter() - wall
+            stats["cpu"] += time.process_time() - cpu
+            stats["children_cpu"] += (
+                children_end.ru_utime + children_end.ru_stime
+                - children.ru_utime - children.ru_stime
+            )
+
+    def add_case_time(self, case_id: str, label: str, seconds: float):
+        '''Add time spent on a single case in the given step.'''
+        if case_id is None:
+            return
+        case_id = str(case_id)
+        self.cases[case_id][label] = \
+            self.cases[case_id].get(label, 0.0) + seconds
+
+    def add_service_call(
+            self, service: str, seconds: float, error: bool = False
+    ):
+        stats = self.services[service]
+        stats["calls"] += 1
+        stats["errors"] += int(error)
+        stats["total_time"] += seconds
+        stats["latency_ms"][latency_bucket(seconds)] += 1
+
+    def add_service_request(self, service: str, from_cache: bool):
+        stats = self.services[service]
+        stats["requests"] += 1
+        stats["cache_hits"] += int(from_cache)
+
+    def pop_services(self) -> dict:
+        '''Get and reset service statistics. Used to transfer statistics
+        from worker processes.'''
+        services = dict(self.services)
+        self.services = collections.defaultdict(empty_service_stats)
+        return services
+
+    def merge_services(self, services: dict):
+        '''Add service statistics collected in another process.'''
+        for service, stats in services.items():
+            own = self.services[service]
+            for key, value in stats.items():
+                if key == "latency_ms":
+                    for bucket, count in value.items():
+                        own[key][bucket] += count
+                else:
+                    own[key] += value
+
+    def timed_call(self, label: str, func, item, *args, **kwargs):
+        '''Call function on a single mapped item and record the time spent
+        on its case.'''
+        start = time.perf_counter()
+        result = func(item, *args, **kwargs)
+        self.add_case_time(
+            get_case_id(item), label, time.perf_counter() - start
+        )
+        return result
+
+    def report(self) -> dict:
+        return {
+            "stages": self.stages,
+            "cases": self.cases,
+            "services": self.services,
+        }
+
+    def save(self, path: str):
+        '''Save profiling report as json file.'''
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, "w") as report_file:
+            json.dump(self.report(), report_file, indent=4)
+
+
+PROFILER = Profiler()
+
+
+def profile_stage(func):
+    '''Record time spent in a pipeline stage under the function name.'''
+    @wraps(func)
+    def stage_wrapper(*args, **kwargs):
+        with PROFILER.stage(func.__name__):
+            return func(*args, **kwargs)
+    return stage_wrapper
+
+
+def timed_worker(label, map_func, *args, **kwargs):
+    '''Call map function in a worker process and return the result together
+    with the time spent and service statistics of the worker. The mapped item
+    is the last positional argument.'''
+    PROFILER.pop_services()
+    start = time.perf_counter()
+    result = map_func(*args, **kwargs)
+    return (
+        result, get_case_id(args[-1]), time.perf_counter() - start,
+        PROFILER.pop_services()
+    )
+
+
+def instrument_method(obj, method_name: str, service: str):
+    '''Replace a method on the object with a wrapper recording call
+    statistics of the service.'''
+    method = getattr(obj, method_name)
+
+    @wraps(method)
+    def instrumented(*args, **kwargs):
+        start = time.perf_counter()
+        error = True
+        try:
+            result = method(*args, **kwargs)
+            error = False
+            return result
+        finally:
+            PROFILER.add_service_call(
+                service, time.perf_counter() - start, error
+            )
+    setattr(obj, method_name, instrumented)
+
+
+def instrument_session(session, service: str):
+    '''Count http requests and cache hits of a requests session.'''
+    send = session.send
+
+    @wraps(send)
+    def instrumented_send(*args, **kwargs):
+        response = send(*args, **kwargs)
+        PROFILER.add_service_request(
+            service, getattr(response, "from_cache", False)
+        )
+        return response
+    session.send = instrumented_send
+
+
+def instrument_services():
+    '''Record calls of the mutalyzer, phenomizer and jannovar services.'''
+    from lib import vcf_jannovar
+    from lib.global_singletons import (
+        MUTALYZER_INST, PHENOMIZER_INST, JANNOVAR_INST, HGVS_SYNTAX_INST
+    )
+    # the mutalyzer client needs the service, which is not used with the
+    # local syntax check
+    if HGVS_SYNTAX_INST.backend == "mutalyzer":
+        for method in [
+                "check_syntax", "check_syntax_many",
+                "get_db_snp_descriptions", "batch_position_convert"
+        ]:
+            instrument_method(MUTALYZER_INST, method, "mutalyzer")
+        instrument_session(MUTALYZER_INST.session, "mutalyzer")
+
+    for method in ["disease_boqa_phenomize", "prefetch"]:
+        instrument_method(PHENOMIZER_INST, method, "phenomizer")
+    instrument_session(PHENOMIZER_INST, "phenomizer")
+
+    for method in ["create_vcf", "create_vcfs"]:
+        instrument_method(JANNOVAR_INST, method, "jannovar")
+        instrument_method(vcf_jannovar, method, "jannovar_java")
@@ -12,6 +12,135 @@ import shutil
 from lib.visual import progress_bar
 
 
+# sections of the quality check log created from case objects
+QC_SECTIONS = [
+    "failed",
+    "benign_excluded",
+    "pathogenic_missing",
+    "vcf_failed",
+    "multi_no_omim",
+    "passed",
+]
+
+
+def case_qc_entries(qc_result: tuple, case_obj: "Case") -> dict:
+    '''Get the quality check log entries of a single case by section.
+    Only sections the case is listed in are returned.
+    '''
+    return case_entries_from_log(
+        qc_case_sections([(qc_result, case_obj)]), case_obj.case_id
+    )
+
+
+def qc_case_sections(qc_cases: [(tuple, "Case")]) -> dict:
+    '''Get the case sections of the quality check log for all cases.
+
+    Checks run on tables of all cases at once:
+        failed - cases failing the case check
+        multi_no_omim - cases with multiple diagnosis, one without omim id
+        vcf_failed - passing cases without a valid simulated vcf
+        benign_excluded - number of variants marked as normal in passing
+        cases
+        pathogenic_missing - passing cases with a pathogenic gene missing in
+        the gene list
+        passed - cases passing all checks above
+    '''
+    # avoid loading pandas for the quality check log functions
+    from lib.model.case_batch import CaseBatch, split_records
+
+    batch = CaseBatch(case_obj for _, case_obj in qc_cases)
+
+    # Cases failing qc altogether
+    failed = {
+        case_obj.case_id: (valid, issues)
+        for (valid, issues), case_obj in qc_cases if not valid
+    }
+
+    # cases with multiple diagnosis
+    diagnosis = batch.get_diagnosis_table()
+    counts = diagnosis.groupby("case_id").size()
+    multi_ids = set(counts.index[counts > 1]) & set(
+        diagnosis.loc[diagnosis["omim_id"] == 0, "case_id"]
+    )
+    multi_diagnosis = split_records(
+        diagnosis.loc[diagnosis["case_id"].isin(multi_ids)]
+    )
+    multi_no_omim = {
+        case_obj.case_id: multi_diagnosis[case_obj.case_id]
+        for case_obj in batch.cases if case_obj.case_id in multi_ids
+    }
+
+    # cases have to pass vcf check
+    passed = [
+        case_obj for (valid, _), case_obj in qc_cases if valid
+    ]
+    vcf_results = [(case_obj, case_obj.check_vcf()) for case_obj in passed]
+    vcf_failed = {
+        case_obj.case_id: result
+        for case_obj, result in vcf_results if not result[0]
+    }
+    passed = CaseBatch(
+        case_obj for case_obj, result in vcf_results if result[0]
+    )
+
+    # Cases with mutations marked as benign excluded from analysis
+    variants = passed.get_variant_table()
+    benign = variants.loc[variants["benign"]].groupby("case_id")[
+        "variants"
+    ].sum()
+    benign_excluded = {
+        case_obj.case_id: int(benign[case_obj.case_id])
+        for case_obj in passed.cases
+        if benign.get(case_obj.case_id, 0) > 0
+    }
+
+    # Cases where pathogenic diagnosed mutation is not in geneList
+    genes = passed.get_gene_table().drop_duplicates()
+    variants = variants.merge(
+        genes, how="left", on=["case_id", "gene_id"], indicator=True
+    )
+    pathogenic = {}
+    for case_id, gene_id, in_list in zip(
+            variants["case_id"], variants["gene_id"],
+            variants["_merge"] == "both"
+    ):
+        pathogenic.setdefault(case_id, []).append((bool(in_list), gene_id))
+    # cases without variants have no missing gene
+    pathogenic_missing = {
+        case_obj.case_id: pathogenic[case_obj.case_id]
+        for case_obj in passed.cases
+        if not all(
+            in_list for in_list, _ in pathogenic.get(case_obj.case_id, [])
+        )
+    }
+
+    return {
+        "failed": failed,
+        "benign_excluded": benign_excluded,
+        "pathogenic_missing": pathogenic_missing,
+        "vcf_failed": vcf_failed,
+        "multi_no_omim": multi_no_omim,
+        "passed": {case_obj.case_id: '' for case_obj in passed.cases},
+    }
+
+
+def add_qc_entries(qc_output: dict, case_id: str, entries: dict) -> dict:
+    '''Add entries of a single case to the quality check log sections.'''
+    for section, data in entries.items():
+        qc_output.setdefault(section, {})[case_id] = data
+    return qc_output
+
+
+def case_entries_from_log(qc_output: dict, case_id: str) -> dict:
+    '''Get entries of a single case from the case sections of the quality
+    check log.'''
+    return {
+        section: qc_output[section][case_id]
+        for section in QC_SECTIONS
+        if case_id in qc_output.get(section, {})
+    }
+
+
 def read_json(path: str):
     '''Read a json file.'''
     with open(path) as jsfile:
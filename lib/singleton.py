@@ -1,6 +1,7 @@
 '''
 Enable argumentless instantation and lazy configuration of API objects.
 '''
+import importlib
 from functools import wraps
 from types import FunctionType
 
@@ -50,3 +51,63 @@ class LazyConfigure:
         setattr(instance, "__dict__", inst_dict)
 
         return instance
+
+
+class LazyInstance:
+    '''Proxy creating the instance of a class on first usage. The module of
+    the class is only imported at this point, so that heavy dependencies are
+    not loaded for programs never using the instance.
+
+    Attribute access, item access and membership tests are forwarded to the
+    instance.
+    '''
+
+    def __init__(self, module_name: str, class_name: str):
+        object.__setattr__(self, "_module_name", module_name)
+        object.__setattr__(self, "_class_name", class_name)
+        object.__setattr__(self, "_instance", None)
+
+    def _get_instance(self):
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            module = importlib.import_module(
+                object.__getattribute__(self, "_module_name")
+            )
+            instance = getattr(
+                module, object.__getattribute__(self, "_class_name")
+            )()
+            object.__setattr__(self, "_instance", instance)
+        return instance
+
+    def __getattr__(self, name):
+        # internal and special attributes are not forwarded, eg during
+        # unpickling before the proxy attributes have been restored
+        if name.startswith("__") or name in (
+                "_module_name", "_class_name", "_instance"
+        ):
+            raise AttributeError(name)
+        return getattr(self._get_instance(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._get_instance(), name, value)
+
+    def __getitem__(self, key):
+        return self._get_instance()[key]
+
+    def __setitem__(self, key, value):
+        self._get_instance()[key] = value
+
+    def __contains__(self, key):
+        return key in self._get_instance()
+
+    def __repr__(self):
+        return "<LazyInstance {}.{}>".format(
+            object.__getattribute__(self, "_module_name"),
+            object.__getattribute__(self, "_class_name"),
+        )
+
+
+def load_instance(lazy: LazyInstance):
+    '''Create the instance of a lazy proxy if it does not exist yet. Used to
+    create instances before forking worker processes.'''
+    return lazy._get_instance()
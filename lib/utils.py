@@ -6,6 +6,7 @@ some pandas dataframe utilities implementing more exotic functions
 import os
 import json
 import re
+import pickle
 import hashlib
 from typing import Union
 
@@ -98,3 +99,43 @@ def load_json(
         data = default
 
     return data
+
+
+class SlotState:
+    '''Versioned pickle state of classes using __slots__.
+
+    The state is a dict of all set slots and the format version. States of
+    plain objects pickled before the change to __slots__ have no version and
+    are loaded as version 0, renaming fields given in legacy_fields.
+    States of newer versions can not be loaded.
+    '''
+    __slots__ = ()
+
+    format_version = 1
+
+    # renamed fields of version 0 states
+    legacy_fields = {}
+
+    def __getstate__(self) -> dict:
+        state = {
+            slot: getattr(self, slot)
+            for slot in self.__slots__ if hasattr(self, slot)
+        }
+        state["format_version"] = self.format_version
+        return state
+
+    def __setstate__(self, state: dict):
+        state = dict(state)
+        version = state.pop("format_version", 0)
+        if version > self.format_version:
+            raise pickle.UnpicklingError(
+                "{} format version {} is newer than {}".format(
+                    type(self).__name__, version, self.format_version
+                )
+            )
+        if version == 0:
+            for old, new in self.legacy_fields.items():
+                if old in state:
+                    state[new] = state.pop(old)
+        for slot in self.__slots__:
+            setattr(self, slot, state.get(slot))
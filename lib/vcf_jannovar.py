@@ -7,6 +7,7 @@ import csv
 import typing
 import io
 import re
+import logging
 
 import tempfile
 import pandas
@@ -14,6 +15,9 @@ import pandas
 from lib import vcf_operations
 
 
+LOGGER = logging.getLogger(__name__)
+
+
 JANNOVAR_BINARY = "data/jannovar/jannovar_0.25/jannovar-cli-0.25-SNAPSHOT.jar"
 
 REFSEQ_SER = "data/jannovar/jannovar_0.25/data/hg19_refseq.ser"
@@ -58,18 +62,24 @@ VCF_HEADER = (
 )
 
 
-def jannovar_vcf_to_table(
-        readable,
+def read_jannovar_vcf(readable) -> pandas.DataFrame:
+    '''Read jannovar generated vcf file with a single sample column.'''
+    hgvs_data = pandas.read_table(
+        readable, sep='\t', comment='#', names=HGVS_COLS + ["SAMPLE"]
+    )
+    hgvs_data["ALT"] = hgvs_data["ALT"].fillna("NA")
+    return hgvs_data
+
+
+def format_case_table(
+        hgvs_data: pandas.DataFrame,
         case_id: str,
         zygosity: str,
         variants: [str],
 ) -> typing.Union[str, pandas.DataFrame]:
-    '''Create pandas dataframe from readable jannovar generated vcf file.'''
-    columns = HGVS_COLS + [case_id]
-    hgvs_data = pandas.read_table(
-        readable, sep='\t', comment='#', names=columns
-    )
-    hgvs_data.ALT.fillna("NA", inplace=True)
+    '''Set genotype and hgvs info of jannovar records belonging to the
+    variants of a single case.'''
+    hgvs_data = hgvs_data.rename(columns={"SAMPLE": case_id})
     if any(hgvs_data.ALT == '<ERROR>'):
         error_data = hgvs_data.loc[
             hgvs_data.ALT == "<ERROR>", ["FILTER", "INFO"]
@@ -93,15 +103,51 @@ def jannovar_vcf_to_table(
     return hgvs_data
 
 
-def create_vcf(
-        variants: [str],
-        zygosity: str,
+def jannovar_vcf_to_table(
+        readable,
         case_id: str,
-        path: str,
+        zygosity: str,
+        variants: [str],
 ) -> typing.Union[str, pandas.DataFrame]:
-    '''Generates vcf dataframe. If an error occurs the error message is
-    returned.
+    '''Create pandas dataframe from readable jannovar generated vcf file.'''
+    return format_case_table(
+        read_jannovar_vcf(readable), case_id, zygosity, variants
+    )
+
+
+def split_jannovar_vcf(
+        readable,
+        cases: [(str, str, [str])],
+) -> typing.Dict[str, typing.Union[str, pandas.DataFrame]]:
+    '''Split jannovar vcf created from the concatenated variants of many
+    cases into tables per case. Cases are given as tuples of case id,
+    zygosity and variants. Jannovar returns one record per input line, so
+    records are assigned to cases by their position. If records cannot be
+    assigned, all cases are None, so that they can be converted one by one.
     '''
+    hgvs_data = read_jannovar_vcf(readable)
+    total = sum(len(variants) for _, _, variants in cases)
+    if len(hgvs_data) != total:
+        LOGGER.warning(
+            "Jannovar returned %d records for %d variants.",
+            len(hgvs_data), total
+        )
+        return {case_id: None for case_id, _, _ in cases}
+
+    tables = {}
+    offset = 0
+    for case_id, zygosity, variants in cases:
+        case_data = hgvs_data.iloc[offset:offset + len(variants)].copy()
+        offset += len(variants)
+        tables[case_id] = format_case_table(
+            case_data, case_id, zygosity, variants
+        )
+    return tables
+
+
+def run_jannovar(variants: [str], path: str, parse):
+    '''Run jannovar hgvs-to-vcf on the variants and parse the created vcf
+    file. If an error occurs the error message is returned.'''
     with tempfile.NamedTemporaryFile(mode="w+", dir=path) as hgvsfile:
         hgvsfile.write("\n".join(variants))
         hgvsfile.seek(0)
@@ -123,13 +169,42 @@ def create_vcf(
                 )
             except subprocess.CalledProcessError as error:
                 return str(error)
-            hgvs_data = jannovar_vcf_to_table(
-                vcffile, case_id, zygosity, variants
-            )
-            if isinstance(hgvs_data, str):
-                return hgvs_data
-                # return process.stderr
-            return hgvs_data
+            return parse(vcffile)
+
+
+def create_vcf(
+        variants: [str],
+        zygosity: str,
+        case_id: str,
+        path: str,
+) -> typing.Union[str, pandas.DataFrame]:
+    '''Generates vcf dataframe. If an error occurs the error message is
+    returned.
+    '''
+    return run_jannovar(
+        variants, path,
+        lambda vcffile: jannovar_vcf_to_table(
+            vcffile, case_id, zygosity, variants
+        )
+    )
+
+
+def create_vcfs(
+        cases: [(str, str, [str])],
+        path: str,
+) -> typing.Dict[str, typing.Union[str, pandas.DataFrame]]:
+    '''Generate vcf dataframes of many cases with a single jannovar run.
+    Cases are given as tuples of case id, zygosity and variants. If the run
+    fails, all cases are None, so that they can be converted one by one.
+    '''
+    variants = [v for _, _, case_variants in cases for v in case_variants]
+    result = run_jannovar(
+        variants, path, lambda vcffile: split_jannovar_vcf(vcffile, cases)
+    )
+    if isinstance(result, str):
+        LOGGER.warning("Jannovar run failed: %s", result)
+        return {case_id: None for case_id, _, _ in cases}
+    return result
 
 
 RE_HGVS_INFO = re.compile(r'HGVS="([^"]*)"')
@@ -166,6 +241,16 @@ def read_vcfdf(path: str) -> pandas.DataFrame:
     return hgvs_data
 
 
+class ReusedVcf:
+    '''Existing vcf file, which is only parsed if its data is needed.'''
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self) -> pandas.DataFrame:
+        return read_vcfdf(self.path)
+
+
 def write_vcfdf(data: pandas.DataFrame, path: str) -> None:
     '''Write vcf dataframe to specified location.'''
     rawdata = vcfdf_to_bytes(data)
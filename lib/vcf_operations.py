@@ -3,13 +3,26 @@ VCF operations to move all vcfs to identical vcf.gz format.
 '''
 
 import os
+import re
 import gzip
+import json
+import logging
 import zipfile
-from typing import Callable
+from typing import Callable, Union
 
 import filetype
 
 
+LOGGER = logging.getLogger(__name__)
+
+# hidden, since create_config expects only case vcfs in the directory
+VCF_CATALOG_NAME = ".vcf_catalog.jsonl"
+
+VCF_CATALOGS = {}
+
+RE_NAME_TOKEN = re.compile(r"[^0-9A-Za-z]+")
+
+
 def read_bytes(openfunc: Callable, infile: str) -> None:
     '''Handle uncompressed vcf files, by validating basic vcf properties
     and gzipping them.'''
@@ -143,3 +156,113 @@ def move_vcf(orig_path: str, new_path: str) -> None:
         write_vcf(data, new_path)
     else:
         print("\nVCF file is existed and identical.")
+
+
+def scan_files(directory: str) -> [str]:
+    '''Get names of all files in a directory.'''
+    try:
+        with os.scandir(directory) as entries:
+            return [entry.name for entry in entries if entry.is_file()]
+    except OSError:
+        return []
+
+
+def file_stat(path: str) -> Union[list, None]:
+    '''Get size and modification time of a file or None if it does not
+    exist.'''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+def get_vcf_catalog(vcf_dir: str, processed_dir: str) -> "VcfCatalog":
+    '''Get vcf catalog of raw and processed directory, which is created
+    only once per process until the catalogs are cleared.'''
+    key = (vcf_dir, processed_dir)
+    if key not in VCF_CATALOGS:
+        VCF_CATALOGS[key] = VcfCatalog(vcf_dir, processed_dir)
+    return VCF_CATALOGS[key]
+
+
+def clear_vcf_catalogs() -> None:
+    '''Drop catalogs, so that directories are listed again. Used by long
+    running processes, in which vcf files are added over time.'''
+    VCF_CATALOGS.clear()
+
+
+class VcfCatalog:
+    '''Raw vcf files of cases and their processed copies. The raw
+    directory is listed once. Copies are recorded with size and modification
+    time of source and destination in the processed directory, so that
+    unchanged vcfs are not read again.
+    '''
+
+    def __init__(self, vcf_dir: str, processed_dir: str):
+        self.vcf_dir = vcf_dir
+        self.processed_dir = processed_dir
+        self._names = sorted(scan_files(vcf_dir))
+        self._tokens = {}
+        for name in self._names:
+            for token in RE_NAME_TOKEN.split(name):
+                self._tokens.setdefault(token, []).append(name)
+        self.path = os.path.join(processed_dir, VCF_CATALOG_NAME)
+        self._copies = {}
+        lines = 0
+        if os.path.exists(self.path):
+            with open(self.path, "r") as catalog_file:
+                for line in catalog_file:
+                    lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._copies[entry["destination"]] = entry
+        # remove superseded entries of repeated runs
+        if lines > 2 * len(self._copies) + 100:
+            self._compact()
+
+    def find_raw(self, case_id: str) -> Union[str, None]:
+        '''Get path of the raw vcf with the case id in its file name. Names
+        containing the id as a separate part are looked up directly.'''
+        names = self._tokens.get(case_id) \
+            or [n for n in self._names if case_id in n]
+        if not names:
+            return None
+        return os.path.join(self.vcf_dir, names[0])
+
+    def is_current(self, source: str, destination: str) -> bool:
+        '''Check whether the destination has been created from the source
+        and both have not been changed since.'''
+        entry = self._copies.get(destination)
+        if entry is None or entry["source"] != source:
+            return False
+        destination_stat = file_stat(destination)
+        return destination_stat is not None \
+            and destination_stat == entry["stat"] \
+            and file_stat(source) == entry["source_stat"]
+
+    def copy(self, source: str, destination: str) -> None:
+        '''Convert vcf to vcf.gz at the destination, unless it is current.
+        '''
+        if self.is_current(source, destination):
+            LOGGER.debug("VCF file %s is current.", destination)
+            return
+        move_vcf(source, destination)
+        entry = {
+            "destination": destination,
+            "source": source,
+            "source_stat": file_stat(source),
+            "stat": file_stat(destination),
+        }
+        self._copies[destination] = entry
+        with open(self.path, "a") as catalog_file:
+            catalog_file.write(json.dumps(entry) + "\n")
+
+    def _compact(self):
+        tmp_path = "{}.{}.tmp".format(self.path, os.getpid())
+        with open(tmp_path, "w") as catalog_file:
+            for entry in self._copies.values():
+                catalog_file.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, self.path)
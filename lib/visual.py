@@ -1,6 +1,10 @@
+import atexit
 import multiprocessing
+from contextlib import contextmanager
 from functools import wraps, partial
 
+from lib.profiling import PROFILER, timed_worker
+
 
 def print_status(label, width, cur, size):
     '''Print a statusbar.'''
@@ -29,7 +33,12 @@ def progress_bar(label, width=20):
 
             for i, item in enumerate(iterable):
                 print_status(label, width, i+1, size)
-                result.append(mapped_func(item, *args, **kwds))
+                if PROFILER.enabled:
+                    result.append(PROFILER.timed_call(
+                        label, mapped_func, item, *args, **kwds
+                    ))
+                else:
+                    result.append(mapped_func(item, *args, **kwds))
             print("")
             return result
         return progress_wrapper
@@ -37,20 +46,143 @@ def progress_bar(label, width=20):
     return progress_decorator
 
 
+class MappedItem:
+    '''Placeholder for the mapped item in results of worker processes.'''
+
+
+def strip_item(result, item):
+    '''Replace the mapped item in the result, so that it is not sent back
+    from the worker process.'''
+    if result is item:
+        return MappedItem()
+    if isinstance(result, tuple):
+        return tuple(MappedItem() if r is item else r for r in result)
+    return result
+
+
+def restore_item(result, item):
+    '''Insert the item of the parent process into a stripped result.'''
+    if isinstance(result, MappedItem):
+        return item
+    if isinstance(result, tuple):
+        return tuple(item if isinstance(r, MappedItem) else r for r in result)
+    return result
+
+
+def changed_fields_worker(fields, map_func, *args, **kwargs):
+    '''Call map function on an indexed item and only return the result
+    without the item and the item fields changed by the call.'''
+    index, item = args[-1]
+    before = {f: getattr(item, f, None) for f in fields}
+    result = map_func(*args[:-1], item, **kwargs)
+    changed = {
+        f: getattr(item, f, None) for f in fields
+        if getattr(item, f, None) is not before[f]
+    }
+    return index, strip_item(result, item), changed
+
+
+class WorkerPool:
+    '''Pool of worker processes kept for the whole run. Workers are forked
+    when the pool is started and inherit all services configured until then.
+    Without a started pool, a new pool is used for every call of
+    multiprocess.
+    '''
+
+    def __init__(self):
+        self._pool = None
+        self.processes = None
+        self.chunksize = 0
+
+    def start(
+            self, processes: int = 0, chunksize: int = 0,
+            initializer=None, initargs=()
+    ):
+        '''Start worker processes. Use all cpus if no number of processes
+        is given and choose chunk sizes automatically without chunksize.'''
+        self.close()
+        self.processes = processes or multiprocessing.cpu_count()
+        self.chunksize = chunksize
+        self._pool = multiprocessing.Pool(
+            self.processes, initializer, initargs
+        )
+        atexit.register(self.close)
+        return self
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def get_chunksize(self, size: int) -> int:
+        '''Get number of items sent to a worker at once.'''
+        if self.chunksize:
+            return self.chunksize
+        processes = self.processes or multiprocessing.cpu_count()
+        # same heuristic as Pool.map
+        chunksize, extra = divmod(size, processes * 4)
+        return chunksize + 1 if extra else max(chunksize, 1)
+
+    @contextmanager
+    def get_pool(self):
+        if self._pool is not None:
+            yield self._pool
+        else:
+            with multiprocessing.Pool() as pool:
+                yield pool
+
+
+WORKER_POOL = WorkerPool()
+
+
 def multiprocess(
-        label, map_func, iterable, *args, **kwargs
+        label, map_func, iterable, *args, changed_fields=None, **kwargs
 ):
-    with multiprocessing.Pool() as pool:
+    '''Map function on all items in worker processes.
+
+    If changed_fields is given, items are not sent back from the workers.
+    Instead only the listed item attributes reassigned in the worker are
+    updated on the items of the parent process. Results are returned in the
+    order of the items.
+    '''
+    profiled = PROFILER.enabled
+    if changed_fields is not None:
+        map_func = partial(changed_fields_worker, changed_fields, map_func)
+        items = list(enumerate(iterable))
+    else:
+        items = iterable
+
+    if profiled:
+        # return timing and service statistics from worker processes
+        worker_func = partial(timed_worker, label, map_func, *args, **kwargs)
+    else:
+        worker_func = partial(map_func, *args, **kwargs)
+
+    with WORKER_POOL.get_pool() as pool:
         result = []
-        size = len(iterable)
+        size = len(items)
         for i, res in enumerate(
                 pool.imap_unordered(
-                    partial(map_func, *args, **kwargs), iterable
+                    worker_func, items, WORKER_POOL.get_chunksize(size)
                 )
         ):
             print_status(label, 20, i+1, size)
+            if profiled:
+                res, case_id, seconds, services = res
+                PROFILER.add_case_time(case_id, label, seconds)
+                PROFILER.merge_services(services)
             result.append(res)
         print("")
+
+    if changed_fields is not None:
+        ordered = [None] * len(items)
+        for index, res, changed in result:
+            item = items[index][1]
+            for field, value in changed.items():
+                setattr(item, field, value)
+            ordered[index] = restore_item(res, item)
+        result = ordered
     return result
 
 
@@ -12,18 +12,39 @@ import logging.config
 from typing import Tuple, List
 
 import json
+from functools import partial
 
 import yaml
-import snakemake.workflow
 
 # own libraries
-from lib import errorfixer, quality_check, pickler
+from lib import (
+    errorfixer, quality_check, pickler, manifest, profiling, daemon,
+    vcf_operations
+)
 from lib.processor import Processor
-from lib.visual import progress_bar, multiprocess
-from lib.model import json_parser, case, config, args_parser
-from lib.api import omim, mutalyzer, jannovar
+from lib.visual import progress_bar, multiprocess, WORKER_POOL
+from lib.model import (
+    json_parser, json_index, case, case_batch, config, args_parser
+)
+from lib.model.hgvs_parser import HGVS_PARSER, HGVSModel
+from lib.singleton import load_instance
 
-from lib.global_singletons import AWS_INST, MUTALYZER_INST, LAB_INST
+from lib.global_singletons import (
+    AWS_INST, MUTALYZER_INST, LAB_INST, OMIM_INST, ERRORFIXER_INST,
+    PHENOMIZER_INST, HGVS_SYNTAX_INST
+)
+
+
+LOGGER = logging.getLogger("lib")
+
+# checkpoint stages and the pickle entrypoints they are resumed from
+CASE_STAGE = "case_cleaned"
+VCF_STAGE = "qc_case_with_simulated_vcf"
+ENTRY_STAGES = {
+    "pheno": CASE_STAGE,
+    "convert": CASE_STAGE,
+    "qc": VCF_STAGE,
+}
 
 
 def configure_logging(logger_name, logger_file: str = "preprocess.log"):
@@ -82,11 +103,9 @@ def create_config(
         yaml.dump(config_data, configfile, default_flow_style=False)
 
 
-def create_jsons(config_data, convert_failed):
-    '''Create a list of new formatjson objects.'''
-    print("== Process new json files ==")
-    # get either from single file or from directory
-    corrected = config_data.input["corrected_path"]
+def get_json_files(config_data) -> List[str]:
+    '''Get list of json files to be processed, either from a single file,
+    the lab api or the download directory.'''
     if config_data.input["input_files"]:
         json_files = config_data.input["input_files"]
     elif config_data.input["lab"] and config_data.input["lab_case_id"]:
@@ -106,36 +125,48 @@ def create_jsons(config_data, convert_failed):
             for x in os.listdir(unprocessed_jsons)
             if os.path.splitext(x)[1] == '.json'
         ]
+    return json_files
 
+
+def get_json_class(config_data) -> type:
+    '''Get json parser class for the configured input format.'''
     if config_data.input["phenobot_format"]:
-        new_json_objs = progress_bar("Process jsons")(
-            lambda x, y: json_parser.PhenobotJson.from_file(x, y)
-        )(json_files, corrected)
+        return json_parser.PhenobotJson
     elif config_data.input["aws_format"]:
-        new_json_objs = progress_bar("Process jsons")(
-            lambda x, y: json_parser.NewJson.from_file(x, y)
-        )(json_files, corrected)
-    else:
-        new_json_objs = progress_bar("Process jsons")(
-            lambda x, y: json_parser.LabJson.from_file(x, y)
-        )(json_files, corrected)
+        return json_parser.NewJson
+    return json_parser.LabJson
+
+
+def load_jsons(config_data, json_files, convert_failed):
+    '''Load json files and split them by the json level quality check.'''
+    corrected = config_data.input["corrected_path"]
+    json_class = get_json_class(config_data)
+
+    # list input directories once and read all files in bulk
+    json_class.prefetch(
+        json_files, corrected, config_data.input["read_threads"]
+    )
+    new_json_objs = progress_bar("Process jsons")(
+        lambda x, y: json_class.from_file(x, y)
+    )(json_files, corrected)
+    json_index.JSON_INDEX.clear()
 
     print('Unfiltered', len(new_json_objs))
+    checked = [(j, j.check(convert_failed)) for j in new_json_objs]
     json_failed_data = {
         "json_check_failed": {
-            case_id: {
+            j.get_case_id(): {
                 "issues": issues,
             }
-            for case_id, (valid, issues) in
-            [(j.get_case_id(), j.check(convert_failed)) for j in new_json_objs]
+            for j, (valid, issues) in checked
             if not valid
         }
     }
 
-    filtered_new = [j for j in new_json_objs if j.check(convert_failed)[0]]
+    filtered_new = [j for j, (valid, _) in checked if valid]
 
     if convert_failed:
-        failed_jsons = [j for j in new_json_objs if not j.check(convert_failed)[0]]
+        failed_jsons = [j for j, (valid, _) in checked if not valid]
     else:
         failed_jsons = []
 
@@ -143,70 +174,200 @@ def create_jsons(config_data, convert_failed):
     return filtered_new, failed_jsons, json_failed_data
 
 
+@profiling.profile_stage
+def create_jsons(config_data, convert_failed):
+    '''Create a list of new formatjson objects.'''
+    print("== Process new json files ==")
+    json_files = get_json_files(config_data)
+    return load_jsons(config_data, json_files, convert_failed)
+
+
+def outputs_exist(config_data, case_id, entries, filter_failed=False):
+    '''Check whether outputs of a previous run exist for the case. Runs
+    filtering failed cases also need the quality check entries, which are
+    not saved by runs converting all cases.'''
+    if filter_failed and entries is None:
+        return False
+    filename = "{}.json".format(case_id)
+    paths = [os.path.join(config_data.output["converted_path"], filename)]
+    if entries and "passed" in entries:
+        paths.append(
+            os.path.join(config_data.output["valid_case_path"], filename)
+        )
+    return all(os.path.exists(p) for p in paths)
+
+
+def filter_unchanged(config_data, jsons, case_manifest, filter_failed):
+    '''Split jsons into cases with changed inputs and quality check entries
+    of unchanged cases, whose existing outputs are reused.'''
+    changed = []
+    fingerprints = {}
+    reused = {}
+    for json_obj in jsons:
+        case_id = json_obj.get_case_id()
+        fingerprint = manifest.case_fingerprint(json_obj)
+        if case_manifest.is_current(case_id, fingerprint) and outputs_exist(
+                config_data, case_id, case_manifest.get_entries(case_id),
+                filter_failed
+        ):
+            reused[case_id] = case_manifest.get_entries(case_id)
+        else:
+            fingerprints[case_id] = fingerprint
+            changed.append(json_obj)
+    print("Reusing outputs of {} unchanged cases".format(len(reused)))
+    return changed, fingerprints, reused
+
+
+def get_worker_instances() -> list:
+    '''Instances used in the worker processes. The mutalyzer client, which
+    downloads the service description, is only needed for syntax checks
+    with mutalyzer.'''
+    instances = [OMIM_INST, ERRORFIXER_INST, HGVS_PARSER]
+    if HGVS_SYNTAX_INST.backend == "mutalyzer":
+        instances.insert(0, MUTALYZER_INST)
+    return instances
+
+
+def init_worker():
+    '''Create service instances and the hgvs parser once in every worker
+    process. Instances created before the worker pool is started are
+    inherited.'''
+    for instance in get_worker_instances():
+        load_instance(instance)
+
+
+def correct_transcripts(case_objs):
+    '''Correct reference transcripts of all variants with mutalyzer. The
+    client is only created if there are variants to correct. With the local
+    syntax check an unreachable service only skips the correction.'''
+    if not any(
+            m.variants for c in case_objs for m in c.hgvs_models
+            if not m.corrected
+    ):
+        return
+    try:
+        load_instance(MUTALYZER_INST)
+    except Exception as error:
+        if HGVS_SYNTAX_INST.backend == "mutalyzer":
+            raise
+        LOGGER.warning(
+            "Mutalyzer is not available, reference transcripts are not "
+            "corrected: %s", error
+        )
+        return
+    MUTALYZER_INST.correct_reference_transcripts(case_objs)
+
+
 def touch_hgvs(case):
     case.hgvs_models
     return case
 
 
+def parse_genomic_entry(item):
+    '''Parse hgvs model of a single genomic entry without the syntax check,
+    which is run for all cases at once afterwards.'''
+    index, entry, _ = item
+    return index, HGVSModel(entry, check_syntax=False)
+
+
+def parse_hgvs_models(case_objs):
+    '''Parse hgvs models of all cases in the worker processes. Genomic
+    entries are distributed on their own, so that cases with many entries
+    are parsed by multiple workers.'''
+    entries = [c.get_variant_entries() for c in case_objs]
+    items = []
+    for case_obj, case_entries in zip(case_objs, entries):
+        for entry in case_entries:
+            items.append((len(items), entry, case_obj.case_id))
+    models = dict(multiprocess("Fetch hgvs", parse_genomic_entry, items))
+    index = 0
+    for case_obj, case_entries in zip(case_objs, entries):
+        case_obj.set_hgvs_models(
+            [models[i] for i in range(index, index + len(case_entries))]
+        )
+        index += len(case_entries)
+
+
+@profiling.profile_stage
 def create_cases(config_data, jsons):
-    '''Create cases from list of jsons.'''
+    '''Create cases from list of jsons. The list is emptied, so that the
+    decoded json data can be freed after it has been read by the cases.'''
     print("== Create cases from new json format ==")
 
     case_objs = progress_bar("Create cases")(
         lambda json_file: case.Case(json_file, config_data, vcf_path=config_data.input["vcf"])
     )(jsons)
+    jsons.clear()
+
+    parse_hgvs_models(case_objs)
+    # syndromes are the last fields read from the raw jsons, which are
+    # loaded from disk again if they are needed later
+    for case_obj in case_objs:
+        case_obj.syndromes
+        case_obj.compact()
+
+    # keep many requests in flight instead of waiting for single requests
+    # in the workers
+    print("Checking hgvs syntax with {}".format(HGVS_SYNTAX_INST.backend))
+    HGVS_SYNTAX_INST.check_case_syntax(case_objs)
+    print("Requesting phenomization of all cases")
+    PHENOMIZER_INST.prefetch([c.features for c in case_objs])
+    print("Creating gene lists of all cases")
+    case_batch.CaseBatch(case_objs).create_gene_lists()
 
     print("Correcting transcripts with mutalyzer")
+    correct_transcripts(case_objs)
 
-    case_objs = multiprocess("Fetch hgvs", touch_hgvs, case_objs)
+    # drop tables not needed by later stages, which makes transfers to the
+    # workers and checkpoints smaller
+    for case_obj in case_objs:
+        case_obj.compact()
 
-    MUTALYZER_INST.correct_reference_transcripts(case_objs)
-
-    print("Creating pickle.")
     if config_data.dump_intermediate:
-        with open('case_cleaned.p', 'wb') as pfile:
-            pickler.CasePickler(pfile).dump(case_objs,)
+        print("Saving case checkpoints.")
+        pickler.CheckpointStore(config_data.checkpoint_path).save_all(
+            CASE_STAGE, [(c.case_id, c) for c in case_objs]
+        )
 
     return case_objs
 
 
 def create_old_json(case_obj, destination):
-    '''Create an old case object.'''
+    '''Create and save an old case object. Only the case is returned, so
+    that old jsons are not kept in memory.'''
     old = json_parser.OldJson.from_case_object(case_obj, destination)
     old.save_json()
-    return old, case_obj
+    return case_obj
 
 
+@profiling.profile_stage
 def convert_to_old_format(config_data, cases):
-    '''Convert case files to old json format objects.'''
+    '''Convert case files to old json format files.'''
     print("== Mapping to old json format ==")
-    result = multiprocess(
+    return multiprocess(
         "Create old", create_old_json, cases,
-        destination=config_data.output["converted_path"]
+        destination=config_data.output["converted_path"],
+        changed_fields=case.Case.lazy_fields
     )
-    old_jsons = [old for old, _ in result]
-    cases = [c for _, c in result]
-    return old_jsons, cases
 
 def convert_failed_cases(config_data, jsons):
     '''Convert failed cases to old json format objects'''
     cases = create_cases(config_data, jsons)
     result = multiprocess(
         "Create old", create_old_json, cases,
-        destination=config_data.output["converted_path"]
+        destination=config_data.output["converted_path"],
+        changed_fields=case.Case.lazy_fields
     )
     return cases
 
-def create_qc_case(case):
-    return case.check(), case
-
-
+@profiling.profile_stage
 def get_qc_cases(config_data, cases):
     '''Get qc results for all cases.'''
     print("== Get QC results for cases ==")
-    return multiprocess("QC cases", create_qc_case, cases)
+    return list(zip(case_batch.CaseBatch(cases).check(), cases))
 
 
+@profiling.profile_stage
 def save_vcfs(config_data, qc_cases):
     '''Create VCF files from genetic information and create a config.yml
     listing all vcf files.
@@ -215,82 +376,80 @@ def save_vcfs(config_data, qc_cases):
     realvcf = config_data.output["real_vcf_path"]
     config_path = config_data.output["vcf_config_file"]
 
+    valid_cases = [case for (valid, _), case in qc_cases if valid]
+    # convert hgvs strings of many cases with each jannovar request
+    print("Converting hgvs of {} cases with jannovar".format(len(valid_cases)))
+    vcf_data = case.Case.create_hgvs_vcfs(
+        valid_cases, simulated, recreate=False
+    )
     progress_bar("Generate VCF")(
-        lambda x: x.put_hgvs_vcf(simulated, recreate=False)
-    )([case for (valid, _), case in qc_cases if valid])
+        lambda x: x.put_hgvs_vcf(
+            simulated, recreate=False, vcf_data=vcf_data.get(x.case_id)
+        )
+    )(valid_cases)
 
-    print("Pickling vcf cases")
     if config_data.dump_intermediate:
-        with open('qc_case_with_simulated_vcf.p', 'wb') as pfile:
-            pickler.CasePickler(pfile).dump(qc_cases)
+        print("Saving vcf case checkpoints.")
+        pickler.CheckpointStore(config_data.checkpoint_path).save_all(
+            VCF_STAGE, [(c.case_id, (qc, c)) for qc, c in qc_cases]
+        )
 
     create_config(config_path, simulated, realvcf)
 
     return qc_cases
 
 
-def quality_check_cases(config_data, qc_cases, old_jsons, json_log):
-    '''Output quality check summaries.'''
+@profiling.profile_stage
+def quality_check_cases(
+        config_data, qc_cases, converted, json_log, reused=None
+):
+    '''Output quality check summaries. Quality check entries of reused cases
+    are added to the summaries. Converted old jsons of passing cases are
+    copied to the valid case path.'''
     print("== Quality check ==")
 
-    # Cases failing qc altogether
-    qc_failed_msg = {
-        case.case_id: (valid, issues)
-        for (valid, issues), case in qc_cases if not valid
-    }
-    # cases with multiple diagnosis
-    multi_no_omim = {
-        k: v for k, v in
-        [
-            (case.case_id, case.get_diagnosis()) for _, case in qc_cases
-        ]
-        if any(str(d["omim_id"]) == "0" for d in v) and len(v) > 1
+    # all checks run on tables of all cases
+    qc_output = quality_check.qc_case_sections(qc_cases)
+    qc_passed = {
+        case.case_id: case for _, case in qc_cases
+        if case.case_id in qc_output["passed"]
     }
 
-    # Cases passing quality check
-    qc_passed = {case.case_id: case for (valid, _), case in qc_cases if valid}
+    for case_id, entries in (reused or {}).items():
+        quality_check.add_qc_entries(qc_output, case_id, entries or {})
 
-    qc_vcf = {
-        case_id: case.check_vcf() for case_id, case in qc_passed.items()
-    }
+    qc_output = {**qc_output, **json_log}
 
-    qc_vcf_failed = {
-        case_id: result for case_id, result in qc_vcf.items() if not result[0]
-    }
+    save_quality_check_log(config_data, qc_output)
 
-    # cases have to pass vcf check
-    qc_passed = {
-        case_id: case
-        for case_id, case in qc_passed.items() if qc_vcf[case_id][0]
-    }
+    # move cases to qc directory
+    if converted:
+        print("Saving passing cases to new location")
+        # create output directory if needed
+        os.makedirs(config_data.output["valid_case_path"], exist_ok=True)
 
-    # Cases with mutations marked as benign excluded from analysis
-    qc_benign_passed = {
-        k: v for k, v in
-        {k: v.get_benign_excluded() for k, v in qc_passed.items()}.items()
-        if v > 0
-    }
+        @progress_bar("Save passing qc")
+        def save_old_to_qc(case_id):
+            '''Copy old jsons passing QC to a new location.'''
+            filename = "{}.json".format(case_id)
+            shutil.copyfile(
+                os.path.join(config_data.output["converted_path"], filename),
+                os.path.join(config_data.output["valid_case_path"], filename)
+            )
 
-    # Cases where pathogenic diagnosed mutation is not in geneList
-    qc_pathongenic_passed = dict(
-        (cid, x) for (cid, x) in progress_bar("Pathogenic genes in gene list")(
-            lambda c: (c[0], c[1].pathogenic_gene_in_gene_list())
-        )(qc_passed.items()) if not x[0]
-    )
+        save_old_to_qc(qc_passed)
 
-    # Compiled stats to be dumped into a json file
-    qc_output = {
-        "failed": qc_failed_msg,
-        "benign_excluded": qc_benign_passed,
-        "pathogenic_missing": qc_pathongenic_passed,
-        "vcf_failed": qc_vcf_failed,
-        "multi_no_omim": multi_no_omim,
-        "passed": {k: '' for k in qc_passed.keys()},
-    }
+    if not config_data.output["create_log"]:
+        print(json.dumps(qc_output, indent=4))
 
-    qc_output = {**qc_output, **json_log}
+    return {
+        "pass": len(qc_output["passed"]),
+        "fail": len(qc_output["failed"]) + len(qc_output["vcf_failed"])
+    }, qc_passed, qc_output
 
-    # save qc results in detailed log if needed
+
+def save_quality_check_log(config_data, qc_output):
+    '''Save qc results in detailed log if needed.'''
     log_path = config_data.output["quality_check_log"]
     if config_data.output["create_log"]:
         # move old file to new location
@@ -300,31 +459,209 @@ def quality_check_cases(config_data, qc_cases, old_jsons, json_log):
         with open(log_path, "w") as qc_out:
             json.dump(qc_output, qc_out, indent=4)
 
-    # move cases to qc directory
-    if old_jsons:
-        print("Saving passing cases to new location")
-        # create output directory if needed
+
+def stream_case_outputs(case_obj, output, save_valid):
+    '''Create all outputs of a single case and only return its quality
+    check log entries, so that the case object can be dropped afterwards.'''
+    old = json_parser.OldJson.from_case_object(
+        case_obj, output["converted_path"]
+    )
+    old.save_json()
+
+    qc_result = case_obj.check()
+    if qc_result[0]:
+        case_obj.put_hgvs_vcf(output["simulated_vcf_path"], recreate=False)
+
+    entries = quality_check.case_qc_entries(qc_result, case_obj)
+    if save_valid and "passed" in entries:
+        old.save_json(save_path=output["valid_case_path"])
+    return case_obj.case_id, entries
+
+
+def stream_failed_outputs(case_obj, output):
+    '''Only convert cases failing the json check to the old format.'''
+    create_old_json(case_obj, output["converted_path"])
+    return case_obj.case_id
+
+
+@profiling.profile_stage
+def stream_cases(
+        config_data, json_files, filter_failed, window, case_manifest=None
+):
+    '''Process cases in windows of limited size. Each case is passed from
+    json parsing to the simulated vcf as a single unit. Only quality check log
+    entries are kept after the outputs of a window have been written, so
+    memory usage does not grow with the number of cases.
+    Unchanged cases in the optional case manifest are skipped.'''
+    print("== Stream cases in windows of {} ==".format(window))
+    qc_output = {section: {} for section in quality_check.QC_SECTIONS}
+    json_log = {"json_check_failed": {}}
+    case_ids = []
+
+    if filter_failed:
         os.makedirs(config_data.output["valid_case_path"], exist_ok=True)
 
-        old_jsons = {j.get_case_id(): j for j in old_jsons}
+    for start in range(0, len(json_files), window):
+        print("== Window {}-{} of {} ==".format(
+            start + 1, min(start + window, len(json_files)), len(json_files)
+        ))
+        jsons, failed_jsons, window_log = load_jsons(
+            config_data, json_files[start:start + window], not filter_failed
+        )
+        json_log["json_check_failed"].update(window_log["json_check_failed"])
+
+        if case_manifest is not None:
+            jsons, fingerprints, reused = filter_unchanged(
+                config_data, jsons, case_manifest, filter_failed
+            )
+            for case_id, entries in reused.items():
+                quality_check.add_qc_entries(
+                    qc_output, case_id, entries or {}
+                )
+                case_ids.append(case_id)
+
+        if jsons:
+            cases = create_cases(config_data, jsons)
+            del jsons
+            for case_id, entries in multiprocess(
+                    "Stream cases", stream_case_outputs, cases,
+                    output=config_data.output, save_valid=filter_failed,
+                    changed_fields=[]
+            ):
+                quality_check.add_qc_entries(qc_output, case_id, entries)
+                case_ids.append(case_id)
+                if case_manifest is not None:
+                    case_manifest.update(
+                        case_id, fingerprints[case_id], entries
+                    )
+            del cases
+            if case_manifest is not None:
+                case_manifest.save()
+
+        if failed_jsons:
+            failed_cases = create_cases(config_data, failed_jsons)
+            del failed_jsons
+            case_ids += multiprocess(
+                "Convert failed", stream_failed_outputs, failed_cases,
+                output=config_data.output, changed_fields=[]
+            )
+            del failed_cases
+
+    create_config(
+        config_data.output["vcf_config_file"],
+        config_data.output["simulated_vcf_path"],
+        config_data.output["real_vcf_path"],
+    )
 
-        @progress_bar("Save passing qc")
-        def save_old_to_qc(case_obj):
-            '''Save old jsons passing QC to a new location.'''
-            old_js = old_jsons[case_obj]
-            old_js.save_json(save_path=config_data.output["valid_case_path"])
+    with open("failed_cases.json", "w") as failed_log:
+        json.dump(json_log, failed_log)
 
-        save_old_to_qc(qc_passed)
+    qc_output = {**qc_output, **json_log}
+    stats = {
+        "pass": len(qc_output["passed"]),
+        "fail": len(qc_output["failed"]) + len(qc_output["vcf_failed"])
+    }
+    return stats, qc_output, case_ids
 
-    if not config_data.output["create_log"]:
-        print(json.dumps(qc_output, indent=4))
 
+def load_request_json(config_data, request):
+    '''Load json object of a case request, either from the included case
+    data or from a file path.'''
+    json_class = get_json_class(config_data)
+    corrected = config_data.input["corrected_path"]
+    if "case" in request:
+        if not isinstance(request["case"], dict):
+            raise daemon.RequestError("Case has to be a json object.")
+        return json_class(data=request["case"], override=corrected)
+    if "path" in request:
+        if not os.path.exists(request["path"]):
+            raise daemon.RequestError(
+                "Case file {} not found.".format(request["path"])
+            )
+        return json_class.from_file(request["path"], corrected)
+    raise daemon.RequestError("Request needs either case or path.")
+
+
+def process_case_request(config_data, request):
+    '''Create all outputs of a single case request and return the converted
+    old json, quality check entries and simulated vcf path.'''
+    vcf = request.get("vcf") or ""
+    if vcf and not os.path.exists(vcf):
+        raise daemon.RequestError("VCF file {} not found.".format(vcf))
+    # vcf directories change while the server is running
+    vcf_operations.clear_vcf_catalogs()
+
+    json_obj = load_request_json(config_data, request)
+    json_valid, json_issues = json_obj.check(True)
+
+    case_obj = case.Case(json_obj, config_data, vcf_path=vcf)
+    touch_hgvs(case_obj)
+    correct_transcripts([case_obj])
+
+    output = config_data.output
+    old = json_parser.OldJson.from_case_object(
+        case_obj, output["converted_path"]
+    )
+    old.save_json()
+
+    entries = {}
+    if json_valid:
+        qc_result = case_obj.check()
+        if qc_result[0]:
+            case_obj.put_hgvs_vcf(output["simulated_vcf_path"], recreate=False)
+        entries = quality_check.case_qc_entries(qc_result, case_obj)
+        if "passed" in entries:
+            old.save_json(save_path=output["valid_case_path"])
+
+    simulated_vcf = os.path.join(
+        output["simulated_vcf_path"], "{}.vcf.gz".format(case_obj.case_id)
+    )
     return {
-        "pass": len(qc_passed),
-        "fail": len(qc_failed_msg) + len(qc_vcf_failed)
-    }, qc_passed
+        "case_id": case_obj.case_id,
+        "json_check": {"valid": json_valid, "issues": json_issues},
+        "qc": entries,
+        "passed": "passed" in entries,
+        "old_json": old.get_js(),
+        "simulated_vcf": simulated_vcf if os.path.exists(simulated_vcf) else None,
+    }
+
+
+def load_pickled_cases(pickle_path, entry, case_ids=None):
+    '''Load cases from a checkpoint directory for the stage matching the
+    entrypoint, optionally only for a selection of case ids. Single pickle
+    files of all cases are loaded completely.'''
+    if os.path.isdir(pickle_path):
+        stage = ENTRY_STAGES[entry]
+        print("Loading {} checkpoints from {}".format(stage, pickle_path))
+        return pickler.CheckpointStore(pickle_path).load(
+            stage, case_ids.split(",") if case_ids else None
+        )
+
+    with open(pickle_path, "rb") as pickled_file:
+        cases = pickler.CaseUnpickler(pickled_file).load()
+    if case_ids:
+        selected = case_ids.split(",")
+        cases = [
+            c for c in cases
+            if (c[1] if isinstance(c, tuple) else c).case_id in selected
+        ]
+    return cases
+
+
+def save_profile(config_data):
+    '''Save profiling report next to the quality check log.'''
+    profile_path = os.path.join(
+        os.path.dirname(config_data.output["quality_check_log"]),
+        "profile.json"
+    )
+    print("Saving profile to {}".format(profile_path))
+    profiling.PROFILER.save(profile_path)
+
 
 def run_workflow(case_id, config_data):
+    # snakemake is only needed for the workflow and slow to import
+    import snakemake
+
     print("== Start PEDIA workflow == ")
     snakefile = 'Snakefile'
     target_file = os.path.join(config_data.output['output_path'], 'results', str(case_id), 'run.out')
@@ -353,28 +690,83 @@ def main():
 
     json_log = {}
     print(config_data['input'])
+
+    if args.profile:
+        profiling.PROFILER.enable()
+        profiling.instrument_services()
+
+    if args.serve:
+        daemon.serve(args.serve, partial(process_case_request, config_data))
+        return
+
+    # workers are forked after all services have been configured and the
+    # hgvs grammar has been built
+    for instance in get_worker_instances():
+        load_instance(instance)
+    WORKER_POOL.start(
+        config_data.workers, config_data.worker_chunksize,
+        initializer=init_worker
+    )
+
+    case_manifest = None
+    if args.incremental:
+        case_manifest = manifest.CaseManifest(
+            config_data.output["case_manifest"]
+        )
+
+    if args.stream:
+        stats, qc_output, case_ids = stream_cases(
+            config_data, get_json_files(config_data), args.filter_failed,
+            args.stream_window, case_manifest
+        )
+        # same outputs as the quality check of all cases below
+        if args.filter_failed:
+            save_quality_check_log(config_data, qc_output)
+            if not config_data.output["create_log"]:
+                print(json.dumps(qc_output, indent=4))
+            print(
+                "== QC results ==\nPassed: {pass} Failed: {fail}".format(
+                    **stats)
+            )
+        if not args.single and not args.lab:
+            quality_check.diff_quality_check(
+                config_data.output["quality_check_log"]
+            )
+        if args.profile:
+            save_profile(config_data)
+        if args.vcf:
+            run_workflow(case_ids[0], config_data)
+        return
+
     cases = []
+    converted = False
+    fingerprints = {}
+    reused = {}
     if not args.pickle:
         jsons, failed_jsons, json_log = create_jsons(config_data, not args.filter_failed)
 
         with open("failed_cases.json","w") as failed_log:
             json.dump(json_log,failed_log)
+        if case_manifest is not None:
+            jsons, fingerprints, reused = filter_unchanged(
+                config_data, jsons, case_manifest, args.filter_failed
+            )
         if jsons:
             cases = create_cases(config_data, jsons)
     else:
-        with open(args.pickle, "rb") as pickled_file:
-            cases = pickler.CaseUnpickler(pickled_file).load()
+        failed_jsons = []
+        cases = load_pickled_cases(args.pickle, args.entry, args.case_ids)
 
 
     if args.entry == "pheno" or args.entry == "convert":
         if cases:
-            old_jsons, cases = convert_to_old_format(config_data, cases)
-    else:
-        old_jsons = None
+            cases = convert_to_old_format(config_data, cases)
+            converted = True
 
     if not args.filter_failed:
         print("== Convert failed cases == ")
         failed_cases = convert_failed_cases(config_data,failed_jsons)
+        del failed_jsons
 
     if args.entry != "qc":
         # QC Check for only using cases passing qc
@@ -388,8 +780,8 @@ def main():
 
     if args.filter_failed:
         # Quality check
-        stats, qc_cases = quality_check_cases(
-            config_data, qc_cases, old_jsons, json_log
+        stats, qc_cases, qc_output = quality_check_cases(
+            config_data, qc_cases, converted, json_log, reused
         )
 
         print(
@@ -397,6 +789,14 @@ def main():
                 **stats)
         )
 
+    if case_manifest is not None:
+        for case_id, fingerprint in fingerprints.items():
+            entries = quality_check.case_entries_from_log(
+                qc_output, case_id
+            ) if args.filter_failed else None
+            case_manifest.update(case_id, fingerprint, entries)
+        case_manifest.save()
+
     if not args.single and not args.lab:
         quality_check.diff_quality_check(
             config_data.output["quality_check_log"]
@@ -405,8 +805,12 @@ def main():
     if not args.filter_failed:
         cases = cases + failed_cases
 
+    if args.profile:
+        save_profile(config_data)
+
     if args.vcf:
-        run_workflow(cases[0].case_id, config_data)
+        case_ids = [c.case_id for c in cases] + list(reused)
+        run_workflow(case_ids[0], config_data)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,75 @@
+'''Benchmark helper and service stand-in tests.'''
+import os
+import json
+import tempfile
+import unittest
+import configparser
+import urllib.request
+
+from helper import benchmark
+from helper.service_standins import PhenomizerStandin, JannovarStandin
+from lib.api import jannovar
+
+
+class BenchmarkSetupTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.templates = benchmark.load_templates(benchmark.TEMPLATE_DIR)
+
+    def test_create_cohort(self):
+        case_dir = os.path.join(self.tmp_dir.name, "cases")
+        benchmark.create_cohort(self.templates, 5, case_dir)
+        filenames = sorted(os.listdir(case_dir))
+        self.assertEqual(len(filenames), 5)
+        case_ids = set()
+        for filename in filenames:
+            with open(os.path.join(case_dir, filename)) as case_file:
+                case = json.load(case_file)
+            self.assertEqual(
+                filename, "{}.json".format(case["lab_case_id"])
+            )
+            case_ids.add(case["case_data"]["case_id"])
+        self.assertEqual(len(case_ids), 5)
+
+    def test_create_config(self):
+        path = os.path.join(self.tmp_dir.name, "config.ini")
+        benchmark.create_config(
+            path, self.tmp_dir.name, "mim", "http://localhost:1/", 2,
+            dump_intermediate=True
+        )
+        config = configparser.ConfigParser()
+        config.read(path)
+        self.assertEqual(config["general"]["dump_intermediate"], "true")
+        self.assertEqual(config["jannovar"]["port"], "2")
+        self.assertTrue(
+            config["general"]["checkpoint_path"].startswith(
+                self.tmp_dir.name
+            )
+        )
+
+
+class StandinTest(unittest.TestCase):
+
+    def test_phenomizer(self):
+        with PhenomizerStandin(["100001", "100002"]) as standin:
+            with urllib.request.urlopen(
+                    standin.url + "?numres=1&doboqa=false"
+            ) as response:
+                rows = response.read().decode("utf-8").splitlines()
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1].split("\t")[2], "OMIM:100001")
+
+    def test_jannovar(self):
+        variants = ["NM_000088.3:c.589G>T", "NM_000088.3:c.590G>T"]
+        client = jannovar.JannovarClient()
+        with JannovarStandin() as standin:
+            client.configure(port=standin.port)
+            status, vcf_text = client.process_variants(variants)
+        self.assertEqual(status, 0)
+        rows = [r for r in vcf_text.splitlines() if not r.startswith("#")]
+        self.assertListEqual(
+            [r.split("\t")[7] for r in rows],
+            ['HGVS="{}"'.format(v) for v in variants]
+        )
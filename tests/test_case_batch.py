@@ -0,0 +1,167 @@
+'''Case batch tests.'''
+import unittest
+from unittest import mock
+
+import pandas
+
+from lib.api import omim
+from lib.model import case_batch
+
+
+def create_omim():
+    '''Omim instance with a small phenotype gene mapping.'''
+    omim_obj = omim.Omim()
+    omim_obj.files = {
+        "mim2gene": pandas.DataFrame({
+            "mim_number": ["600001", "600002", "600003"],
+            "mim_entry_type": "gene",
+            "entrez_id": ["101", "102", "103"],
+            "gene_symbol": ["GENEA", "GENEB", "GENEC"],
+            "ensembl": "",
+        }),
+        "morbidmap": omim_obj.post_ops(pandas.DataFrame({
+            "phenotype": [
+                "Syndrome A, 100001 (3)", "Syndrome A, 100001 (3)",
+                "Syndrome B, 100002 (3)",
+            ],
+            "gene_symbol": ["GENEA, A1", "GENEB", "GENEB"],
+            "mim_number": ["600001", "600002", "600002"],
+            "cyto_location": "",
+        }), "morbidmap"),
+        "phenotypicSeries": {
+            "PS100001": {
+                "name": "Syndrome series",
+                "syndromes": [
+                    {"mim_number": "100001", "name": "Syndrome A"},
+                    {"mim_number": "100003", "name": "Syndrome C"},
+                ]
+            }
+        },
+    }
+    omim_obj.indexes = {}
+    for name, info in omim_obj.indexes_meta.items():
+        omim_obj.indexes[name] = omim_obj.create_index(name, info)
+    return omim_obj
+
+
+def phenomize(features):
+    scores = pandas.DataFrame({
+        "value_pheno": [0.5, 0.2],
+        "value_boqa": [0.1, 0.0],
+        "disease-name_pheno": ["Pheno B", "Pheno D"],
+        "disease-name_boqa": ["", ""],
+        "gene-id": ["103", ""],
+        "gene-symbol": ["GENEC", ""],
+    }, index=pandas.Index(["100002", "100004"], name="disease-id"))
+    return scores.iloc[:len(features)]
+
+
+class Case:
+
+    def __init__(self, case_id, features, syndromes):
+        self.case_id = case_id
+        self.features = features
+        self.syndromes = pandas.DataFrame(syndromes)
+        self._phenomized = None
+        self._gene_table = None
+
+    @property
+    def gene_table(self):
+        if self._gene_table is None:
+            case_batch.CaseBatch([self]).create_gene_lists()
+        return self._gene_table
+
+    def check_genomic(self):
+        return True, []
+
+
+def syndrome(
+        omim_id, name, gestalt=0.0, confirmed=False, differential=False
+):
+    return {
+        "omim_id": omim_id, "syndrome_name": name, "gestalt_score": gestalt,
+        "feature_score": 0.0, "combined_score": gestalt, "has_mask": False,
+        "confirmed": confirmed, "differential": differential,
+    }
+
+
+class CaseBatchTest(unittest.TestCase):
+
+    def setUp(self):
+        omim_patch = mock.patch.object(
+            case_batch, "OMIM_INST", create_omim()
+        )
+        omim_patch.start()
+        self.addCleanup(omim_patch.stop)
+        phenomizer = mock.Mock()
+        phenomizer.disease_boqa_phenomize.side_effect = phenomize
+        phenomizer_patch = mock.patch.object(
+            case_batch, "PHENOMIZER_INST", phenomizer
+        )
+        phenomizer_patch.start()
+        self.addCleanup(phenomizer_patch.stop)
+
+    @staticmethod
+    def create_cases():
+        return [
+            Case("1", ["HP:1", "HP:2"], [
+                syndrome(100001, "Syndrome A", 0.9, confirmed=True),
+                syndrome(100003, "Syndrome C", differential=True),
+            ]),
+            Case("2", [], [
+                syndrome(100002, "Syndrome B", confirmed=True),
+                syndrome(100001, "Syndrome A", 0.3, differential=True),
+            ]),
+            Case("3", ["HP:1"], [syndrome(100002, "")]),
+        ]
+
+    def test_phenomize(self):
+        cases = self.create_cases()
+        case_batch.CaseBatch(cases).create_gene_lists()
+        for batch_case, single_case in zip(cases, self.create_cases()):
+            case_batch.CaseBatch([single_case]).create_gene_lists()
+            pandas.testing.assert_frame_equal(
+                batch_case._phenomized, single_case._phenomized
+            )
+            pandas.testing.assert_frame_equal(
+                batch_case._gene_table, single_case._gene_table
+            )
+        self.assertListEqual(
+            [len(c._phenomized) for c in cases], [4, 2, 1]
+        )
+
+    def test_gene_list(self):
+        cases = self.create_cases()
+        case_batch.CaseBatch(cases).create_gene_lists()
+        gene_lists = [c._gene_table.to_dict("records") for c in cases]
+        self.assertListEqual(
+            [(g["syndrome_name"], g["gene_id"]) for g in gene_lists[0]],
+            [("Syndrome A", "101"), ("Syndrome A", "102"),
+             ("Pheno B", "102"), ("Pheno B", "103")]
+        )
+        self.assertEqual(
+            gene_lists[0][0]["phenotypic_series"], "PS100001"
+        )
+        self.assertEqual(gene_lists[2][0]["syndrome_name"], "Pheno B")
+
+    def test_check(self):
+        results = case_batch.CaseBatch(self.create_cases()).check()
+        issue_types = [[i["type"] for i in issues] for _, issues in results]
+        self.assertListEqual(issue_types, [
+            [],
+            ["NO_FEATURES", "MULTI_DIAGNOSIS"],
+            ["MISSING_SCORES", "NO_DIAGNOSIS"],
+        ])
+        self.assertListEqual(
+            [valid for valid, _ in results], [True, False, False]
+        )
+
+    def test_get_diagnosis(self):
+        batch = case_batch.CaseBatch(self.create_cases())
+        diagnosis = batch.get_diagnosis()
+        self.assertListEqual(
+            [d["omim_id"] for d in diagnosis["1"]], [100001, 100003]
+        )
+        self.assertListEqual(diagnosis["3"], [])
+        confirmed = batch.get_diagnosis(differential=False)
+        self.assertListEqual([d["omim_id"] for d in confirmed["2"]], [100002])
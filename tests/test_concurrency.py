@@ -0,0 +1,62 @@
+'''Concurrent request tests.'''
+import time
+import threading
+import unittest
+
+from lib.api import concurrency
+
+
+class ConcurrentRequestsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.runner = concurrency.ConcurrentRequests()
+        self.runner.configure(max_concurrency=4, retries=2, backoff=0.01)
+
+    def test_order(self):
+        def delayed(value):
+            time.sleep(0.01 * (10 - value))
+            return value * 2
+        self.assertListEqual(
+            self.runner.map("host", delayed, range(10)),
+            [v * 2 for v in range(10)]
+        )
+
+    def test_concurrency_limit(self):
+        lock = threading.Lock()
+        running = [0]
+        maximum = [0]
+
+        def tracked(value):
+            with lock:
+                running[0] += 1
+                maximum[0] = max(maximum[0], running[0])
+            time.sleep(0.02)
+            with lock:
+                running[0] -= 1
+            return value
+        self.runner.run(
+            [("a", tracked, i) for i in range(12)]
+            + [("b", tracked, i) for i in range(12)]
+        )
+        # limit is applied per host
+        self.assertEqual(maximum[0], 8)
+
+    def test_retries(self):
+        calls = []
+
+        def flaky(value):
+            calls.append(value)
+            if value == "fail" or calls.count(value) < 2:
+                raise ConnectionError(value)
+            return value
+        self.assertListEqual(
+            self.runner.map("host", flaky, ["ok", "fail"], default="none"),
+            ["ok", "none"]
+        )
+        self.assertEqual(calls.count("fail"), 3)
+
+    def test_rate_limit(self):
+        self.runner.configure(max_concurrency=10, rate_limit=50)
+        start = time.perf_counter()
+        self.runner.map("host", lambda v: v, range(6))
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
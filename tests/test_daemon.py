@@ -0,0 +1,76 @@
+'''Preprocessing server tests.'''
+import os
+import json
+import socket
+import tempfile
+import threading
+import unittest
+import http.client
+
+from lib import daemon
+
+
+def process(request):
+    if "case" not in request:
+        raise daemon.RequestError("Request needs either case or path.")
+    return {"case_id": request["case"]["case_id"]}
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+class CaseServerTest(unittest.TestCase):
+
+    def start(self, address):
+        server = daemon.create_server(address, process)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    @staticmethod
+    def post(connection, data):
+        connection.request("POST", "/case", body=json.dumps(data))
+        response = connection.getresponse()
+        return response.status, json.loads(response.read().decode("utf-8"))
+
+    def test_parse_address(self):
+        tests = [
+            ("8765", ("localhost", 8765)),
+            ("0.0.0.0:8765", ("0.0.0.0", 8765)),
+            ("/tmp/pedia.sock", "/tmp/pedia.sock"),
+        ]
+        for address, expected in tests:
+            self.assertEqual(daemon.parse_address(address), expected)
+
+    def test_tcp(self):
+        server = self.start("localhost:0")
+        connection = http.client.HTTPConnection(
+            "localhost", server.server_address[1]
+        )
+        self.assertEqual(
+            self.post(connection, {"case": {"case_id": "123"}}),
+            (200, {"case_id": "123"})
+        )
+        status, _ = self.post(connection, {"vcf": "123.vcf.gz"})
+        self.assertEqual(status, 400)
+        self.assertEqual(server.processed, 1)
+
+    def test_unix_socket(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        path = os.path.join(tmp_dir.name, "pedia.sock")
+        self.start(path)
+        self.assertEqual(
+            self.post(UnixHTTPConnection(path), {"case": {"case_id": "123"}}),
+            (200, {"case_id": "123"})
+        )
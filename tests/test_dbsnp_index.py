@@ -0,0 +1,91 @@
+'''Local dbSNP index tests.'''
+import os
+import gzip
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import dbsnp_index
+
+
+VCF = """##fileformat=VCFv4.0
+#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO
+8\t100791008\trs386834107\tC\tT\t.\t.\t.
+1\t100\trs30\tAT\tA\t.\t.\t.
+1\t200\trs20\tA\tAGG,C\t.\t.\t.
+2\t300\trs10;rs11\tCAG\tCTT\t.\t.\t.
+GL000192.1\t10\trs40\tA\tG\t.\t.\t.
+2\t400\trs30\tG\t<DEL>\t.\t.\t.
+3\t500\trs30\tGTTA\tG\t.\t.\t.
+"""
+
+
+class DbSNPIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.vcf = os.path.join(self.tmp_dir.name, "dbsnp.vcf.gz")
+        with gzip.open(self.vcf, "wt") as vcf_file:
+            vcf_file.write(VCF)
+        self.path = os.path.join(self.tmp_dir.name, "dbsnp.rsindex")
+
+    def test_vcf_to_hgvs(self):
+        for ref, alt, expected in [
+                ("C", "T", "NC_1.1:g.10C>T"),
+                ("AT", "A", "NC_1.1:g.11del"),
+                ("ATTG", "A", "NC_1.1:g.11_13del"),
+                ("A", "AGG", "NC_1.1:g.10_11insGG"),
+                ("CAG", "CTT", "NC_1.1:g.11_12delinsTT"),
+                ("A", "<DEL>", ""),
+        ]:
+            with self.subTest(ref=ref, alt=alt):
+                self.assertEqual(
+                    dbsnp_index.vcf_to_hgvs("NC_1.1", 10, ref, alt), expected
+                )
+
+    def test_lookup(self):
+        self.assertEqual(dbsnp_index.build_index(self.vcf, self.path), 6)
+        index = dbsnp_index.DbSNPIndex(self.path)
+        self.assertListEqual(
+            index.lookup("rs386834107"), ["NC_000008.10:g.100791008C>T"]
+        )
+        self.assertListEqual(index.lookup(20), [
+            "NC_000001.10:g.200_201insGG", "NC_000001.10:g.200A>C"
+        ])
+        self.assertListEqual(index.lookup("RS11"), [
+            "NC_000002.11:g.301_302delinsTT"
+        ])
+        # entries of the same rs number are kept in file order
+        self.assertListEqual(index.lookup("rs30"), [
+            "NC_000001.10:g.101del", "NC_000003.11:g.501_503del"
+        ])
+        for missing in ["rs40", "rs1", "rs999999999", "abc", ""]:
+            with self.subTest(rs_id=missing):
+                self.assertListEqual(index.lookup(missing), [])
+
+    def test_empty(self):
+        with gzip.open(self.vcf, "wt") as vcf_file:
+            vcf_file.write(VCF.split("8\t")[0])
+        self.assertEqual(dbsnp_index.build_index(self.vcf, self.path), 0)
+        self.assertListEqual(
+            dbsnp_index.DbSNPIndex(self.path).lookup("rs1"), []
+        )
+
+    def test_resolver(self):
+        dbsnp_index.build_index(self.vcf, self.path)
+        resolver = dbsnp_index.DbSNPResolver()
+        mutalyzer = mock.Mock()
+        with mock.patch.object(dbsnp_index, "MUTALYZER_INST", mutalyzer):
+            resolver.configure(index_path=self.path)
+            self.assertListEqual(
+                resolver.get_db_snp_descriptions("rs11"),
+                ["NC_000002.11:g.301_302delinsTT"]
+            )
+            mutalyzer.get_db_snp_descriptions.assert_not_called()
+
+            resolver.configure(
+                index_path=os.path.join(self.tmp_dir.name, "missing")
+            )
+            resolver.get_db_snp_descriptions("rs11")
+            mutalyzer.get_db_snp_descriptions.assert_called_once_with("rs11")
@@ -0,0 +1,79 @@
+'''HGVS parse memo tests.'''
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import hgvs.exceptions
+
+from lib.model import hgvs_memo
+
+
+class ParseStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "parses.sqlite")
+
+    def test_version(self):
+        store = hgvs_memo.ParseStore(self.path, version="1")
+        store.put("NM_1.1:c.1A>G", None, b"variant")
+        store.put("NM_1.1:c.1AG", "error", None)
+        same = hgvs_memo.ParseStore(self.path, version="1")
+        self.assertTupleEqual(same.get("NM_1.1:c.1A>G"), (None, b"variant"))
+        self.assertTupleEqual(same.get("NM_1.1:c.1AG"), ("error", None))
+        changed = hgvs_memo.ParseStore(self.path, version="2")
+        self.assertIsNone(changed.get("NM_1.1:c.1A>G"))
+
+
+class HGVSMemoTest(unittest.TestCase):
+
+    def setUp(self):
+        self.memo = hgvs_memo.HGVSMemo()
+        self.memo.configure(max_size=2)
+
+    def test_clean(self):
+        self.assertEqual(
+            self.memo.clean("NM_000088.3(COL1A1): c.589G<T"),
+            "NM_000088.3:c.589G>T"
+        )
+        self.assertEqual(
+            self.memo.clean("NM_000088.3(COL1A1): c.589G<T"),
+            "NM_000088.3:c.589G>T"
+        )
+
+    def test_new_objects(self):
+        first = self.memo.parse("NM_000088.3:c.589G>T")
+        first.ac = "NM_000088.4"
+        second = self.memo.parse("NM_000088.3:c.589G>T")
+        self.assertEqual(str(second), "NM_000088.3:c.589G>T")
+        self.assertEqual((self.memo.hits, self.memo.misses), (1, 1))
+
+    def test_parse_error(self):
+        for _ in range(2):
+            with self.assertRaises(hgvs.exceptions.HGVSParseError):
+                self.memo.parse("NM_000088.3:c.589GT")
+        self.assertEqual((self.memo.hits, self.memo.misses), (1, 1))
+
+    def test_bounded(self):
+        for position in range(1, 4):
+            self.memo.parse("NM_000088.3:c.{}G>T".format(position))
+        self.assertListEqual(
+            list(self.memo._parsed),
+            ["NM_000088.3:c.2G>T", "NM_000088.3:c.3G>T"]
+        )
+
+    def test_persist(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, \
+                mock.patch.object(hgvs_memo, "CACHE_DIR", tmp_dir):
+            self.memo.configure(persist=True)
+            variant = self.memo.parse("NM_000088.3:c.589G>T")
+            other = hgvs_memo.HGVSMemo()
+            other.configure(persist=True)
+            parser = mock.Mock()
+            with mock.patch("lib.model.hgvs_parser.HGVS_PARSER", parser):
+                self.assertEqual(
+                    str(other.parse("NM_000088.3:c.589G>T")), str(variant)
+                )
+                parser.parse_hgvs_variant.assert_not_called()
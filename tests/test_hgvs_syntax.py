@@ -0,0 +1,59 @@
+'''HGVS syntax check tests.'''
+import unittest
+from unittest import mock
+
+from lib import hgvs_syntax
+
+
+class LocalSyntaxTest(unittest.TestCase):
+
+    def setUp(self):
+        self.checker = hgvs_syntax.SyntaxChecker()
+        self.checker.configure(backend="local")
+
+    def test_valid(self):
+        self.assertDictEqual(
+            self.checker.check_syntax("NM_000088.3:c.589G>T"),
+            {"valid": True, "messages": {"SoapMessage": []}}
+        )
+
+    def test_invalid(self):
+        results = self.checker.check_syntax_many([
+            "NM_000088.3:c.589G>T", "NM_000088.3:c.589GT",
+            "NM_000088.3:c.589_587del",
+        ])
+        self.assertTrue(results["NM_000088.3:c.589G>T"]["valid"])
+        parse_error = results["NM_000088.3:c.589GT"]
+        self.assertFalse(parse_error["valid"])
+        self.assertEqual(
+            parse_error["messages"]["SoapMessage"][0]["errorcode"], "EPARSE"
+        )
+        invalid = results["NM_000088.3:c.589_587del"]
+        self.assertFalse(invalid["valid"])
+        self.assertEqual(
+            invalid["messages"]["SoapMessage"][0]["errorcode"], "EINVALID"
+        )
+
+    def test_no_requests(self):
+        mutalyzer = mock.Mock()
+        with mock.patch.object(hgvs_syntax, "MUTALYZER_INST", mutalyzer):
+            self.checker.check_syntax_many(["NM_000088.3:c.589G>T"])
+            mutalyzer.check_syntax_many.assert_not_called()
+
+
+class SyntaxCheckerTest(unittest.TestCase):
+
+    def test_mutalyzer_backend(self):
+        checker = hgvs_syntax.SyntaxChecker()
+        checker.configure()
+        mutalyzer = mock.Mock()
+        with mock.patch.object(hgvs_syntax, "MUTALYZER_INST", mutalyzer):
+            mutalyzer.check_syntax_many.return_value = {"NM_1.1:c.1A>G": None}
+            self.assertIsNone(checker.check_syntax("NM_1.1:c.1A>G"))
+            mutalyzer.check_syntax_many.assert_called_once_with(
+                ["NM_1.1:c.1A>G"]
+            )
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            hgvs_syntax.SyntaxChecker().configure(backend="remote")
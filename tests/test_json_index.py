@@ -0,0 +1,51 @@
+'''Json file index tests.'''
+import os
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+from lib.model import json_index
+
+
+class JsonFileIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.cases = os.path.join(self.tmp_dir.name, "cases")
+        os.makedirs(self.cases)
+        self.paths = []
+        for case_id in range(3):
+            path = os.path.join(self.cases, "{}.json".format(case_id))
+            with open(path, "w") as json_file:
+                json.dump({"case_id": case_id}, json_file)
+            self.paths.append(path)
+        self.index = json_index.JsonFileIndex()
+
+    def test_exists(self):
+        missing = os.path.join(self.tmp_dir.name, "corrected", "0.json")
+        self.index.prefetch(self.paths + [missing])
+        with mock.patch("os.path.exists") as exists:
+            self.assertTrue(self.index.exists(self.paths[0]))
+            self.assertFalse(self.index.exists(missing))
+            exists.assert_not_called()
+
+    def test_prefetch(self):
+        self.index.prefetch(self.paths, threads=2)
+        expected = {"case_id": 1}
+        with mock.patch("builtins.open") as json_open:
+            self.assertDictEqual(self.index.peek(self.paths[1]), expected)
+            self.assertDictEqual(self.index.load(self.paths[1]), expected)
+            json_open.assert_not_called()
+        # prefetched data is handed out only once
+        self.assertIsNone(self.index.peek(self.paths[1]))
+        self.assertDictEqual(self.index.load(self.paths[1]), expected)
+
+    def test_invalid_json(self):
+        with open(self.paths[2], "w") as json_file:
+            json_file.write("{")
+        self.index.prefetch(self.paths)
+        self.assertIsNone(self.index.peek(self.paths[2]))
+        with self.assertRaises(ValueError):
+            self.index.load(self.paths[2])
@@ -3,6 +3,7 @@ Test loading of jsons from new-style json files.
 '''
 import os
 import unittest
+from unittest import mock
 from lib import errorfixer
 from lib.model import json_parser, config
 from lib.api import mutalyzer, omim, phenomizer, face2gene
@@ -93,3 +94,107 @@ class JsonLoadingTest(BaseMapping):
         models = self.loaded_error.get_variants(self.error_fixer)
         variants = [str(v) for m in models for v in m.variants]
         self.assertListEqual(variants, [])
+
+
+class SchemaValidatorTest(unittest.TestCase):
+    '''Compiled schema validators report failures only.'''
+
+    schema = {
+        'submitter': {'team': '', 'name': ''},
+        'geneList': [{'gestalt_score': ''}],
+        'vcf': '',
+    }
+
+    def test_valid(self):
+        validate = json_parser.compile_schema(self.schema)
+        self.assertListEqual(validate({
+            'submitter': {'team': 'a', 'name': 'b'},
+            'geneList': [{'gestalt_score': 0.1}],
+            'vcf': [],
+        }), [])
+
+    def test_failures(self):
+        validate = json_parser.compile_schema(self.schema)
+        self.assertListEqual(validate({
+            'submitter': {'team': 'a', 'name': None},
+            'geneList': [{'gestalt_score': 0.1}, {}],
+        }), [
+            ('/submitter/name', 'No value'),
+            ('/geneList[]/gestalt_score', 'No key'),
+            ('/vcf', 'No key'),
+        ])
+
+    def test_old_json_validator(self):
+        self.assertIs(
+            json_parser.OldJson.get_validator(),
+            json_parser.OldJson.get_validator()
+        )
+
+
+class MemoizeCheckTest(unittest.TestCase):
+    '''Check results are shared by positional and keyword calls.'''
+
+    class Checked:
+        def __init__(self):
+            self.calls = 0
+
+        @json_parser.memoize_check
+        def check(self, convert_failed: bool) -> bool:
+            self.calls += 1
+            return not convert_failed
+
+    def test_positional_and_keyword(self):
+        checked = self.Checked()
+        self.assertTrue(checked.check(False))
+        self.assertTrue(checked.check(convert_failed=False))
+        self.assertEqual(checked.calls, 1)
+        self.assertFalse(checked.check(convert_failed=True))
+        self.assertFalse(checked.check(True))
+        self.assertEqual(checked.calls, 2)
+
+
+class SyndromeTableTest(unittest.TestCase):
+    '''Syndrome tables are built from suggested and selected records.'''
+
+    def setUp(self):
+        omim_obj = mock.Mock()
+        omim_obj.replace_deprecated_many.side_effect = lambda ids: [
+            [str(i)] if not isinstance(i, list) else sorted(i) for i in ids
+        ]
+        patcher = mock.patch.object(json_parser, "OMIM_INST", omim_obj)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.suggested = [
+            {"omim_id": ["100002", "100001"], "syndrome_name": "A",
+             "gestalt_score": 0.5, "has_mask": False},
+            {"omim_id": "100003", "syndrome_name": "B",
+             "gestalt_score": 0.1, "has_mask": True},
+        ]
+
+    def test_no_selected(self):
+        table = json_parser.create_syndrome_table(self.suggested, [])
+        self.assertListEqual(
+            table["omim_id"].tolist(), [100001, 100002, 100003]
+        )
+        self.assertListEqual(table.index.tolist(), [0, 0, 1])
+        self.assertFalse(table["confirmed"].any())
+
+    def test_selected(self):
+        selected = [
+            {"omim_id": "100002", "syndrome_name": "A", "has_mask": False,
+             "diagnosis": "MOLECULARLY_DIAGNOSED"},
+            {"omim_id": [], "syndrome_name": "C", "has_mask": False,
+             "diagnosis": "DIFFERENTIAL_DIAGNOSIS"},
+        ]
+        table = json_parser.create_syndrome_table(self.suggested, selected)
+        self.assertListEqual(
+            table["omim_id"].tolist(), [0, 100001, 100002, 100003]
+        )
+        self.assertListEqual(
+            table["confirmed"].tolist(), [False, False, True, False]
+        )
+        self.assertIs(table["differential"][0], True)
+        # rows missing in one of the joined tables count as masked
+        self.assertListEqual(
+            table["has_mask"].tolist(), [True, True, False, True]
+        )
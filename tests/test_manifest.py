@@ -0,0 +1,169 @@
+'''Case manifest tests.'''
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import pedia
+from lib import manifest
+
+
+class CaseManifestTest(unittest.TestCase):
+
+    fingerprint = {
+        "files": {"cases/123.json": "abc"},
+        "hgvs_errors": {},
+        "omim": {"mim2gene": "def"},
+    }
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "case_manifest.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_empty(self):
+        case_manifest = manifest.CaseManifest(self.path)
+        self.assertFalse(case_manifest.is_current("123", self.fingerprint))
+
+    def test_persistence(self):
+        case_manifest = manifest.CaseManifest(self.path)
+        case_manifest.update("123", self.fingerprint, {"passed": ""})
+        case_manifest.save()
+
+        loaded = manifest.CaseManifest(self.path)
+        self.assertTrue(loaded.is_current("123", self.fingerprint))
+        self.assertDictEqual(loaded.get_entries("123"), {"passed": ""})
+
+    def test_changed_input(self):
+        case_manifest = manifest.CaseManifest(self.path)
+        case_manifest.update("123", self.fingerprint, None)
+        changed = dict(self.fingerprint, files={"cases/123.json": "xyz"})
+        self.assertFalse(case_manifest.is_current("123", changed))
+
+
+class IncrementalRunTest(unittest.TestCase):
+    '''Reuse of cases saved by runs with and without --filter-failed.'''
+
+    fingerprint = CaseManifestTest.fingerprint
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.config_data = SimpleNamespace(output={
+            "converted_path": os.path.join(self.tmp_dir.name, "converted"),
+            "valid_case_path": os.path.join(self.tmp_dir.name, "checked"),
+        })
+        os.makedirs(self.config_data.output["converted_path"])
+        self.write_output("converted_path")
+        self.case_manifest = manifest.CaseManifest(
+            os.path.join(self.tmp_dir.name, "case_manifest.json")
+        )
+        self.json_obj = mock.Mock(**{"get_case_id.return_value": "123"})
+        patcher = mock.patch.object(
+            manifest, "case_fingerprint", return_value=self.fingerprint
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_output(self, path_name):
+        with open(os.path.join(
+                self.config_data.output[path_name], "123.json"
+        ), "w") as output_file:
+            output_file.write("{}")
+
+    def filter_unchanged(self, filter_failed):
+        changed, _, reused = pedia.filter_unchanged(
+            self.config_data, [self.json_obj], self.case_manifest,
+            filter_failed
+        )
+        return changed, reused
+
+    def test_without_then_with_filter_failed(self):
+        # runs converting all cases save no quality check entries
+        self.case_manifest.update("123", self.fingerprint, None)
+        self.assertDictEqual(self.filter_unchanged(False)[1], {"123": None})
+        changed, reused = self.filter_unchanged(True)
+        self.assertListEqual(changed, [self.json_obj])
+        self.assertDictEqual(reused, {})
+
+    def test_passed_case_output(self):
+        self.case_manifest.update("123", self.fingerprint, {"passed": ""})
+        self.assertListEqual(self.filter_unchanged(True)[0], [self.json_obj])
+        os.makedirs(self.config_data.output["valid_case_path"])
+        self.write_output("valid_case_path")
+        self.assertDictEqual(
+            self.filter_unchanged(True)[1], {"123": {"passed": ""}}
+        )
+
+    def test_quality_check_output(self):
+        # passing cases are copied from the converted jsons on disk
+        self.config_data.output["create_log"] = True
+        self.config_data.output["quality_check_log"] = os.path.join(
+            self.tmp_dir.name, "qc_log.json"
+        )
+        qc_case = SimpleNamespace(case_id="123")
+        sections = {"passed": {"123": ""}, "failed": {}, "vcf_failed": {}}
+        with mock.patch.object(
+                pedia.quality_check, "qc_case_sections",
+                return_value=sections
+        ):
+            stats, qc_passed, qc_output = pedia.quality_check_cases(
+                self.config_data, [((True, []), qc_case)], True, {}
+            )
+        self.assertDictEqual(stats, {"pass": 1, "fail": 0})
+        self.assertDictEqual(qc_passed, {"123": qc_case})
+        entries = pedia.quality_check.case_entries_from_log(
+            qc_output, "123"
+        )
+        self.case_manifest.update("123", self.fingerprint, entries)
+        self.assertDictEqual(
+            self.filter_unchanged(True)[1], {"123": {"passed": ""}}
+        )
+
+
+class VcfManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.vcf_path = os.path.join(self.tmp_dir.name, "123.vcf.gz")
+        with open(self.vcf_path, "wb") as vcf_file:
+            vcf_file.write(b"vcf")
+        self.hgvs_hash = manifest.get_hgvs_hash(["NM_1.1:c.1A>G"])
+
+    def test_hgvs_hash(self):
+        self.assertEqual(
+            manifest.get_hgvs_hash(["b", "a", "b"]),
+            manifest.get_hgvs_hash(["a", "b"])
+        )
+
+    def test_persistence(self):
+        vcf_manifest = manifest.VcfManifest(self.tmp_dir.name)
+        self.assertFalse(
+            vcf_manifest.is_current("123", self.hgvs_hash, self.vcf_path)
+        )
+        vcf_manifest.update("123", self.hgvs_hash, self.vcf_path)
+
+        loaded = manifest.VcfManifest(self.tmp_dir.name)
+        self.assertEqual(loaded.get_hgvs_hash("123"), self.hgvs_hash)
+        self.assertTrue(
+            loaded.is_current("123", self.hgvs_hash, self.vcf_path)
+        )
+        self.assertFalse(loaded.is_current("123", "other", self.vcf_path))
+
+    def test_changed_vcf(self):
+        vcf_manifest = manifest.VcfManifest(self.tmp_dir.name)
+        vcf_manifest.update("123", self.hgvs_hash, self.vcf_path)
+        # touched file with identical content is still current
+        os.utime(self.vcf_path, (0, 0))
+        self.assertTrue(
+            vcf_manifest.is_current("123", self.hgvs_hash, self.vcf_path)
+        )
+        with open(self.vcf_path, "wb") as vcf_file:
+            vcf_file.write(b"changed")
+        self.assertFalse(
+            vcf_manifest.is_current("123", self.hgvs_hash, self.vcf_path)
+        )
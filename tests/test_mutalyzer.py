@@ -1,6 +1,8 @@
 '''Mutalyzer API Unittests '''
 import os
+import tempfile
 import unittest
+from unittest import mock
 
 import hgvs.parser
 
@@ -91,3 +93,66 @@ class MutalyzerTest(BaseMapping):
         self.mutalyzer.correct_transcripts(hgvs_strings)
         hgvs_strings = {k: str(v[0]) for k, v in hgvs_strings.items()}
         self.assertDictEqual(hgvs_strings, hgvs_strings_corr)
+
+
+class SyntaxCacheTest(unittest.TestCase):
+    '''Syntax verdicts are requested once and saved persistently.'''
+
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        patcher = mock.patch.object(mutalyzer, "CACHE_DIR", tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.service = mock.Mock()
+        self.service.checkSyntax.side_effect = lambda h: {
+            "valid": "del" not in h,
+            "messages": {"SoapMessage": [
+                {"errorcode": "EPARSE", "message": "error", "other": ""}
+            ]},
+        }
+        # service is a read-only property of zeep clients
+        patcher = mock.patch.object(
+            mutalyzer.Mutalyzer, "service", new_callable=mock.PropertyMock,
+            return_value=self.service
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_mutalyzer(self):
+        obj = mutalyzer.Mutalyzer.__new__(mutalyzer.Mutalyzer)
+        obj._syntax_cache = obj._load_syntax_cache()
+        return obj
+
+    def test_cached_verdicts(self):
+        hgvs_strings = ["NM_1.1:c.1A>G", "NM_1.1:c.2del", "NM_1.1:c.1A>G"]
+        results = self.create_mutalyzer().check_syntax_many(hgvs_strings)
+        self.assertTrue(results["NM_1.1:c.1A>G"]["valid"])
+        self.assertDictEqual(results["NM_1.1:c.2del"], {
+            "valid": False,
+            "messages": {"SoapMessage": [
+                {"errorcode": "EPARSE", "message": "error"}
+            ]},
+        })
+        self.assertEqual(self.service.checkSyntax.call_count, 2)
+
+        # a new instance answers from the saved cache
+        self.service.checkSyntax.reset_mock()
+        self.assertDictEqual(
+            self.create_mutalyzer().check_syntax_many(hgvs_strings), results
+        )
+        self.service.checkSyntax.assert_not_called()
+
+    def test_corrupt_line(self):
+        self.create_mutalyzer().check_syntax_many(["NM_1.1:c.1A>G"])
+        path = self.create_mutalyzer()._get_syntax_cache_path()
+        with open(path, "a") as cache_file:
+            # line of an interrupted write and line of the wrong shape
+            cache_file.write('["NM_1.1:c.2del", {"valid"\n["NM_1.1"]\n')
+        obj = self.create_mutalyzer()
+        self.assertListEqual(list(obj._syntax_cache), ["NM_1.1:c.1A>G"])
+
+        self.service.checkSyntax.reset_mock()
+        results = obj.check_syntax_many(["NM_1.1:c.1A>G", "NM_1.1:c.2del"])
+        self.assertFalse(results["NM_1.1:c.2del"]["valid"])
+        self.service.checkSyntax.assert_called_once_with("NM_1.1:c.2del")
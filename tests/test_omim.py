@@ -1,7 +1,10 @@
 import os
 import unittest
 
+import pandas
+
 from tests.test_config import BaseConfig
+from tests.test_case_batch import create_omim
 from lib.api import omim
 from lib.model import config
 
@@ -93,3 +96,36 @@ class OmimTest(BaseConfig):
             with self.subTest(i=test):
                 res = self.omim.mim_pheno_to_syndrome_name(test)
                 self.assertEqual(res, correct)
+
+
+class OmimTableTest(unittest.TestCase):
+    '''Table lookups on a small synthetic omim mapping.'''
+
+    def setUp(self):
+        self.omim = create_omim()
+
+    def test_pheno_to_gene_table(self):
+        table = self.omim.mim_pheno_to_gene_table(
+            pandas.Series(["100001", "100002", "100009"], index=[5, 6, 7])
+        )
+        self.assertListEqual(list(table["row"]), [5, 5, 6])
+        for row, pheno in [(5, "100001"), (6, "100002")]:
+            with self.subTest(pheno=pheno):
+                self.assertListEqual(
+                    table.loc[table["row"] == row, [
+                        "gene_id", "gene_symbol", "gene_omim_id"
+                    ]].to_dict("records"),
+                    list(self.omim.mim_pheno_to_gene(pheno).values())
+                )
+
+    def test_pheno_to_ps(self):
+        result = self.omim.omim_ids_to_phenotypic_series(
+            pandas.Series([100001, 100003, 100002])
+        )
+        self.assertListEqual(list(result), ["PS100001", "PS100001", "100002"])
+        for omim_id, ps_id in zip(["100001", "100003", "100002"], result):
+            with self.subTest(omim_id=omim_id):
+                self.assertEqual(
+                    self.omim.omim_id_to_phenotypic_series(omim_id),
+                    ps_id if ps_id.startswith("PS") else ""
+                )
@@ -0,0 +1,65 @@
+'''Service creation of the pipeline with the local syntax check.'''
+import unittest
+from unittest import mock
+
+import pedia
+from lib.singleton import LazyInstance
+
+
+class UnavailableService:
+
+    def __init__(self):
+        raise RuntimeError("No network access")
+
+
+class Model:
+
+    def __init__(self, corrected=False):
+        self.variants = ["NM_000088.3:c.589G>T"]
+        self.corrected = corrected
+
+
+class Case:
+
+    def __init__(self, models):
+        self.hgvs_models = models
+
+
+class LocalSyntaxServicesTest(unittest.TestCase):
+
+    def setUp(self):
+        syntax_checker = mock.Mock(backend="local")
+        unavailable = LazyInstance(__name__, "UnavailableService")
+        for name, value in [
+                ("MUTALYZER_INST", unavailable),
+                ("HGVS_SYNTAX_INST", syntax_checker),
+                ("OMIM_INST", mock.Mock()),
+                ("ERRORFIXER_INST", mock.Mock()),
+                ("HGVS_PARSER", mock.Mock()),
+        ]:
+            patcher = mock.patch.object(pedia, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.syntax_checker = syntax_checker
+
+    def test_init_worker(self):
+        self.assertNotIn(pedia.MUTALYZER_INST, pedia.get_worker_instances())
+        with mock.patch.object(pedia, "load_instance") as load:
+            pedia.init_worker()
+        self.assertEqual(load.call_count, 3)
+
+    def test_correct_transcripts(self):
+        with self.assertLogs("lib", level="WARNING"):
+            pedia.correct_transcripts([Case([Model()])])
+
+    def test_nothing_to_correct(self):
+        with mock.patch.object(pedia, "load_instance") as load:
+            pedia.correct_transcripts([Case([Model(corrected=True)])])
+            load.assert_not_called()
+
+    def test_mutalyzer_backend(self):
+        self.syntax_checker.backend = "mutalyzer"
+        with self.assertRaises(RuntimeError):
+            pedia.init_worker()
+        with self.assertRaises(RuntimeError):
+            pedia.correct_transcripts([Case([Model()])])
@@ -0,0 +1,82 @@
+'''Phenomization cache tests.'''
+import os
+import tempfile
+import unittest
+
+import numpy
+import pandas
+
+from lib.api import phenomization_cache
+
+
+def create_scores(size=3):
+    return pandas.DataFrame({
+        "disease-name_pheno": ["Syndrome {}".format(i) for i in range(size)],
+        "value_pheno": numpy.linspace(0.1, 0.9, size),
+        "gene-id": ["10{}".format(i) for i in range(size - 1)] + [numpy.nan],
+        "value_boqa": [numpy.nan] + [0.5] * (size - 1),
+    }, index=pandas.Index(
+        ["10000{}".format(i) for i in range(size)], name="disease-id"
+    ))
+
+
+class PhenomizationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.path = os.path.join(self.tmp_dir.name, "scores.sqlite")
+
+    def test_normalize_terms(self):
+        self.assertTupleEqual(
+            phenomization_cache.normalize_terms(
+                ["HP:2", "HP:0000006", "HP:1", "HP:2"]
+            ),
+            ("HP:1", "HP:2")
+        )
+
+    def test_roundtrip(self):
+        scores = create_scores()
+        pandas.testing.assert_frame_equal(
+            phenomization_cache.decode_scores(
+                phenomization_cache.encode_scores(scores)
+            ),
+            scores
+        )
+
+    def test_equivalent_terms(self):
+        cache = phenomization_cache.PhenomizationCache(self.path, 2 ** 20)
+        cache.put(["HP:2", "HP:1"], create_scores())
+        self.assertIn(["HP:1", "HP:2", "HP:1", "HP:0000006"], cache)
+        self.assertNotIn(["HP:1"], cache)
+        pandas.testing.assert_frame_equal(
+            cache.get(["HP:1", "HP:2"]), create_scores()
+        )
+
+    def test_eviction(self):
+        size = len(phenomization_cache.encode_scores(create_scores()))
+        cache = phenomization_cache.PhenomizationCache(
+            self.path, int(size * 2.5)
+        )
+        cache.put(["HP:1"], create_scores())
+        cache.put(["HP:2"], create_scores())
+        # access makes HP:1 the most recently used entry
+        cache.get(["HP:1"])
+        cache.put(["HP:3"], create_scores())
+        self.assertIn(["HP:1"], cache)
+        self.assertNotIn(["HP:2"], cache)
+        self.assertIn(["HP:3"], cache)
+
+    def test_version(self):
+        cache = phenomization_cache.PhenomizationCache(
+            self.path, 2 ** 20, version="1"
+        )
+        cache.put(["HP:1"], create_scores())
+        same = phenomization_cache.PhenomizationCache(
+            self.path, 2 ** 20, version="1"
+        )
+        self.assertIn(["HP:1"], same)
+        changed = phenomization_cache.PhenomizationCache(
+            self.path, 2 ** 20, version="2"
+        )
+        self.assertNotIn(["HP:1"], changed)
@@ -0,0 +1,84 @@
+'''Checkpoint store tests.'''
+import os
+import pickle
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import pickler
+from lib.utils import SlotState
+
+
+class Record(SlotState):
+
+    __slots__ = ("value", "lazy")
+
+    legacy_fields = {"old_value": "value"}
+
+    def __init__(self, value):
+        self.value = value
+        self.lazy = None
+
+
+class NewerRecord(Record):
+
+    __slots__ = ()
+
+    format_version = Record.format_version + 1
+
+
+class CheckpointStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = pickler.CheckpointStore(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip(self):
+        records = [("123", {"a": 1}), ("124", {"b": 2})]
+        self.store.save_all("stage", records)
+        self.assertCountEqual(self.store.case_ids("stage"), ["123", "124"])
+        self.assertDictEqual(self.store.load_record("stage", "124"), {"b": 2})
+
+    def test_subset(self):
+        self.store.save_all("stage", [("123", 1), ("124", 2), ("125", 3)])
+        self.assertListEqual(self.store.load("stage", ["125", "123"]), [3, 1])
+
+    def test_broken_record(self):
+        self.store.save_all("stage", [("123", 1), ("124", 2)])
+        with open(os.path.join(self.tmp_dir.name, "stage", "124.p.gz"),
+                  "wb") as broken:
+            broken.write(b"broken")
+        self.assertListEqual(self.store.load("stage"), [1])
+
+    def test_missing_stage(self):
+        self.assertListEqual(self.store.load("stage"), [])
+
+    def test_newer_format(self):
+        self.store.save_all("stage", [("123", Record(1)), ("124", 2)])
+        # records saved by a newer format are skipped like broken records
+        with mock.patch.object(Record, "format_version", 0):
+            self.assertListEqual(self.store.load("stage", ["123", "124"]), [2])
+
+
+class SlotStateTest(unittest.TestCase):
+
+    def test_roundtrip(self):
+        record = pickle.loads(pickle.dumps(Record([1, 2])))
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertListEqual(record.value, [1, 2])
+        self.assertIsNone(record.lazy)
+
+    def test_legacy_state(self):
+        record = Record.__new__(Record)
+        record.__setstate__({"old_value": 3})
+        self.assertEqual(record.value, 3)
+        self.assertIsNone(record.lazy)
+
+    def test_newer_state(self):
+        state = NewerRecord(4).__getstate__()
+        record = Record.__new__(Record)
+        with self.assertRaises(pickle.UnpicklingError):
+            record.__setstate__(state)
@@ -0,0 +1,43 @@
+'''Profiling tests.'''
+import unittest
+
+from lib import profiling
+
+
+class ProfilerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.profiler = profiling.Profiler()
+
+    def test_disabled_stage(self):
+        with self.profiler.stage("create_cases"):
+            pass
+        self.assertDictEqual(dict(self.profiler.stages), {})
+
+    def test_stage(self):
+        self.profiler.enable()
+        for _ in range(2):
+            with self.profiler.stage("create_cases"):
+                pass
+        self.assertEqual(self.profiler.stages["create_cases"]["calls"], 2)
+
+    def test_latency_bucket(self):
+        tests = [
+            (0.0005, "1"),
+            (0.2, "500"),
+            (20, "inf"),
+        ]
+        for seconds, bucket in tests:
+            with self.subTest(i=seconds):
+                self.assertEqual(profiling.latency_bucket(seconds), bucket)
+
+    def test_merge_services(self):
+        self.profiler.add_service_call("mutalyzer", 0.2)
+        self.profiler.add_service_request("mutalyzer", True)
+        services = self.profiler.pop_services()
+        self.profiler.merge_services(services)
+        self.profiler.merge_services(services)
+        stats = self.profiler.services["mutalyzer"]
+        self.assertEqual(stats["calls"], 2)
+        self.assertEqual(stats["cache_hits"], 2)
+        self.assertEqual(stats["latency_ms"]["500"], 2)
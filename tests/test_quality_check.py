@@ -0,0 +1,95 @@
+'''Quality check tests.'''
+import unittest
+from unittest import mock
+
+from lib import quality_check, constants
+from tests.test_case_batch import Case, CaseBatchTest, syndrome
+
+
+NORMAL = constants.NEGATIVE_RESULTS[0]
+
+
+class Model:
+
+    def __init__(self, gene_id, variants=1, result="ANALYSIS"):
+        self.gene = {"gene_id": gene_id}
+        self.variants = ["variant"] * variants
+        self.result = result
+
+
+class QCCase(Case):
+
+    def __init__(self, case_id, syndromes, models, simulated_vcf="a.vcf"):
+        super().__init__(case_id, ["HP:1"], syndromes)
+        self.hgvs_models = models
+        self.simulated_vcf = simulated_vcf
+
+    def check_vcf(self):
+        if isinstance(self.simulated_vcf, str):
+            return False, [{"type": "VCF_ERROR", "data": self.simulated_vcf}]
+        return True, []
+
+
+class QualityCheckTest(unittest.TestCase):
+
+    setUp = CaseBatchTest.setUp
+
+    @staticmethod
+    def create_qc_cases():
+        diagnosis = [
+            syndrome(100001, "Syndrome A", 0.9, confirmed=True),
+            syndrome(0, "Syndrome C", differential=True),
+        ]
+        cases = [
+            QCCase("1", diagnosis, [Model("101")], simulated_vcf=None),
+            QCCase("2", diagnosis[:1], [Model("102", 2, NORMAL)]),
+            QCCase("3", diagnosis, [Model("101")]),
+            QCCase("4", diagnosis[:1], [
+                Model("101", 2, NORMAL), Model("999", 3, NORMAL)
+            ], simulated_vcf=[]),
+        ]
+        results = [(True, []), (True, []), (False, [{"type": "X"}]),
+                   (True, [])]
+        return list(zip(results, cases))
+
+    def test_sections(self):
+        sections = quality_check.qc_case_sections(self.create_qc_cases())
+        self.assertListEqual(list(sections), quality_check.QC_SECTIONS)
+        self.assertDictEqual(
+            sections["failed"], {"3": (False, [{"type": "X"}])}
+        )
+        self.assertListEqual(list(sections["multi_no_omim"]), ["1", "3"])
+        self.assertListEqual(
+            [d["omim_id"] for d in sections["multi_no_omim"]["1"]],
+            [0, 100001]
+        )
+        self.assertDictEqual(sections["vcf_failed"], {
+            "2": (False, [{"type": "VCF_ERROR", "data": "a.vcf"}])
+        })
+        self.assertDictEqual(sections["benign_excluded"], {"4": 5})
+        self.assertDictEqual(
+            sections["pathogenic_missing"],
+            {"4": [(True, "101"), (False, "999")]}
+        )
+        self.assertDictEqual(sections["passed"], {"1": "", "4": ""})
+
+    def test_no_variants(self):
+        qc_case = QCCase(
+            "5", [syndrome(100001, "Syndrome A", 0.9, confirmed=True)], [],
+            simulated_vcf=None
+        )
+        sections = quality_check.qc_case_sections([((True, []), qc_case)])
+        self.assertDictEqual(sections["pathogenic_missing"], {})
+        self.assertDictEqual(sections["passed"], {"5": ""})
+
+    def test_case_entries(self):
+        qc_cases = self.create_qc_cases()
+        sections = quality_check.qc_case_sections(qc_cases)
+        for qc_result, case_obj in self.create_qc_cases():
+            with self.subTest(case_id=case_obj.case_id):
+                self.assertDictEqual(
+                    quality_check.case_qc_entries(qc_result, case_obj),
+                    quality_check.case_entries_from_log(
+                        sections, case_obj.case_id
+                    )
+                )
@@ -0,0 +1,38 @@
+'''Lazy singleton tests.'''
+import sys
+import json
+import subprocess
+import unittest
+
+from lib.singleton import LazyInstance
+
+
+class LazyInstanceTest(unittest.TestCase):
+
+    def test_created_on_first_use(self):
+        lazy = LazyInstance("collections", "OrderedDict")
+        self.assertIsNone(object.__getattribute__(lazy, "_instance"))
+        lazy["a"] = 1
+        self.assertIn("a", lazy)
+        self.assertEqual(lazy["a"], 1)
+        self.assertListEqual(list(lazy.keys()), ["a"])
+
+    def test_setattr_forwarded(self):
+        lazy = LazyInstance("argparse", "Namespace")
+        lazy.value = 1
+        self.assertEqual(
+            object.__getattribute__(lazy, "_instance").value, 1
+        )
+
+    def test_no_service_imports(self):
+        '''Importing the singletons must not import service dependencies.'''
+        heavy = ["zeep", "boto3", "requests_cache", "snakemake", "lib.api"]
+        output = subprocess.check_output([
+            sys.executable, "-c",
+            "import sys, json\n"
+            "import lib.global_singletons, lib.quality_check\n"
+            "print(json.dumps([m for m in {} if m in sys.modules]))".format(
+                json.dumps(heavy)
+            )
+        ])
+        self.assertListEqual(json.loads(output.decode("utf-8")), [])
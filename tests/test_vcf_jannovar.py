@@ -1,7 +1,13 @@
+import io
 import os
+import unittest
+from unittest import mock
+
+import pandas
 
 from lib import vcf_jannovar, vcf_operations
 from lib.api import jannovar
+from lib.model import case
 from tests.test_config import BaseConfig
 
 
@@ -77,3 +83,123 @@ class JannovarTest(BaseConfig):
 
     def test_server_connect(self):
         self.assertTrue(self.jannovar.can_connect())
+
+
+class SplitJannovarTest(unittest.TestCase):
+
+    cases = [
+        ("1", "homozygous", ["NM_1.1:c.1A>G", "NM_1.1:c.5A>G"]),
+        ("2", "heterozygous", ["NM_2.1:c.3del"]),
+    ]
+
+    vcf_text = (
+        "#CHROM\tPOS\tID\tREF\tALT\tQUAL\tFILTER\tINFO\tFORMAT\tSAMPLE\n"
+        "1\t200\t.\tA\tG\t.\t.\t.\tGT\t0/1\n"
+        "1\t100\t.\tA\tG\t.\t.\t.\tGT\t0/1\n"
+        "2\t300\t.\tAT\tA\t.\t.\t.\tGT\t0/1\n"
+    )
+
+    def test_split(self):
+        tables = vcf_jannovar.split_jannovar_vcf(
+            io.StringIO(self.vcf_text), self.cases
+        )
+        self.assertListEqual(list(tables["1"]["POS"]), [100, 200])
+        self.assertListEqual(list(tables["1"]["1"]), ["1/1", "1/1"])
+        self.assertListEqual(
+            vcf_jannovar.get_hgvs_codes(tables["2"]), ["NM_2.1:c.3del"]
+        )
+
+    def test_error(self):
+        vcf_text = self.vcf_text.replace(
+            "AT\tA\t.\t.", "AT\t<ERROR>\t.\tfail"
+        )
+        tables = vcf_jannovar.split_jannovar_vcf(
+            io.StringIO(vcf_text), self.cases
+        )
+        self.assertIsInstance(tables["1"], pandas.DataFrame)
+        self.assertIsInstance(tables["2"], str)
+
+    def test_record_mismatch(self):
+        with self.assertLogs("lib.vcf_jannovar", level="WARNING"):
+            tables = vcf_jannovar.split_jannovar_vcf(
+                io.StringIO(self.vcf_text), self.cases[:1]
+            )
+        self.assertDictEqual(tables, {"1": None})
+
+    def test_failed_run(self):
+        with mock.patch.object(
+                vcf_jannovar, "run_jannovar", return_value="java failed"
+        ), self.assertLogs("lib.vcf_jannovar", level="WARNING"):
+            tables = vcf_jannovar.create_vcfs(self.cases, "tmp")
+        self.assertDictEqual(tables, {"1": None, "2": None})
+
+
+class JannovarBatchTest(unittest.TestCase):
+    '''Cases are converted with one request per batch.'''
+
+    def setUp(self):
+        self.client = jannovar.JannovarClient()
+        self.client.configure(batch_size=2)
+        self.cases = [
+            (str(i), "heterozygous", ["NM_1.1:c.{}A>G".format(i)])
+            for i in range(5)
+        ]
+
+    def test_batches(self):
+        responses = [(0, "vcf"), (0, None), (0, "vcf")]
+        with mock.patch.object(
+                self.client, "process_variants", side_effect=responses
+        ) as process, mock.patch.object(
+                jannovar, "split_jannovar_vcf",
+                side_effect=lambda _, cases: {c: "table" for c, _, _ in cases}
+        ):
+            results = self.client.create_vcfs(self.cases)
+        self.assertListEqual(
+            [len(c[0][0]) for c in process.call_args_list], [2, 2, 1]
+        )
+        # only cases of the failed request have no result
+        self.assertDictEqual(results, {
+            "0": "table", "1": "table", "2": None, "3": None, "4": "table"
+        })
+
+    def test_failed_request(self):
+        header, record = SplitJannovarTest.vcf_text.split("\n")[:2]
+
+        def process_variants(variants):
+            # one invalid variant fails the request of all its cases
+            if "NM_1.1:c.1A>G" in variants and len(variants) > 1:
+                return -1, "Could not parse NM_1.1:c.1A>G"
+            return 0, "\n".join([header] + [record] * len(variants)) + "\n"
+
+        with mock.patch.object(
+                self.client, "process_variants", side_effect=process_variants
+        ), self.assertLogs("lib.api.jannovar", level="WARNING"):
+            results = self.client.create_vcfs(self.cases)
+            # cases of the failed request are converted one by one
+            single = self.client.create_vcf(
+                self.cases[0][2], "heterozygous", "0"
+            )
+        self.assertIsNone(results["0"])
+        self.assertIsNone(results["1"])
+        self.assertIsInstance(results["2"], pandas.DataFrame)
+        self.assertIsInstance(single, pandas.DataFrame)
+
+    def test_fallback_warning(self):
+        class Request:
+            def __init__(self, request):
+                self.request = request
+
+            def needs_hgvs_vcf(self, *_):
+                return True
+
+            def hgvs_vcf_request(self):
+                return self.request
+
+        client = mock.Mock()
+        client.create_vcfs.return_value = {"0": "table", "1": None}
+        with mock.patch.object(case, "JANNOVAR_INST", client), \
+                self.assertLogs("lib.model.case", level="WARNING") as logs:
+            case.Case.create_hgvs_vcfs(
+                [Request(r) for r in self.cases[:2]], "simulated"
+            )
+        self.assertIn("failed, converting them one by one: 1", logs.output[0])
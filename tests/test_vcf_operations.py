@@ -0,0 +1,98 @@
+'''VCF operations tests.'''
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from lib import vcf_operations
+
+
+VCF = b"##fileformat=VCFv4.1\n#CHROM\tPOS\n1\t100\n"
+
+
+class VcfCatalogTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.vcf_dir = os.path.join(self.tmp_dir.name, "vcfs")
+        self.processed_dir = os.path.join(self.tmp_dir.name, "processed")
+        os.makedirs(self.vcf_dir)
+        for name in ("123.vcf", "1234_sample.vcf", "x99x.vcf"):
+            with open(os.path.join(self.vcf_dir, name), "wb") as vcf_file:
+                vcf_file.write(VCF)
+
+    def create_catalog(self):
+        return vcf_operations.VcfCatalog(self.vcf_dir, self.processed_dir)
+
+    def test_find_raw(self):
+        catalog = self.create_catalog()
+        self.assertEqual(
+            catalog.find_raw("1234"),
+            os.path.join(self.vcf_dir, "1234_sample.vcf")
+        )
+        self.assertEqual(
+            catalog.find_raw("123"), os.path.join(self.vcf_dir, "123.vcf")
+        )
+        # substring matches are found without a separate name part
+        self.assertEqual(
+            catalog.find_raw("99"), os.path.join(self.vcf_dir, "x99x.vcf")
+        )
+        self.assertIsNone(catalog.find_raw("555"))
+
+    def test_copy(self):
+        source = os.path.join(self.vcf_dir, "123.vcf")
+        destination = os.path.join(self.processed_dir, "123.vcf.gz")
+        self.create_catalog().copy(source, destination)
+        self.assertEqual(vcf_operations.read_vcf(destination)[:6], b"##file")
+
+        # a new run skips the unchanged copy without reading the files
+        catalog = self.create_catalog()
+        self.assertTrue(catalog.is_current(source, destination))
+        with mock.patch.object(vcf_operations, "move_vcf") as move_vcf:
+            catalog.copy(source, destination)
+            move_vcf.assert_not_called()
+
+        with open(source, "ab") as vcf_file:
+            vcf_file.write(b"1\t200\n")
+        self.assertFalse(self.create_catalog().is_current(source, destination))
+
+    def test_deleted_destination(self):
+        source = os.path.join(self.vcf_dir, "123.vcf")
+        destination = os.path.join(self.processed_dir, "123.vcf.gz")
+        catalog = self.create_catalog()
+        catalog.copy(source, destination)
+        os.remove(destination)
+        # the same catalog notices the missing copy
+        self.assertFalse(catalog.is_current(source, destination))
+        catalog.copy(source, destination)
+        self.assertTrue(os.path.exists(destination))
+
+    def test_clear_catalogs(self):
+        catalog = vcf_operations.get_vcf_catalog(
+            self.vcf_dir, self.processed_dir
+        )
+        self.addCleanup(vcf_operations.clear_vcf_catalogs)
+        with open(os.path.join(self.vcf_dir, "555.vcf"), "wb") as vcf_file:
+            vcf_file.write(VCF)
+        self.assertIsNone(catalog.find_raw("555"))
+        vcf_operations.clear_vcf_catalogs()
+        self.assertEqual(
+            vcf_operations.get_vcf_catalog(
+                self.vcf_dir, self.processed_dir
+            ).find_raw("555"),
+            os.path.join(self.vcf_dir, "555.vcf")
+        )
+
+    def test_compact(self):
+        source = os.path.join(self.vcf_dir, "123.vcf")
+        destination = os.path.join(self.processed_dir, "123.vcf.gz")
+        catalog = self.create_catalog()
+        catalog.copy(source, destination)
+        for _ in range(110):
+            os.remove(destination)
+            catalog.copy(source, destination)
+        self.create_catalog()
+        with open(catalog.path) as catalog_file:
+            self.assertEqual(len(catalog_file.readlines()), 1)
+        self.assertTrue(self.create_catalog().is_current(source, destination))
@@ -0,0 +1,58 @@
+'''Worker pool tests.'''
+import unittest
+
+from lib import visual
+
+
+class Item:
+
+    def __init__(self, value):
+        self.value = value
+        self._square = None
+        self.payload = list(range(1000))
+
+
+def square(item, offset=0):
+    item._square = item.value ** 2 + offset
+    return item._square, item
+
+
+class MultiprocessTest(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [Item(i) for i in range(20)]
+
+    def test_changed_fields(self):
+        result = visual.multiprocess(
+            "Square", square, self.items, offset=1,
+            changed_fields=["_square"]
+        )
+        # results are ordered and contain the items of the parent process
+        for item, (value, result_item) in zip(self.items, result):
+            self.assertIs(result_item, item)
+            self.assertEqual(value, item.value ** 2 + 1)
+            self.assertEqual(item._square, value)
+
+    def test_persistent_pool(self):
+        pool = visual.WorkerPool().start(processes=2, chunksize=3)
+        self.addCleanup(pool.close)
+        original_pool = visual.WORKER_POOL
+        visual.WORKER_POOL = pool
+        self.addCleanup(setattr, visual, "WORKER_POOL", original_pool)
+
+        for _ in range(2):
+            result = visual.multiprocess(
+                "Square", square, self.items, changed_fields=["_square"]
+            )
+            self.assertListEqual(
+                [value for value, _ in result],
+                [i ** 2 for i in range(20)]
+            )
+
+    def test_chunksize(self):
+        pool = visual.WorkerPool()
+        pool.processes = 2
+        self.assertEqual(pool.get_chunksize(0), 1)
+        self.assertEqual(pool.get_chunksize(17), 3)
+        pool.chunksize = 5
+        self.assertEqual(pool.get_chunksize(17), 5)